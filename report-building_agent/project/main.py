@@ -22,6 +22,7 @@ def print_help():
     print("\nAVAILABLE COMMANDS:", color='blue')
     print("  /help     - Show this help message")
     print("  /docs     - List available documents")
+    print("  /stats    - Show intent fast-path statistics and timings")
     print("  /quit     - Exit the assistant")
     print("\nExample queries:")
     print("  - What's the total amount in invoice INV-001?")
@@ -36,8 +37,8 @@ def list_documents(assistant: DocumentAssistant):
     print("\nAVAILABLE DOCUMENTS:", color='blue')
     print("-" * 40)
 
-    for doc_id, doc in assistant.retriever.documents.items():
-        print(f"ID: {doc_id}")
+    for doc in assistant.retriever.iter_documents():
+        print(f"ID: {doc.doc_id}")
         print(f"Title: {doc.title}")
         print(f"Type: {doc.doc_type}")
         if 'total' in doc.metadata:
@@ -49,6 +50,58 @@ def list_documents(assistant: DocumentAssistant):
         print("-" * 40)
 
 
+def print_stats(assistant: DocumentAssistant):
+    """Show how often intent classification skipped the LLM, and where turn time goes"""
+    stats = assistant.intent_stats.snapshot()
+    print("\nINTENT CLASSIFICATION:", color='blue')
+    print(f"  Classifications: {stats['classifications']}")
+    print(f"  Rule fast path:  {stats['fast_path']} ({stats['fast_path_rate']:.0%})")
+    print(f"  LLM calls:       {stats['llm']} (avg {stats['avg_llm_seconds']:.2f}s)")
+    print(f"  Est. time saved: {stats['estimated_seconds_saved']:.2f}s")
+
+    timings = assistant.tracer.registry.snapshot()
+    if timings:
+        print("\nTIMINGS (ms):", color='blue')
+        print(f"  {'span':<40}{'count':>7}{'p50':>10}{'p95':>10}{'max':>10}")
+        for name, histogram in timings.items():
+            print(
+                f"  {name:<40}{histogram['count']:>7}{histogram['p50']:>10.1f}"
+                f"{histogram['p95']:>10.1f}{histogram['max']:>10.1f}"
+            )
+
+
+def render_stream(assistant: DocumentAssistant, user_input: str):
+    """Print a streamed turn: tool calls, then answer tokens, then the turn details"""
+    streamed_answer = False
+    for event in assistant.stream_message(user_input):
+        event_type = event["type"]
+
+        if event_type == "tool_call":
+            print(f"  -> {event['tool']}({event['args']})", color='magenta')
+        elif event_type == "token":
+            if not streamed_answer:
+                print("\n🤖 Assistant:", end=" ")
+                streamed_answer = True
+            print(event["content"], end="", flush=True)
+        elif event_type == "answer":
+            # Cached or non-streaming responses arrive whole
+            if not streamed_answer and event.get("response"):
+                print("\n🤖 Assistant:", event["response"])
+            elif streamed_answer:
+                print()
+        elif event_type == "done":
+            if event.get("intent"):
+                print(f"\nINTENT: {event['intent']['intent_type']}", color='green')
+            if event.get("sources"):
+                print(f"\nSOURCES: {', '.join(event['sources'])}", color='blue')
+            if event.get("tools_used"):
+                print(f"\nTOOLS USED: {', '.join(event['tools_used'])}", color='magenta')
+            if event.get("summary"):
+                print(f"\nCONVERSATION SUMMARY: {event['summary']}", color='cyan')
+        elif event_type == "error":
+            print(f"\nError: {event.get('error', 'Unknown error')}", color='red')
+
+
 def main():
     """Main interactive loop"""
     # Load environment variables
@@ -69,7 +122,11 @@ def main():
     assistant = DocumentAssistant(
         openai_api_key=api_key,
         model_name="gpt-4o",
-        temperature=0.1
+        temperature=0.1,
+        corpus_path=os.getenv("DOCDACITY_CORPUS"),
+        document_db_path=os.getenv("DOCDACITY_DB"),
+        background_memory=os.getenv("DOCDACITY_BACKGROUND_MEMORY") == "1",
+        traces_dir="./traces"
     )
 
     # Start session
@@ -91,6 +148,7 @@ def main():
 
             # Handle commands
             if user_input.lower() == "/quit":
+                assistant.wait_for_memory()
                 print("\nGoodbye!", color='blue')
                 break
             elif user_input.lower() == "/help":
@@ -99,29 +157,12 @@ def main():
             elif user_input.lower() == "/docs":
                 list_documents(assistant)
                 continue
+            elif user_input.lower() == "/stats":
+                print_stats(assistant)
+                continue
 
-            # Process the message
-            print("\nProcessing...", color='yellow')
-            result = assistant.process_message(user_input)
-
-            if result["success"]:
-                print("\n🤖 Assistant:", end=" ")
-
-                if result.get("response"):
-                    print(result["response"])
-                if result.get("intent"):
-                    intent = result["intent"]
-                    print(f"\nINTENT: {intent['intent_type']}", color='green')
-                if result.get("active_documents"):
-                    print(f"\nSOURCES: {', '.join(result['active_documents'])}", color='blue')
-                if result.get("tools_used"):
-                    print(f"\nTOOLS USED: {', '.join(result['tools_used'])}", color='magenta')
-                if result.get("summary"):
-                    print(f"\nCONVERSATION SUMMARY: {result['summary']}", color='cyan')
-
-
-            else:
-                print(f"\nError: {result.get('error', 'Unknown error')}", color='red')
+            # Stream the turn: tool activity and answer tokens are printed as they arrive
+            render_stream(assistant, user_input)
 
         except KeyboardInterrupt:
             print("\n\nGoodbye!", color='blue')
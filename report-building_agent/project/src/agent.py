@@ -1,20 +1,28 @@
 from typing import TypedDict, Annotated, List, Dict, Any, Optional, Literal
 
 from langchain_core.prompts import ChatPromptTemplate, SystemMessagePromptTemplate, MessagesPlaceholder
-from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from pydantic import BaseModel
 from langgraph.graph import StateGraph, END
 from langgraph.graph.message import add_messages
 from langgraph.prebuilt import create_react_agent, tools_condition, ToolNode
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.checkpoint.memory import InMemorySaver
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage, ToolMessage
 import re
 import operator
+from functools import partial
+import time
 from schemas import (
     UserIntent, SessionState,
     AnswerResponse, SummarizationResponse, CalculationResponse, UpdateMemoryResponse
 )
-from prompts import get_intent_classification_prompt, get_chat_prompt_template, MEMORY_SUMMARY_PROMPT
+from prompts import get_intent_classification_prompt, get_chat_prompt_template, MEMORY_UPDATE_PROMPT
+from intent_rules import classify_intent_by_rules, IntentFastPathStats, DEFAULT_FAST_PATH_THRESHOLD
+from context import ContextBuilder, DEFAULT_CONTEXT_BUILDER
+
+# Fallback counters when the caller does not pass its own via config["configurable"]["intent_stats"]
+INTENT_FAST_PATH_STATS = IntentFastPathStats()
 
 
 # The AgentState class is already implemented for you.  Study the
@@ -36,6 +44,8 @@ class AgentState(TypedDict):
     # Memory and context
     conversation_summary: str
     active_documents: Optional[List[str]]
+    # How many entries of messages are already folded into conversation_summary
+    summarized_message_count: int
 
     # Current task state
     current_response: Optional[Dict[str, Any]]
@@ -49,46 +59,54 @@ class AgentState(TypedDict):
     actions_taken: Annotated[List[str], operator.add]
 
 
-def invoke_react_agent(response_schema: type[BaseModel], messages: List[BaseMessage], llm, tools) -> (
-Dict[str, Any], List[str]):
+def build_react_agent(response_schema: type[BaseModel], llm, tools):
+    """
+    Compile the ReAct agent a task node runs. create_workflow builds one per task and
+    the nodes close over them, so nothing is compiled per turn and nothing outlives the workflow.
+    """
     llm_with_tools = llm.bind_tools(
         tools
     )
 
-    agent = create_react_agent(
+    return create_react_agent(
         model=llm_with_tools,  # Use the bound model
         tools=tools,
         response_format=response_schema,
     )
 
+
+def invoke_react_agent(agent, messages: List[BaseMessage]) -> (Dict[str, Any], List[str]):
     result = agent.invoke({"messages": messages})
-    tools_used = [t.name for t in result.get("messages", []) if isinstance(t, ToolMessage)]
+    tools_used = [t.name for t in result.get("messages", [])[len(messages):] if isinstance(t, ToolMessage)]
 
     return result, tools_used
 
 
-def classify_intent(state: AgentState, config: RunnableConfig) -> AgentState:
-    """
-    Classify user intent and update next_step. Also records that this
-    function executed by appending "classify_intent" to actions_taken.
-    """
+async def ainvoke_react_agent(agent, messages: List[BaseMessage]) -> (Dict[str, Any], List[str]):
+    """Async variant of invoke_react_agent; model calls go through the LLM's async client"""
+    result = await agent.ainvoke({"messages": messages})
+    tools_used = [t.name for t in result.get("messages", [])[len(messages):] if isinstance(t, ToolMessage)]
 
-    llm = config.get("configurable", {}).get("llm")
-    history = state.get("messages", [])
+    return result, tools_used
 
-    structured_llm = llm.with_structured_output(UserIntent)
 
-    conversation_history = "\n".join(
-        [getattr(msg, "content", str(msg)) for msg in history]
+def _context_builder(config: RunnableConfig) -> ContextBuilder:
+    return config.get("configurable", {}).get("context_builder") or DEFAULT_CONTEXT_BUILDER
+
+
+def _intent_prompt(state: AgentState, config: RunnableConfig) -> str:
+    history = state.get("messages", [])
+    conversation_history = _context_builder(config).format(
+        history, state.get("conversation_summary")
     ) if history else "No conversation history."
 
-    prompt = get_intent_classification_prompt().format(
+    return get_intent_classification_prompt().format(
         user_input=state.get("user_input", ""),
         conversation_history=conversation_history
     )
 
-    intent: UserIntent = structured_llm.invoke(prompt)
 
+def _intent_update(intent: UserIntent) -> AgentState:
     next_step = "qa_agent"
     if intent.intent_type == "summarization":
         next_step = "summarization_agent"
@@ -104,132 +122,236 @@ def classify_intent(state: AgentState, config: RunnableConfig) -> AgentState:
     }
 
 
-def qa_agent(state: AgentState, config: RunnableConfig) -> AgentState:
+def classify_intent(state: AgentState, config: RunnableConfig) -> AgentState:
     """
-    Handle Q&A tasks and record the action.
+    Classify user intent and update next_step. Also records that this
+    function executed by appending "classify_intent" to actions_taken.
+    Confident rule-based classifications skip the LLM call entirely.
     """
-    llm = config.get("configurable").get("llm")
-    tools = config.get("configurable").get("tools")
 
-    prompt_template = get_chat_prompt_template("qa")
+    configurable = config.get("configurable", {})
+    llm = configurable.get("llm")
+    threshold = configurable.get("intent_fast_path_threshold", DEFAULT_FAST_PATH_THRESHOLD)
+    stats = configurable.get("intent_stats") or INTENT_FAST_PATH_STATS
+
+    intent: UserIntent = classify_intent_by_rules(state.get("user_input", ""))
+
+    if intent.confidence >= threshold:
+        stats.record_fast_path()
+    else:
+        structured_llm = llm.with_structured_output(UserIntent)
+
+        started = time.perf_counter()
+        intent = structured_llm.invoke(_intent_prompt(state, config))
+        stats.record_llm(time.perf_counter() - started)
+
+    return _intent_update(intent)
+
 
-    messages = prompt_template.invoke({
+async def aclassify_intent(state: AgentState, config: RunnableConfig) -> AgentState:
+    """Async variant of classify_intent"""
+
+    configurable = config.get("configurable", {})
+    llm = configurable.get("llm")
+    threshold = configurable.get("intent_fast_path_threshold", DEFAULT_FAST_PATH_THRESHOLD)
+    stats = configurable.get("intent_stats") or INTENT_FAST_PATH_STATS
+
+    intent: UserIntent = classify_intent_by_rules(state.get("user_input", ""))
+
+    if intent.confidence >= threshold:
+        stats.record_fast_path()
+    else:
+        structured_llm = llm.with_structured_output(UserIntent)
+
+        started = time.perf_counter()
+        intent = await structured_llm.ainvoke(_intent_prompt(state, config))
+        stats.record_llm(time.perf_counter() - started)
+
+    return _intent_update(intent)
+
+
+def _task_messages(task_type: str, state: AgentState, config: RunnableConfig) -> List[BaseMessage]:
+    """Prompt for a task agent: system prompt, token-budgeted history and the user input"""
+    prompt_template = get_chat_prompt_template(task_type)
+
+    chat_history = _context_builder(config).build(
+        state.get("messages", []), state.get("conversation_summary")
+    )
+    return prompt_template.invoke({
         "input": state["user_input"],
-        "chat_history": state.get("messages", []),
+        "chat_history": chat_history,
     }).to_messages()
 
-    result, tools_used = invoke_react_agent(AnswerResponse, messages, llm, tools)
 
+def _task_update(
+        node_name: str,
+        messages: List[BaseMessage],
+        result: Dict[str, Any],
+        tools_used: List[str]
+) -> AgentState:
+    # The agent's output starts with the prompt it was given; only the user input and
+    # what the agent added belong in the conversation state
+    new_messages = result.get("messages", [])[len(messages) - 1:]
     return {
-        "messages": result.get("messages", []),
-        "actions_taken": ["qa_agent"],
+        "messages": new_messages,
+        "actions_taken": [node_name],
         "current_response": result,
         "tools_used": tools_used,
         "next_step": "update_memory",
     }
 
 
-def summarization_agent(state: AgentState, config: RunnableConfig) -> AgentState:
+def qa_agent(state: AgentState, config: RunnableConfig, agent) -> AgentState:
+    """
+    Handle Q&A tasks and record the action.
+    """
+    messages = _task_messages("qa", state, config)
+    result, tools_used = invoke_react_agent(agent, messages)
+
+    return _task_update("qa_agent", messages, result, tools_used)
+
+
+async def aqa_agent(state: AgentState, config: RunnableConfig, agent) -> AgentState:
+    """Async variant of qa_agent"""
+    messages = _task_messages("qa", state, config)
+    result, tools_used = await ainvoke_react_agent(agent, messages)
+
+    return _task_update("qa_agent", messages, result, tools_used)
+
+
+def summarization_agent(state: AgentState, config: RunnableConfig, agent) -> AgentState:
     """
     Handle summarization tasks and record the action.
     """
 
-    llm = config.get("configurable", {}).get("llm")
-    tools = config.get("configurable", {}).get("tools")
+    messages = _task_messages("summarization", state, config)
+    result, tools_used = invoke_react_agent(agent, messages)
 
-    prompt_template = get_chat_prompt_template("summarization")
+    return _task_update("summarization_agent", messages, result, tools_used)
 
-    messages = prompt_template.invoke({
-        "input": state["user_input"],
-        "chat_history": state.get("messages", []),
-    }).to_messages()
 
-    result, tools_used = invoke_react_agent(SummarizationResponse, messages, llm, tools)
+async def asummarization_agent(state: AgentState, config: RunnableConfig, agent) -> AgentState:
+    """Async variant of summarization_agent"""
 
-    return {
-        "messages": result.get("messages", []),
-        "actions_taken": ["summarization_agent"],
-        "current_response": result,
-        "tools_used": tools_used,
-        "next_step": "update_memory",
-    }
+    messages = _task_messages("summarization", state, config)
+    result, tools_used = await ainvoke_react_agent(agent, messages)
+
+    return _task_update("summarization_agent", messages, result, tools_used)
 
 
-def calculation_agent(state: AgentState, config: RunnableConfig) -> AgentState:
+def calculation_agent(state: AgentState, config: RunnableConfig, agent) -> AgentState:
     """
     Handle calculation tasks and record the action.
     """
 
-    llm = config.get("configurable", {}).get("llm")
-    tools = config.get("configurable", {}).get("tools")
+    messages = _task_messages("calculation", state, config)
+    result, tools_used = invoke_react_agent(agent, messages)
 
-    prompt_template = get_chat_prompt_template("calculation")
+    return _task_update("calculation_agent", messages, result, tools_used)
 
-    messages = prompt_template.invoke({
-        "input": state["user_input"],
-        "chat_history": state.get("messages", []),
-    }).to_messages()
 
-    result, tools_used = invoke_react_agent(CalculationResponse, messages, llm, tools)
+async def acalculation_agent(state: AgentState, config: RunnableConfig, agent) -> AgentState:
+    """Async variant of calculation_agent"""
 
-    return {
-        "messages": result.get("messages", []),
-        "actions_taken": ["calculation_agent"],
-        "current_response": result,
-        "tools_used": tools_used,
-        "next_step": "update_memory",
-    }
+    messages = _task_messages("calculation", state, config)
+    result, tools_used = await ainvoke_react_agent(agent, messages)
 
+    return _task_update("calculation_agent", messages, result, tools_used)
 
-def update_memory(state: AgentState, config: RunnableConfig) -> AgentState:
-    """
-    Update conversation memory and record the action.
-    """
 
-    llm = config.get("configurable", {}).get("llm")
+def _memory_prompt(state: AgentState):
+    messages = state.get("messages", [])
+    summarized_count = state.get("summarized_message_count") or 0
+    previous_summary = state.get("conversation_summary")
+    if not isinstance(previous_summary, str) or not previous_summary.strip():
+        previous_summary = "No previous conversation."
 
-    prompt_with_history = ChatPromptTemplate.from_messages([
-        SystemMessagePromptTemplate.from_template(MEMORY_SUMMARY_PROMPT),
+    return ChatPromptTemplate.from_messages([
+        SystemMessagePromptTemplate.from_template(MEMORY_UPDATE_PROMPT),
         MessagesPlaceholder("chat_history"),
     ]).invoke({
-        "chat_history": state.get("messages", []),
+        "previous_summary": previous_summary,
+        "chat_history": messages[summarized_count:],
     })
 
-    structured_llm = llm.with_structured_output(
-        UpdateMemoryResponse
-    )
-
-    response: UpdateMemoryResponse = structured_llm.invoke(prompt_with_history)
 
+def _memory_update(state: AgentState, response: UpdateMemoryResponse) -> AgentState:
     active_documents = state.get("active_documents", []) or []
     if response.document_ids:
         active_documents = list(set(active_documents + response.document_ids))
 
     return {
         "conversation_summary": response.summary,
+        "summarized_message_count": len(state.get("messages", [])),
         "active_documents": active_documents,
         "actions_taken": ["update_memory"],
         "next_step": "end"
     }
 
 
+def update_memory(state: AgentState, config: RunnableConfig) -> AgentState:
+    """
+    Update conversation memory and record the action.
+    Only messages added since the last summary are sent, together with that summary,
+    so the cost per turn does not grow with the length of the conversation.
+    """
+
+    llm = config.get("configurable", {}).get("llm")
+
+    structured_llm = llm.with_structured_output(
+        UpdateMemoryResponse
+    )
+
+    response: UpdateMemoryResponse = structured_llm.invoke(_memory_prompt(state))
+
+    return _memory_update(state, response)
+
+
+async def aupdate_memory(state: AgentState, config: RunnableConfig) -> AgentState:
+    """Async variant of update_memory"""
+
+    llm = config.get("configurable", {}).get("llm")
+
+    structured_llm = llm.with_structured_output(
+        UpdateMemoryResponse
+    )
+
+    response: UpdateMemoryResponse = await structured_llm.ainvoke(_memory_prompt(state))
+
+    return _memory_update(state, response)
+
+
 def should_continue(state: AgentState) -> str:
     """Router function"""
     return state.get("next_step", "end")
 
 
-def create_workflow(llm, tools):
+def create_workflow(llm, tools, defer_memory: bool = False, checkpointer: Optional[BaseCheckpointSaver] = None):
     """
     Creates the LangGraph agents.
-    Compiles the workflow with an InMemorySaver checkpointer to persist state.
+    Compiles the workflow with the given checkpointer (e.g. SQLiteCheckpointSaver) to
+    persist state, or with an InMemorySaver when none is passed.
+    The ReAct sub-agents for the task nodes are compiled here too, once, and the nodes
+    close over them, so turns reuse them and they are released with the workflow.
+
+    Each node has a sync and an async implementation, so the same compiled graph serves
+    invoke() and ainvoke(); with ainvoke every model call uses the LLM's async client.
+
+    With defer_memory=True the graph pauses before update_memory, so a turn returns as
+    soon as the answer is ready; resuming the thread with invoke(None, config) then runs
+    the memory update and checkpoints its result.
     """
     workflow = StateGraph(AgentState)
 
-    workflow.add_node("classify_intent", classify_intent)
-    workflow.add_node("qa_agent", qa_agent)
-    workflow.add_node("summarization_agent", summarization_agent)
-    workflow.add_node("calculation_agent", calculation_agent)
-    workflow.add_node("update_memory", update_memory)
+    workflow.add_node("classify_intent", RunnableLambda(classify_intent, afunc=aclassify_intent))
+    for node, func, afunc, response_schema in [
+        ("qa_agent", qa_agent, aqa_agent, AnswerResponse),
+        ("summarization_agent", summarization_agent, asummarization_agent, SummarizationResponse),
+        ("calculation_agent", calculation_agent, acalculation_agent, CalculationResponse),
+    ]:
+        agent = build_react_agent(response_schema, llm, tools)
+        workflow.add_node(node, RunnableLambda(partial(func, agent=agent), afunc=partial(afunc, agent=agent)))
+    workflow.add_node("update_memory", RunnableLambda(update_memory, afunc=aupdate_memory))
 
     workflow.set_entry_point("classify_intent")
     workflow.add_conditional_edges(
@@ -249,4 +371,7 @@ def create_workflow(llm, tools):
 
     workflow.add_edge("update_memory", END)
 
-    return workflow.compile(checkpointer=InMemorySaver())
+    return workflow.compile(
+        checkpointer=checkpointer or InMemorySaver(),
+        interrupt_before=["update_memory"] if defer_memory else None
+    )
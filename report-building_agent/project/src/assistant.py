@@ -1,17 +1,36 @@
+import asyncio
 import os
 import json
-from typing import Dict, Any, List, Optional
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from datetime import datetime
 import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 
-from langchain_core.messages import BaseMessage
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage, AIMessage, ToolMessage
 from langchain_openai import ChatOpenAI
 
 from schemas import SessionState
 from retrieval import SimulatedRetriever
+from sqlite_retrieval import SQLiteRetriever
+from ingestion import iter_corpus
 from tools import get_all_tools, ToolLogger
+from tool_cache import ToolResultCache
+from search_format import DEFAULT_SEARCH_TOKEN_BUDGET
+from session_store import SessionStore
+from checkpointer import SQLiteCheckpointSaver
+from context import ContextBuilder, TokenCounter
 from agent import create_workflow, AgentState
+from intent_rules import IntentFastPathStats, DEFAULT_FAST_PATH_THRESHOLD
+from llm_cache import ResponseCache
 from prompts import MEMORY_SUMMARY_PROMPT
+from tracing import Tracer
+
+# OpenAI-compatible endpoint the assistant's ChatOpenAI talks to
+DEFAULT_BASE_URL = "https://openai.vocareum.com/v1"
 
 
 class DocumentAssistant:
@@ -25,77 +44,242 @@ class DocumentAssistant:
             openai_api_key: str,
             model_name: str = "gpt-4o",
             temperature: float = 0.1,
-            session_storage_path: str = "./sessions"
+            session_storage_path: str = "./sessions",
+            logs_dir: str = "./logs",
+            corpus_path: Optional[str] = None,
+            document_db_path: Optional[str] = None,
+            intent_fast_path_threshold: float = DEFAULT_FAST_PATH_THRESHOLD,
+            response_cache: Optional[ResponseCache] = None,
+            enable_response_cache: bool = True,
+            background_memory: bool = False,
+            history_token_budget: int = 3000,
+            search_token_budget: int = DEFAULT_SEARCH_TOKEN_BUDGET,
+            llm: Optional[BaseChatModel] = None,
+            checkpoint_cache_bytes: int = 64 * 1024 * 1024,
+            max_sessions: int = 1024,
+            callbacks: Optional[List[BaseCallbackHandler]] = None,
+            traces_dir: Optional[str] = None
     ):
-        # Initialize LLM
-        self.llm = ChatOpenAI(
-            api_key=openai_api_key,
-            model=model_name,
-            temperature=temperature,
-            base_url="https://openai.vocareum.com/v1"
+        # Initialize components
+        # A database path switches to the persistent SQLite backend; both expose the same interface
+        if document_db_path:
+            self.retriever = SQLiteRetriever(document_db_path)
+        else:
+            self.retriever = SimulatedRetriever()
+        if corpus_path:
+            report = self.retriever.add_documents(iter_corpus(corpus_path))
+            print(
+                f"Loaded {report.documents} documents from {corpus_path} "
+                f"in {report.elapsed_seconds:.2f}s ({report.docs_per_sec:,.0f} docs/sec)"
+            )
+
+        # LLM response cache, invalidated whenever the retriever's corpus changes
+        self.response_cache: Optional[ResponseCache] = None
+        if enable_response_cache:
+            self.response_cache = response_cache or ResponseCache()
+            if self.response_cache.version_fn is None:
+                retriever = self.retriever
+                self.response_cache.version_fn = lambda: retriever.corpus_version
+
+        # Initialize LLM; a model passed in (e.g. the offline StubChatModel) is used as is
+        if llm is not None:
+            self.llm = llm
+        else:
+            self.llm = ChatOpenAI(
+                api_key=openai_api_key,
+                model=model_name,
+                temperature=temperature,
+                base_url=DEFAULT_BASE_URL,
+                cache=self.response_cache
+            )
+        self.tool_logger = ToolLogger(logs_dir=logs_dir)
+        # Search and reader results are memoized across sessions until the corpus changes
+        retriever = self.retriever
+        self.tool_cache = ToolResultCache(version_fn=lambda: retriever.corpus_version)
+        # One token counter for history trimming and the search output budget
+        self.token_counter = TokenCounter(model_name)
+        self.tools = get_all_tools(
+            self.retriever, self.tool_logger, self.tool_cache,
+            search_token_budget=search_token_budget, counter=self.token_counter
         )
 
-        # Initialize components
-        self.retriever = SimulatedRetriever()
-        self.tool_logger = ToolLogger(logs_dir="./logs")
-        self.tools = get_all_tools(self.retriever, self.tool_logger)
+        # Chat history sent to the prompts is cut to this many tokens, with the summary standing in for the rest
+        self.context_builder = ContextBuilder(max_tokens=history_token_budget, counter=self.token_counter)
+
+        # Timing spans for every turn (nodes, tools, model calls), kept as histograms and,
+        # when a traces_dir is given (main.py and server.py opt in), written to
+        # traces_dir/trace_<timestamp>.jsonl
+        self.tracer = Tracer.to_directory(traces_dir) if traces_dir else Tracer()
+
+        # Callback handlers attached to every workflow run (e.g. the benchmark's latency recorder)
+        self.callbacks = [self.tracer] + list(callbacks or [])
 
-        # Create workflow (compiled with checkpointer inside create_workflow)
-        self.workflow = create_workflow(self.llm, self.tools)
+        # Rule-based intent classification settings and hit counters
+        self.intent_fast_path_threshold = intent_fast_path_threshold
+        self.intent_stats = IntentFastPathStats()
 
         # Session management
         self.session_storage_path = session_storage_path
         os.makedirs(session_storage_path, exist_ok=True)
+        # Turns are appended to a SQLite store; legacy <session_id>.json files are still read
+        self.session_store = SessionStore(os.path.join(session_storage_path, "sessions.db"))
 
-        # Current session
+        # Workflow state is checkpointed to SQLite next to the sessions, so it survives restarts;
+        # only recently used threads stay in memory, within checkpoint_cache_bytes
+        self.checkpointer = SQLiteCheckpointSaver(
+            os.path.join(session_storage_path, "checkpoints.db"),
+            max_cache_bytes=checkpoint_cache_bytes
+        )
+
+        # Create workflow (compiled with the checkpointer inside create_workflow)
+        # With background_memory the memory update runs after the response is returned
+        self.background_memory = background_memory
+        self.workflow = create_workflow(
+            self.llm, self.tools, defer_memory=background_memory, checkpointer=self.checkpointer
+        )
+        self._memory_executor = ThreadPoolExecutor(max_workers=1) if background_memory else None
+        # session_id -> memory update still running for that session's last turn
+        self._pending_memory: Dict[str, Future] = {}
+
+        # Sessions by id, shared by the sync and async APIs. current_session is the one
+        # process_message works on; aprocess_message looks sessions up by id instead.
+        # At most max_sessions stay in memory; the least recently used idle ones are dropped
+        # and reloaded from the session store (their workflow state is in the checkpointer).
+        self.max_sessions = max_sessions
+        self.sessions: "OrderedDict[str, SessionState]" = OrderedDict()
+        self._sessions_lock = threading.Lock()
         self.current_session: Optional[SessionState] = None
+        # Turns within one session run one at a time; different sessions run concurrently.
+        # session_id -> [lock, number of turns holding or waiting for it]
+        self._session_locks: Dict[str, list] = {}
+        self._pending_async_memory: Dict[str, asyncio.Task] = {}
 
     def start_session(self, user_id: str, session_id: Optional[str] = None) -> str:
         """Start a new session or resume an existing one."""
+        self.current_session, resumed = self._open_session(user_id, session_id)
+        if resumed:
+            print(f"Resumed session {self.current_session.session_id}")
+        else:
+            print(f"Started new session {self.current_session.session_id}")
+        return self.current_session.session_id
+
+    def _open_session(self, user_id: str, session_id: Optional[str] = None) -> Tuple[SessionState, bool]:
+        """
+        Return the session for session_id (loaded or created) and whether it already existed.
+        Loading reads the session store, so async callers run this in a thread.
+        """
+        with self._sessions_lock:
+            if session_id in self.sessions:
+                self.sessions.move_to_end(session_id)
+                return self.sessions[session_id], True
+
         if session_id and self._session_exists(session_id):
             # Load existing session
-            self.current_session = self._load_session(session_id)
-            print(f"Resumed session {session_id}")
+            session = self._load_session(session_id)
+            resumed = True
         else:
             # Create new session
-            session_id = session_id or str(uuid.uuid4())
-            self.current_session = SessionState(
-                session_id=session_id,
+            session = SessionState(
+                session_id=session_id or str(uuid.uuid4()),
                 user_id=user_id,
                 conversation_history=[],
                 document_context=[]
             )
-            print(f"Started new session {session_id}")
-        return session_id
+            resumed = False
+
+        with self._sessions_lock:
+            session = self.sessions.setdefault(session.session_id, session)
+            self._evict_sessions(keep=session.session_id)
+        return session, resumed
+
+    def _evict_sessions(self, keep: Optional[str] = None) -> None:
+        """
+        Drop least recently used sessions beyond max_sessions. keep, the current session and
+        sessions with a turn or memory update in progress stay. Needs _sessions_lock.
+        """
+        excess = len(self.sessions) - self.max_sessions
+        if excess <= 0:
+            return
+        busy = {keep} | set(self._session_locks) | set(self._pending_memory) | set(self._pending_async_memory)
+        if self.current_session is not None:
+            busy.add(self.current_session.session_id)
+        idle = [session_id for session_id in self.sessions if session_id not in busy][:excess]
+        for session_id in idle:
+            del self.sessions[session_id]
 
     def _session_exists(self, session_id: str) -> bool:
+        if self.session_store.exists(session_id):
+            return True
         filepath = os.path.join(self.session_storage_path, f"{session_id}.json")
         return os.path.exists(filepath)
 
     def _load_session(self, session_id: str) -> SessionState:
+        session = self.session_store.load(session_id)
+        if session is not None:
+            return session
+
+        # Sessions saved as whole JSON files before the store existed are imported once
         filepath = os.path.join(self.session_storage_path, f"{session_id}.json")
         with open(filepath, 'r') as f:
             data = json.load(f)
-        return SessionState(**data)
+        session = SessionState(**data)
+        self.session_store.save(session)
+        return session
 
-    def _save_session(self) -> None:
-        if self.current_session:
-            filepath = os.path.join(
-                self.session_storage_path,
-                f"{self.current_session.session_id}.json"
-            )
-            session_dict = self.current_session.dict()
+    def _save_session(self, session: SessionState, turn: Dict[str, Any]) -> None:
+        """Persist one turn; only its delta is written, never the whole session"""
+        try:
+            self.session_store.append_turn(session, turn)
+        except Exception as e:
+            print(f"Warning: Failed to save session {session.session_id}: {e}")
 
-            def serialize_datetime(obj):
-                if isinstance(obj, datetime):
-                    return obj.isoformat()
-                return obj
+    def _update_memory(self, config) -> None:
+        """Resume the paused thread so update_memory runs and checkpoints its result"""
+        try:
+            self.workflow.invoke(None, config=config)
+        except Exception as e:
+            print(f"Warning: Memory update failed for session {config['configurable']['thread_id']}: {e}")
 
-            with open(filepath, 'w') as f:
-                json.dump(session_dict, f, indent=2, default=serialize_datetime)
+    async def _aupdate_memory(self, config) -> None:
+        """Async variant of _update_memory"""
+        try:
+            await self.workflow.ainvoke(None, config=config)
+        except Exception as e:
+            print(f"Warning: Memory update failed for session {config['configurable']['thread_id']}: {e}")
 
-    def _get_conversation_summary(self, config) -> str:
-        if not self.current_session or not self.current_session.conversation_history:
+    def _schedule_memory(self, session_id: str, config) -> None:
+        """Run the session's memory update in the background; the entry is dropped once it finishes"""
+        future = self._memory_executor.submit(self._update_memory, config)
+        self._pending_memory[session_id] = future
+        self._forget_when_done(self._pending_memory, session_id, future)
+
+    @staticmethod
+    def _forget_when_done(pending: Dict[str, Any], session_id: str, job) -> None:
+        """Remove a background job (Future or Task) from pending once it finishes, unless a newer one replaced it"""
+        def forget(done):
+            if pending.get(session_id) is done:
+                pending.pop(session_id, None)
+        job.add_done_callback(forget)
+
+    def wait_for_memory(self, session_id: Optional[str] = None) -> None:
+        """Block until pending background memory updates (for one session or all) have finished"""
+        session_ids = [session_id] if session_id else list(self._pending_memory)
+        for pending_id in session_ids:
+            future = self._pending_memory.pop(pending_id, None)
+            if future is not None:
+                future.result()
+
+    async def await_memory(self, session_id: Optional[str] = None) -> None:
+        """Wait for memory updates scheduled by aprocess_message (for one session or all)"""
+        session_ids = [session_id] if session_id else list(self._pending_async_memory)
+        for pending_id in session_ids:
+            task = self._pending_async_memory.pop(pending_id, None)
+            if task is not None:
+                await task
+
+    def _get_conversation_summary(self, config, session: Optional[SessionState] = None) -> str:
+        session = session or self.current_session
+        if not session or not session.conversation_history:
             return "No previous conversation."
 
         current_state = self.workflow.get_state(config).values
@@ -103,6 +287,15 @@ class DocumentAssistant:
         summary = current_state.get("conversation_summary", [])
         return summary
 
+    async def _aget_conversation_summary(self, config, session: SessionState) -> str:
+        if not session.conversation_history:
+            return "No previous conversation."
+
+        current_state = (await self.workflow.aget_state(config)).values
+
+        summary = current_state.get("conversation_summary", [])
+        return summary
+
     def _get_conversation_history(self, config) -> List[BaseMessage]:
         if not self.current_session or not self.current_session.conversation_history:
             return []
@@ -112,59 +305,234 @@ class DocumentAssistant:
         history = current_state.get("messages", [])
         return history
 
-
-    def process_message(self, user_input: str) -> Dict[str, Any]:
-        """Process a user message using the LangGraph workflow."""
-
-        if not self.current_session:
-            raise ValueError("No active session. Call start_session() first.")
-
-        # Configures workflow execution (threaded by session id)
-        config = {
+    def _workflow_config(self, session: SessionState) -> Dict[str, Any]:
+        """Configures workflow execution (threaded by session id)"""
+        return {
             "configurable": {
-                "thread_id": self.current_session.session_id,
+                "thread_id": session.session_id,
                 "llm": self.llm,
-                "tools": self.tools,
-            }
+                "intent_fast_path_threshold": self.intent_fast_path_threshold,
+                "intent_stats": self.intent_stats,
+                "context_builder": self.context_builder,
+            },
+            "callbacks": self.callbacks,
         }
-        initial_state: AgentState = {
+
+    @staticmethod
+    def _initial_state(session: SessionState, user_input: str, conversation_summary: str) -> AgentState:
+        return {
             "messages": [],
             "user_input": user_input,
             "intent": None,
             "next_step": "classify_intent",
-            "conversation_history": self.current_session.conversation_history,
-            "conversation_summary": self._get_conversation_summary(config),
-            "active_documents": self.current_session.document_context,
+            "conversation_history": session.conversation_history,
+            "conversation_summary": conversation_summary,
+            "active_documents": session.document_context,
             "current_response": None,
             "tools_used": [],
-            "session_id": self.current_session.session_id,
-            "user_id": self.current_session.user_id,
+            "session_id": session.session_id,
+            "user_id": session.user_id,
             # Initialise actions_taken list for this turn
             "actions_taken": []
         }
+
+    @staticmethod
+    def _record_turn(
+            session: SessionState,
+            final_state: Dict[str, Any],
+            previous_message_count: int
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Add a finished turn to the session and return it for saving (None if nothing happened).
+        The turn keeps only the messages added to the workflow thread after previous_message_count.
+        """
+        messages = final_state.get("messages") or []
+        if not messages:
+            return None
+
+        intent = final_state.get("intent")
+
+        turn = {
+            "timestamp": datetime.now().isoformat(),
+            "user_input": final_state.get("user_input"),
+            "intent": intent.dict() if intent else None,
+            "response": messages[-1].content,
+            "tools_used": final_state.get("tools_used", []),
+            "active_documents": final_state.get("active_documents", []),
+            "conversation_summary": final_state.get("conversation_summary"),
+            "messages": messages[previous_message_count:],
+        }
+
+        session.conversation_history.append(turn)
+        session.last_updated = datetime.now()
+        if final_state.get("active_documents"):
+            session.document_context = list(set(
+                session.document_context +
+                final_state["active_documents"]
+            ))
+        return turn
+
+    @staticmethod
+    def _turn_result(final_state: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "success": True,
+            "response": final_state.get("messages")[-1].content if final_state.get("messages") else None,
+            "intent": final_state.get("intent").dict() if final_state.get("intent") else None,
+            "tools_used": final_state.get("tools_used", []),
+            "sources": final_state.get("active_documents", []),
+            "actions_taken": final_state.get("actions_taken", []),
+            "summary": final_state.get("conversation_summary", [])
+        }
+
+    def process_message(self, user_input: str) -> Dict[str, Any]:
+        """Process a user message using the LangGraph workflow."""
+
+        if not self.current_session:
+            raise ValueError("No active session. Call start_session() first.")
+
+        session = self.current_session
+        # The previous turn's summary must be checkpointed before this turn reads it
+        self.wait_for_memory(session.session_id)
+
+        config = self._workflow_config(session)
+        initial_state = self._initial_state(session, user_input, self._get_conversation_summary(config, session))
+        previous_message_count = len(self.workflow.get_state(config).values.get("messages", []))
         try:
             # Invoke the workflow with a thread_id equal to the session_id
             final_state = self.workflow.invoke(initial_state, config=config)
             # Update session with new state
-            if final_state.get("messages"):
-
-                self.current_session.conversation_history.append(final_state)
-                self.current_session.last_updated = datetime.now()
-                if final_state.get("active_documents"):
-                    self.current_session.document_context = list(set(
-                        self.current_session.document_context +
-                        final_state["active_documents"]
-                    ))
-                self._save_session()
+            turn = self._record_turn(session, final_state, previous_message_count)
+            if turn:
+                self._save_session(session, turn)
+
+            if self.background_memory and self.workflow.get_state(config).next:
+                self._schedule_memory(session.session_id, config)
+            return self._turn_result(final_state)
+        except Exception as e:
             return {
-                "success": True,
-                "response": final_state.get("messages")[-1].content if final_state.get("messages") else None,
-                "intent": final_state.get("intent").dict() if final_state.get("intent") else None,
-                "tools_used": final_state.get("tools_used", []),
-                "sources": final_state.get("active_documents", []),
-                "actions_taken": final_state.get("actions_taken", []),
-                "summary": final_state.get("conversation_summary", [])
+                "success": False,
+                "error": str(e),
+                "response": None
             }
+
+    def stream_message(self, user_input: str) -> Iterator[Dict[str, Any]]:
+        """
+        Streaming variant of process_message. Yields events as the workflow runs:
+        - {"type": "node", "node": ...} when a workflow node finishes ("intent" is added for classify_intent)
+        - {"type": "tool_call", "tool": ..., "args": ...} and {"type": "tool_result", "tool": ...}
+        - {"type": "token", "content": ...} for answer text as the model produces it
+        - {"type": "answer", "response": ...} once the answer is complete, before memory is updated
+        - {"type": "done", ...} with the fields of process_message's result, or {"type": "error", "error": ...}
+        """
+
+        if not self.current_session:
+            raise ValueError("No active session. Call start_session() first.")
+
+        session = self.current_session
+        self.wait_for_memory(session.session_id)
+
+        config = self._workflow_config(session)
+        initial_state = self._initial_state(session, user_input, self._get_conversation_summary(config, session))
+        previous_message_count = len(self.workflow.get_state(config).values.get("messages", []))
+        try:
+            for namespace, mode, payload in self.workflow.stream(
+                    initial_state,
+                    config=config,
+                    stream_mode=["messages", "updates"],
+                    subgraphs=True
+            ):
+                if mode == "messages":
+                    message, metadata = payload
+                    # Answer text comes from the model node inside a task agent's ReAct graph;
+                    # structured-output calls (intent, memory, final response schema) are not streamed
+                    if (
+                            namespace and metadata.get("langgraph_node") == "agent"
+                            and isinstance(message, AIMessage)
+                            and isinstance(message.content, str) and message.content
+                    ):
+                        yield {"type": "token", "content": message.content}
+                    continue
+
+                for node, update in payload.items():
+                    if node.startswith("__"):
+                        continue
+                    update = update or {}
+                    if namespace:
+                        yield from self._react_events(node, update)
+                        continue
+
+                    event = {"type": "node", "node": node}
+                    if update.get("intent"):
+                        event["intent"] = update["intent"].dict()
+                    yield event
+                    if update.get("next_step") == "update_memory" and update.get("messages"):
+                        yield {"type": "answer", "response": update["messages"][-1].content}
+
+            final_state = self.workflow.get_state(config).values
+            turn = self._record_turn(session, final_state, previous_message_count)
+            if turn:
+                self._save_session(session, turn)
+
+            if self.background_memory and self.workflow.get_state(config).next:
+                self._schedule_memory(session.session_id, config)
+            yield {"type": "done", **self._turn_result(final_state)}
+        except Exception as e:
+            yield {"type": "error", "error": str(e)}
+
+    @staticmethod
+    def _react_events(node: str, update: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Tool events from a node update inside a task agent's ReAct graph"""
+        for message in update.get("messages", []) or []:
+            if node == "agent" and isinstance(message, AIMessage):
+                for call in message.tool_calls:
+                    yield {"type": "tool_call", "tool": call["name"], "args": call["args"]}
+            elif node == "tools" and isinstance(message, ToolMessage):
+                yield {"type": "tool_result", "tool": message.name}
+
+    async def aprocess_message(self, session_id: str, user_input: str, user_id: str = "anonymous") -> Dict[str, Any]:
+        """
+        Async counterpart of process_message for a given session.
+        The session is loaded or created on first use (user_id only applies to new sessions).
+        Many sessions can be served concurrently on one event loop; they share the
+        retriever, tools and compiled workflow, and keep their state in their own thread.
+        """
+        # The lock entry is dropped once no turn holds or waits for it
+        entry = self._session_locks.setdefault(session_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                return await self._aprocess_turn(session_id, user_input, user_id)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                self._session_locks.pop(session_id, None)
+                # Sessions that were busy when others were opened can be dropped now
+                with self._sessions_lock:
+                    self._evict_sessions()
+
+    async def _aprocess_turn(self, session_id: str, user_input: str, user_id: str) -> Dict[str, Any]:
+        """One aprocess_message turn; the caller holds the session's lock"""
+        pending = self._pending_async_memory.pop(session_id, None)
+        if pending is not None:
+            await pending
+
+        session, _ = await asyncio.to_thread(self._open_session, user_id, session_id)
+        config = self._workflow_config(session)
+        initial_state = self._initial_state(
+            session, user_input, await self._aget_conversation_summary(config, session)
+        )
+        previous_message_count = len((await self.workflow.aget_state(config)).values.get("messages", []))
+        try:
+            final_state = await self.workflow.ainvoke(initial_state, config=config)
+            turn = self._record_turn(session, final_state, previous_message_count)
+            if turn:
+                await asyncio.to_thread(self._save_session, session, turn)
+
+            if self.background_memory and (await self.workflow.aget_state(config)).next:
+                task = asyncio.create_task(self._aupdate_memory(config))
+                self._pending_async_memory[session_id] = task
+                self._forget_when_done(self._pending_async_memory, session_id, task)
+            return self._turn_result(final_state)
         except Exception as e:
             return {
                 "success": False,
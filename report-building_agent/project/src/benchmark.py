@@ -0,0 +1,252 @@
+"""
+Offline latency benchmark for the DocDacity workflow.
+
+Runs scripted conversations through DocumentAssistant.process_message for every
+combination of corpus size and conversation length. The model is a ReplayChatModel, so
+no network access is needed. Reports p50/p99 latency per turn, per graph node
+(classify_intent, the task agents, update_memory) and per tool.
+
+    # record once against the real model
+    python src/benchmark.py --record --cassette benchmarks/cassette.jsonl
+
+    # replay offline; save a baseline, then compare later runs against it
+    python src/benchmark.py --cassette benchmarks/cassette.jsonl --json benchmarks/baseline.json
+    python src/benchmark.py --cassette benchmarks/cassette.jsonl --baseline benchmarks/baseline.json
+
+Prompts missing from the cassette are answered by StubChatModel unless --strict is given.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Iterator, List
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from assistant import DocumentAssistant, DEFAULT_BASE_URL
+from replay_llm import Cassette, RecordingChatModel, ReplayChatModel
+from retrieval import Document
+from server import percentile
+from stub_llm import StubChatModel
+
+NODE_NAMES = {"classify_intent", "qa_agent", "summarization_agent", "calculation_agent", "update_memory"}
+
+CONVERSATION = [
+    "What's the total amount in invoice INV-001?",
+    "Summarize contract CON-001",
+    "Calculate the sum of all invoice totals",
+    "Find documents with amounts over $50,000",
+    "Which client is claim CLM-001 for?",
+    "What is the average invoice amount per client?",
+]
+
+CLIENTS = ["Acme Corp", "Globex", "Initech", "Umbrella Health", "Stark Industries", "Wayne Enterprises"]
+
+
+def synthetic_documents(count: int, seed: int = 0) -> Iterator[Document]:
+    """Invoices, contracts and claims in the sample data's format, with deterministic values"""
+    rng = random.Random(seed)
+    for index in range(count):
+        kind = ("invoice", "contract", "claim")[index % 3]
+        client = rng.choice(CLIENTS)
+        amount = round(rng.uniform(500, 250000), 2)
+        date = f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+
+        if kind == "invoice":
+            doc_id, field = f"INV-{10000 + index}", "total"
+            content = f"INVOICE #{doc_id}\nDate: {date}\nClient: {client}\nServices rendered\nTotal Due: ${amount:,.2f}"
+        elif kind == "contract":
+            doc_id, field = f"CON-{10000 + index}", "value"
+            content = f"SERVICE AGREEMENT {doc_id}\nDate: {date}\nClient: {client}\nTotal Contract Value: ${amount:,.2f}"
+        else:
+            doc_id, field = f"CLM-{10000 + index}", "amount"
+            content = f"INSURANCE CLAIM {doc_id}\nDate: {date}\nClaimant: {client}\nTotal Claim Amount: ${amount:,.2f}"
+
+        yield Document(
+            doc_id=doc_id,
+            title=f"{kind.title()} {doc_id} - {client}",
+            content=content,
+            doc_type=kind,
+            metadata={"client": client, "date": date, field: amount},
+        )
+
+
+class LatencyRecorder(BaseCallbackHandler):
+    """Collects wall-clock durations of graph nodes and tools from callback events"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self._started: Dict[Any, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id, label: str):
+        with self._lock:
+            self._started[run_id] = (label, time.perf_counter())
+
+    def _end(self, run_id):
+        with self._lock:
+            started = self._started.pop(run_id, None)
+            if started is not None:
+                label, start = started
+                self.samples.setdefault(label, []).append(time.perf_counter() - start)
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        name = kwargs.get("name")
+        # Only the outer graph's nodes; the task agents' inner "agent"/"tools" nodes are not listed.
+        # A node's runnable reports a nested run under the same name, which is skipped.
+        if name in NODE_NAMES and (metadata or {}).get("langgraph_node") == name:
+            with self._lock:
+                nested = parent_run_id in self._started
+            if not nested:
+                self._start(run_id, f"node:{name}")
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self._start(run_id, f"tool:{kwargs.get('name') or (serialized or {}).get('name')}")
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def record(self, label: str, seconds: float):
+        with self._lock:
+            self.samples.setdefault(label, []).append(seconds)
+
+
+def summarize(samples: Dict[str, List[float]]) -> Dict[str, Dict[str, float]]:
+    return {
+        label: {
+            "count": len(values),
+            "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+        }
+        for label, values in sorted(samples.items())
+    }
+
+
+def run_scenario(llm, corpus_size: int, turns: int, repeats: int) -> Dict[str, Dict[str, float]]:
+    """Play `repeats` conversations of `turns` turns on a corpus of sample + corpus_size documents"""
+    recorder = LatencyRecorder()
+    with tempfile.TemporaryDirectory() as workdir:
+        assistant = DocumentAssistant(
+            openai_api_key=os.getenv("OPENAI_API_KEY", ""),
+            session_storage_path=os.path.join(workdir, "sessions"),
+            logs_dir=os.path.join(workdir, "logs"),
+            llm=llm,
+            enable_response_cache=False,
+            callbacks=[recorder],
+            traces_dir=None
+        )
+        if corpus_size:
+            assistant.retriever.add_documents(synthetic_documents(corpus_size))
+
+        for _ in range(repeats):
+            assistant.start_session("benchmark")
+            for turn in range(turns):
+                started = time.perf_counter()
+                result = assistant.process_message(CONVERSATION[turn % len(CONVERSATION)])
+                recorder.record("turn", time.perf_counter() - started)
+                if not result.get("success"):
+                    raise RuntimeError(f"Turn failed: {result.get('error')}")
+
+        assistant.tool_logger.close()
+        assistant.session_store.close()
+        assistant.checkpointer.close()
+    return summarize(recorder.samples)
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """p50 regressions beyond tolerance (a fraction) against a previous --json report"""
+    regressions = []
+    for scenario, labels in results.items():
+        for label, stats in labels.items():
+            previous = baseline.get(scenario, {}).get(label)
+            if previous and previous["p50_ms"] > 0 and stats["p50_ms"] > previous["p50_ms"] * (1 + tolerance):
+                regressions.append(
+                    f"{scenario} {label}: p50 {previous['p50_ms']:.2f}ms -> {stats['p50_ms']:.2f}ms"
+                )
+    return regressions
+
+
+def print_report(results: Dict[str, Any]):
+    for scenario, labels in results.items():
+        print(f"\n{scenario}")
+        print(f"  {'span':<28}{'count':>7}{'p50 ms':>11}{'p99 ms':>11}")
+        for label, stats in labels.items():
+            print(f"  {label:<28}{stats['count']:>7}{stats['p50_ms']:>11.2f}{stats['p99_ms']:>11.2f}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="DocDacity workflow latency benchmark")
+    parser.add_argument("--cassette", default="benchmarks/cassette.jsonl")
+    parser.add_argument("--record", action="store_true", help="call the real model and record the cassette")
+    parser.add_argument("--strict", action="store_true", help="fail on prompts missing from the cassette")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to each replayed model call")
+    parser.add_argument("--corpus-sizes", default="0,1000,10000", help="synthetic documents added to the samples")
+    parser.add_argument("--turns", default="1,6", help="conversation lengths")
+    parser.add_argument("--repeats", type=int, default=3, help="conversations per scenario")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", help="compare p50s against a previous --json file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p50 growth over the baseline")
+    args = parser.parse_args()
+
+    cassette = Cassette(args.cassette)
+    if args.record:
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            print("Error: OPENAI_API_KEY is required to record")
+            return 1
+        from langchain_openai import ChatOpenAI
+        inner = ChatOpenAI(api_key=api_key, model="gpt-4o", temperature=0.1, base_url=DEFAULT_BASE_URL)
+        llm = RecordingChatModel(inner=inner, cassette=cassette)
+    else:
+        if not len(cassette):
+            print(f"Warning: No recordings in {args.cassette}; all answers come from StubChatModel")
+        llm = ReplayChatModel(
+            cassette=cassette,
+            fallback=None if args.strict else StubChatModel(),
+            latency_seconds=args.latency
+        )
+
+    results = {}
+    for corpus_size in [int(size) for size in args.corpus_sizes.split(",")]:
+        for turns in [int(count) for count in args.turns.split(",")]:
+            scenario = f"corpus={corpus_size} turns={turns}"
+            results[scenario] = run_scenario(llm, corpus_size, turns, args.repeats)
+
+    print_report(results)
+    print(f"\nCassette: {cassette.stats}")
+
+    if args.json:
+        directory = os.path.dirname(args.json)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\nREGRESSIONS:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"\nNo p50 regressions beyond {args.tolerance:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
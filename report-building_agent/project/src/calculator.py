@@ -0,0 +1,224 @@
+"""
+Safe arithmetic engine for the calculator tool.
+
+Expressions are parsed with the ast module and only numbers, + - * / // % **,
+unary signs, parentheses, a few functions (abs, round, min, max, sum) and names of
+other expressions are accepted. Arithmetic is done with Decimal, so money values
+like 0.1 + 0.2 come out exact. Parsed expressions are cached, and evaluate_batch
+resolves named expressions that refer to each other in dependency order.
+"""
+
+import ast
+import math
+import re
+from decimal import Decimal, DecimalException, DivisionByZero, ROUND_HALF_UP, localcontext
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Mapping, Tuple
+
+MAX_EXPRESSION_LENGTH = 1000
+MAX_EXPONENT = 100
+# Digits of precision for intermediate results
+PRECISION = 34
+
+NAME_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+# "$1,250.50" -> "1250.50"; thousands separators are only stripped after a currency sign,
+# since elsewhere a comma separates function arguments
+CURRENCY_PATTERN = re.compile(r"\$\s*(\d{1,3}(?:,\d{3})+|\d+)")
+# "15%" -> "(15/100)"; a % followed by an operand is the modulo operator instead
+PERCENT_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*%(?!\s*[\d.(A-Za-z_])")
+
+BINARY_OPERATORS = {
+    ast.Add: lambda a, b: a + b,
+    ast.Sub: lambda a, b: a - b,
+    ast.Mult: lambda a, b: a * b,
+    ast.Div: lambda a, b: a / b,
+    ast.FloorDiv: lambda a, b: a // b,
+    ast.Mod: lambda a, b: a % b,
+    ast.Pow: lambda a, b: a ** b,
+}
+
+UNARY_OPERATORS = {
+    ast.UAdd: lambda a: +a,
+    ast.USub: lambda a: -a,
+}
+
+
+def _round(value: Decimal, places: Decimal = Decimal(0)) -> Decimal:
+    if places != places.to_integral_value():
+        raise CalculatorError("round() takes a whole number of decimal places")
+    # Half-up, as for money, rather than Decimal's default banker's rounding
+    return value.quantize(Decimal(1).scaleb(-int(places)), rounding=ROUND_HALF_UP)
+
+
+FUNCTIONS = {
+    "abs": abs,
+    "round": _round,
+    "min": min,
+    "max": max,
+    "sum": lambda *values: sum(values, Decimal(0)),
+}
+
+
+class CalculatorError(ValueError):
+    """Raised for expressions that are invalid, unsafe or cannot be evaluated"""
+
+
+class CompiledExpression:
+    """A validated expression tree and the names it refers to"""
+
+    def __init__(self, source: str, tree: ast.AST, names: FrozenSet[str]):
+        self.source = source
+        self.tree = tree
+        self.names = names
+
+    def evaluate(self, variables: Mapping[str, Decimal] = None) -> Decimal:
+        variables = variables or {}
+        missing = self.names - set(variables)
+        if missing:
+            raise CalculatorError(f"Unknown name(s): {', '.join(sorted(missing))}")
+
+        with localcontext() as context:
+            context.prec = PRECISION
+            try:
+                result = _evaluate(self.tree, variables)
+            except (DivisionByZero, ZeroDivisionError):
+                raise CalculatorError("Division by zero")
+            except DecimalException as e:
+                # Overflow, InvalidOperation and the other traps of the decimal context
+                raise CalculatorError(f"Cannot evaluate: {type(e).__name__}")
+        if not result.is_finite():
+            raise CalculatorError("The result is not a finite number.")
+        return result
+
+
+def _normalize(expression: str) -> str:
+    """Accept the notations models tend to write: currency amounts, × and ÷, percentages"""
+    text = CURRENCY_PATTERN.sub(lambda match: match.group(1).replace(",", ""), expression.strip())
+    text = text.replace("×", "*").replace("÷", "/")
+    return PERCENT_PATTERN.sub(r"(\1/100)", text)
+
+
+@lru_cache(maxsize=512)
+def compile_expression(expression: str) -> CompiledExpression:
+    """Parse and validate an expression; results are cached per expression string"""
+    if not expression or not expression.strip():
+        raise CalculatorError("No expression provided.")
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise CalculatorError(f"Expression is longer than {MAX_EXPRESSION_LENGTH} characters.")
+
+    source = _normalize(expression)
+    try:
+        tree = ast.parse(source, mode="eval")
+    except SyntaxError as e:
+        raise CalculatorError(f"Invalid expression: {e.msg}")
+
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS or node.keywords:
+                raise CalculatorError("Only abs, round, min, max and sum can be called.")
+        elif isinstance(node, ast.Name):
+            if node.id not in FUNCTIONS:
+                names.add(node.id)
+        elif isinstance(node, ast.Constant):
+            if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+                raise CalculatorError("Only numbers are allowed.")
+            if isinstance(node.value, float) and not math.isfinite(node.value):
+                raise CalculatorError(f"Number is too large: {node.value}")
+        elif isinstance(node, ast.BinOp):
+            if type(node.op) not in BINARY_OPERATORS:
+                raise CalculatorError("Use only +, -, *, /, //, % and **.")
+        elif isinstance(node, ast.UnaryOp):
+            if type(node.op) not in UNARY_OPERATORS:
+                raise CalculatorError("Use only + and - as signs.")
+        elif not isinstance(node, (ast.Expression, ast.Load) + tuple(BINARY_OPERATORS) + tuple(UNARY_OPERATORS)):
+            raise CalculatorError(f"Unsupported syntax: {type(node).__name__}")
+
+    return CompiledExpression(source, tree, frozenset(names))
+
+
+def _evaluate(node: ast.AST, variables: Mapping[str, Decimal]) -> Decimal:
+    if isinstance(node, ast.Expression):
+        return _evaluate(node.body, variables)
+    if isinstance(node, ast.Constant):
+        # repr keeps the literal as written (0.1 stays 0.1 rather than its binary float value)
+        return Decimal(repr(node.value))
+    if isinstance(node, ast.Name):
+        if node.id in FUNCTIONS:
+            raise CalculatorError(f"{node.id} is a function; call it as {node.id}(...)")
+        return variables[node.id]
+    if isinstance(node, ast.UnaryOp):
+        return UNARY_OPERATORS[type(node.op)](_evaluate(node.operand, variables))
+    if isinstance(node, ast.BinOp):
+        left = _evaluate(node.left, variables)
+        right = _evaluate(node.right, variables)
+        if isinstance(node.op, ast.Pow) and (right != right.to_integral_value() or abs(right) > MAX_EXPONENT):
+            raise CalculatorError(f"Exponents must be whole numbers between -{MAX_EXPONENT} and {MAX_EXPONENT}.")
+        return BINARY_OPERATORS[type(node.op)](left, right)
+    if isinstance(node, ast.Call):
+        args = [_evaluate(arg, variables) for arg in node.args]
+        try:
+            return FUNCTIONS[node.func.id](*args)
+        except TypeError as e:
+            raise CalculatorError(f"{node.func.id}(): {e}")
+    raise CalculatorError(f"Unsupported syntax: {type(node).__name__}")
+
+
+def evaluate(expression: str) -> Decimal:
+    """Evaluate a single expression"""
+    return compile_expression(expression).evaluate()
+
+
+def evaluate_batch(expressions: Mapping[str, str]) -> Dict[str, Decimal]:
+    """
+    Evaluate named expressions that may refer to each other by name,
+    e.g. {"subtotal": "100 + 250", "total": "subtotal * 1.1"}.
+    Returns the results in the order given.
+    """
+    compiled: Dict[str, CompiledExpression] = {}
+    for name, expression in expressions.items():
+        if not NAME_PATTERN.match(name) or name in FUNCTIONS:
+            raise CalculatorError(f"Invalid name '{name}': use letters, digits and underscores.")
+        try:
+            compiled[name] = compile_expression(str(expression))
+        except CalculatorError as e:
+            raise CalculatorError(f"{name}: {e}")
+
+    results: Dict[str, Decimal] = {}
+    for name in _evaluation_order(compiled):
+        try:
+            results[name] = compiled[name].evaluate(results)
+        except CalculatorError as e:
+            raise CalculatorError(f"{name}: {e}")
+    return {name: results[name] for name in expressions}
+
+
+def _evaluation_order(compiled: Mapping[str, CompiledExpression]) -> List[str]:
+    """Depth-first topological order of the expressions; reports unknown names and cycles"""
+    order: List[str] = []
+    state: Dict[str, int] = {}  # 1 = in progress, 2 = done
+
+    def visit(name: str, path: Tuple[str, ...]):
+        if state.get(name) == 2:
+            return
+        if state.get(name) == 1:
+            cycle = " -> ".join(path[path.index(name):] + (name,))
+            raise CalculatorError(f"Circular reference: {cycle}")
+        state[name] = 1
+        for dependency in sorted(compiled[name].names):
+            if dependency not in compiled:
+                raise CalculatorError(f"{name}: unknown name '{dependency}'")
+            visit(dependency, path + (name,))
+        state[name] = 2
+        order.append(name)
+
+    for name in compiled:
+        visit(name, ())
+    return order
+
+
+def format_decimal(value: Decimal) -> str:
+    """Plain notation without trailing zeros, e.g. 1200 rather than 1.2E+3"""
+    if value == value.to_integral_value():
+        return f"{value.to_integral_value():f}"
+    return f"{value.normalize():f}"
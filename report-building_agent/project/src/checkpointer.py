@@ -0,0 +1,493 @@
+"""
+Durable, memory-bounded LangGraph checkpointer.
+
+InMemorySaver keeps every checkpoint of every thread in the process forever and loses
+them all on restart. SQLiteCheckpointSaver writes checkpoints and pending writes through
+to a local SQLite database and keeps recently used threads in an in-memory LRU:
+- reads for a hot thread (every turn starts with one) are served from memory
+- once the cached threads exceed max_cache_bytes the least recently used ones are
+  dropped from memory; they are already on disk and are reloaded on next use
+- after each root checkpoint only the latest keep_checkpoints root checkpoints of the
+  thread are kept, together with the subgraph (task agent) checkpoints written since the
+  oldest of them, so a thread's footprint stays bounded however long the session runs
+
+Each checkpoint row stores the full channel values, so pruning never leaves a kept
+checkpoint depending on a deleted one.
+"""
+
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT NOT NULL,
+    checkpoint BLOB NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT NOT NULL,
+    value BLOB NOT NULL,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+) WITHOUT ROWID;
+"""
+
+# Workflow state types stored in checkpoints; listing them keeps deserialization from
+# disk to known types instead of importing whatever module a blob names
+STATE_TYPES = [
+    ("schemas", "UserIntent"),
+    ("schemas", "AnswerResponse"),
+    ("schemas", "SummarizationResponse"),
+    ("schemas", "CalculationResponse"),
+    ("schemas", "UpdateMemoryResponse"),
+]
+
+# (type, checkpoint bytes, metadata type, metadata bytes, parent checkpoint id)
+StoredCheckpoint = Tuple[str, bytes, str, bytes, Optional[str]]
+# (task_id, channel, type, value bytes, task_path)
+StoredWrite = Tuple[str, str, str, bytes, str]
+
+
+class _CachedThread:
+    """All stored checkpoints and writes of one thread, as held in the LRU"""
+
+    def __init__(self):
+        # checkpoint_ns -> checkpoint_id -> StoredCheckpoint
+        self.checkpoints: Dict[str, Dict[str, StoredCheckpoint]] = {}
+        # (checkpoint_ns, checkpoint_id) -> (task_id, idx) -> StoredWrite
+        self.writes: Dict[Tuple[str, str], Dict[Tuple[str, int], StoredWrite]] = {}
+        self.size = 0
+
+    def add_checkpoint(self, checkpoint_ns: str, checkpoint_id: str, stored: StoredCheckpoint):
+        namespace = self.checkpoints.setdefault(checkpoint_ns, {})
+        previous = namespace.get(checkpoint_id)
+        if previous is not None:
+            self.size -= len(previous[1]) + len(previous[3])
+        namespace[checkpoint_id] = stored
+        self.size += len(stored[1]) + len(stored[3])
+
+    def add_write(self, checkpoint_ns: str, checkpoint_id: str, key: Tuple[str, int], stored: StoredWrite):
+        writes = self.writes.setdefault((checkpoint_ns, checkpoint_id), {})
+        previous = writes.get(key)
+        if previous is not None:
+            self.size -= len(previous[3])
+        writes[key] = stored
+        self.size += len(stored[3])
+
+    def remove_checkpoint(self, checkpoint_ns: str, checkpoint_id: str):
+        stored = self.checkpoints.get(checkpoint_ns, {}).pop(checkpoint_id, None)
+        if stored is not None:
+            self.size -= len(stored[1]) + len(stored[3])
+        if checkpoint_ns in self.checkpoints and not self.checkpoints[checkpoint_ns]:
+            del self.checkpoints[checkpoint_ns]
+        for write in self.writes.pop((checkpoint_ns, checkpoint_id), {}).values():
+            self.size -= len(write[3])
+
+
+class SQLiteCheckpointSaver(BaseCheckpointSaver[int]):
+    """
+    Checkpointer that writes through to SQLite and caches hot threads in a byte-bounded LRU.
+
+    Args:
+        db_path: database file
+        max_cache_bytes: serialized size of the threads kept in memory
+        keep_checkpoints: root checkpoints kept per thread, 0 keeps all of them
+        serde: serializer, by default JsonPlusSerializer restricted to the workflow's state types
+
+    The async methods run the same code directly: cached reads never touch the disk,
+    and writes are single short SQLite transactions.
+    """
+
+    def __init__(
+            self,
+            db_path: str = "./sessions/checkpoints.db",
+            max_cache_bytes: int = 64 * 1024 * 1024,
+            keep_checkpoints: int = 3,
+            serde: Optional[SerializerProtocol] = None
+    ):
+        super().__init__(serde=serde or JsonPlusSerializer(allowed_msgpack_modules=STATE_TYPES))
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.db_path = db_path
+        self.max_cache_bytes = max_cache_bytes
+        self.keep_checkpoints = keep_checkpoints
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "pruned": 0}
+
+        # One connection shared across threads, serialized by the lock (as in SessionStore)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.RLock()
+        self._cache: "OrderedDict[str, _CachedThread]" = OrderedDict()
+        self._cache_bytes = 0
+
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+            self._cache.clear()
+            self._cache_bytes = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "cached_threads": len(self._cache),
+                "cached_bytes": self._cache_bytes,
+                "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+            }
+
+    # Cache
+
+    def _thread(self, thread_id: str) -> _CachedThread:
+        """The cached thread, loaded from disk on a miss; callers hold the lock"""
+        cached = self._cache.get(thread_id)
+        if cached is not None:
+            self.stats["hits"] += 1
+            self._cache.move_to_end(thread_id)
+            return cached
+
+        self.stats["misses"] += 1
+        cached = _CachedThread()
+        for row in self._conn.execute(
+            "SELECT checkpoint_ns, checkpoint_id, type, checkpoint, metadata_type, metadata, parent_checkpoint_id "
+            "FROM checkpoints WHERE thread_id = ?",
+            (thread_id,)
+        ):
+            cached.add_checkpoint(row[0], row[1], (row[2], row[3], row[4], row[5], row[6]))
+        for row in self._conn.execute(
+            "SELECT checkpoint_ns, checkpoint_id, task_id, idx, channel, type, value, task_path "
+            "FROM writes WHERE thread_id = ?",
+            (thread_id,)
+        ):
+            cached.add_write(row[0], row[1], (row[2], row[3]), (row[2], row[4], row[5], row[6], row[7]))
+
+        self._cache[thread_id] = cached
+        self._cache_bytes += cached.size
+        self._evict(thread_id)
+        return cached
+
+    def _resize(self, thread_id: str, cached: _CachedThread, size_before: int):
+        """Account for a change to a cached thread and evict idle threads over budget"""
+        self._cache_bytes += cached.size - size_before
+        self._evict(thread_id)
+
+    def _evict(self, thread_id: str):
+        """Drop least recently used threads until within budget, never the one in use"""
+        while self._cache_bytes > self.max_cache_bytes and len(self._cache) > 1:
+            evicted_id = next(iter(self._cache))
+            if evicted_id == thread_id:
+                self._cache.move_to_end(thread_id)
+                continue
+            self._cache_bytes -= self._cache.pop(evicted_id).size
+            self.stats["evictions"] += 1
+
+    # Reads
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+
+        with self._lock:
+            cached = self._thread(thread_id)
+            namespace = cached.checkpoints.get(checkpoint_ns, {})
+            if not checkpoint_id:
+                if not namespace:
+                    return None
+                checkpoint_id = max(namespace)
+            stored = namespace.get(checkpoint_id)
+            if stored is None:
+                return None
+            writes = self._ordered_writes(cached, checkpoint_ns, checkpoint_id)
+
+        return self._tuple(thread_id, checkpoint_ns, checkpoint_id, stored, writes)
+
+    def list(
+            self,
+            config: Optional[RunnableConfig],
+            *,
+            filter: Optional[Dict[str, Any]] = None,
+            before: Optional[RunnableConfig] = None,
+            limit: Optional[int] = None
+    ) -> Iterator[CheckpointTuple]:
+        if config:
+            thread_ids = [config["configurable"]["thread_id"]]
+        else:
+            with self._lock:
+                thread_ids = [row[0] for row in self._conn.execute("SELECT DISTINCT thread_id FROM checkpoints")]
+        config_ns = config["configurable"].get("checkpoint_ns") if config else None
+        config_id = get_checkpoint_id(config) if config else None
+        before_id = get_checkpoint_id(before) if before else None
+
+        for thread_id in thread_ids:
+            with self._lock:
+                cached = self._thread(thread_id)
+                entries = [
+                    (checkpoint_ns, checkpoint_id, stored, self._ordered_writes(cached, checkpoint_ns, checkpoint_id))
+                    for checkpoint_ns, namespace in cached.checkpoints.items()
+                    if config_ns is None or checkpoint_ns == config_ns
+                    for checkpoint_id, stored in namespace.items()
+                    if (not config_id or checkpoint_id == config_id)
+                    and (not before_id or checkpoint_id < before_id)
+                ]
+
+            for checkpoint_ns, checkpoint_id, stored, writes in sorted(entries, key=lambda e: e[1], reverse=True):
+                if limit is not None and limit <= 0:
+                    return
+                checkpoint_tuple = self._tuple(thread_id, checkpoint_ns, checkpoint_id, stored, writes)
+                if filter and not all(checkpoint_tuple.metadata.get(k) == v for k, v in filter.items()):
+                    continue
+                if limit is not None:
+                    limit -= 1
+                yield checkpoint_tuple
+
+    @staticmethod
+    def _ordered_writes(cached: _CachedThread, checkpoint_ns: str, checkpoint_id: str) -> List[StoredWrite]:
+        stored = cached.writes.get((checkpoint_ns, checkpoint_id), {})
+        return [stored[key] for key in sorted(stored, key=lambda key: writes_sort_key(stored[key][4], *key))]
+
+    def _tuple(
+            self,
+            thread_id: str,
+            checkpoint_ns: str,
+            checkpoint_id: str,
+            stored: StoredCheckpoint,
+            writes: List[StoredWrite]
+    ) -> CheckpointTuple:
+        checkpoint_type, checkpoint, metadata_type, metadata, parent_id = stored
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint=self.serde.loads_typed((checkpoint_type, checkpoint)),
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_id,
+                    }
+                }
+                if parent_id
+                else None
+            ),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((value_type, value)))
+                for task_id, channel, value_type, value, _ in writes
+            ],
+        )
+
+    # Writes
+
+    def put(
+            self,
+            config: RunnableConfig,
+            checkpoint: Checkpoint,
+            metadata: CheckpointMetadata,
+            new_versions: ChannelVersions
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_type, checkpoint_bytes = self.serde.dumps_typed(checkpoint)
+        metadata_type, metadata_bytes = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        stored = (
+            checkpoint_type, checkpoint_bytes, metadata_type, metadata_bytes,
+            config["configurable"].get("checkpoint_id")
+        )
+
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id, "
+                    "parent_checkpoint_id, type, checkpoint, metadata_type, metadata) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (thread_id, checkpoint_ns, checkpoint["id"], stored[4], *stored[:4])
+                )
+            cached = self._thread(thread_id)
+            size_before = cached.size
+            cached.add_checkpoint(checkpoint_ns, checkpoint["id"], stored)
+            if checkpoint_ns == "" and self.keep_checkpoints:
+                self._prune_thread(thread_id, cached)
+            self._resize(thread_id, cached, size_before)
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+            self,
+            config: RunnableConfig,
+            writes: Sequence[Tuple[str, Any]],
+            task_id: str,
+            task_path: str = ""
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+
+        with self._lock:
+            cached = self._thread(thread_id)
+            existing = cached.writes.get((checkpoint_ns, checkpoint_id), {})
+            rows = []
+            for index, (channel, value) in enumerate(writes):
+                key = (task_id, WRITES_IDX_MAP.get(channel, index))
+                # Regular writes are recorded once; special ones (errors, interrupts) are replaced
+                if key[1] >= 0 and key in existing:
+                    continue
+                value_type, value_bytes = self.serde.dumps_typed(value)
+                rows.append((key, (task_id, channel, value_type, value_bytes, task_path)))
+            if not rows:
+                return
+
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, "
+                    "channel, type, value, task_path) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (thread_id, checkpoint_ns, checkpoint_id, key[0], key[1], *stored[1:])
+                        for key, stored in rows
+                    ]
+                )
+            size_before = cached.size
+            for key, stored in rows:
+                cached.add_write(checkpoint_ns, checkpoint_id, key, stored)
+            self._resize(thread_id, cached, size_before)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+                self._conn.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+            cached = self._cache.pop(thread_id, None)
+            if cached is not None:
+                self._cache_bytes -= cached.size
+
+    def prune(self, thread_ids: Sequence[str], *, strategy: str = "keep_latest") -> None:
+        """keep_latest keeps only the latest checkpoint of each thread, delete removes the threads"""
+        for thread_id in thread_ids:
+            if strategy == "delete":
+                self.delete_thread(thread_id)
+                continue
+            with self._lock:
+                cached = self._thread(thread_id)
+                size_before = cached.size
+                self._prune_thread(thread_id, cached, keep=1)
+                self._resize(thread_id, cached, size_before)
+
+    def _prune_thread(self, thread_id: str, cached: _CachedThread, keep: Optional[int] = None):
+        """
+        Drop root checkpoints beyond the latest `keep`, and subgraph checkpoints older than
+        the oldest root checkpoint kept (their task finished before it). Checkpoint ids are
+        time-ordered, so comparing them across namespaces is meaningful.
+        """
+        keep = keep or self.keep_checkpoints
+        root_ids = sorted(cached.checkpoints.get("", {}), reverse=True)
+        if len(root_ids) <= keep:
+            return
+        oldest_kept = root_ids[keep - 1]
+
+        doomed = [
+            (checkpoint_ns, checkpoint_id)
+            for checkpoint_ns, namespace in cached.checkpoints.items()
+            for checkpoint_id in namespace
+            if checkpoint_id < oldest_kept
+        ]
+        with self._conn:
+            self._conn.execute(
+                "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_id < ?", (thread_id, oldest_kept)
+            )
+            self._conn.execute(
+                "DELETE FROM writes WHERE thread_id = ? AND checkpoint_id < ?", (thread_id, oldest_kept)
+            )
+        for checkpoint_ns, checkpoint_id in doomed:
+            cached.remove_checkpoint(checkpoint_ns, checkpoint_id)
+        # Writes can arrive for a checkpoint before (or without) the checkpoint itself
+        for key in [key for key in cached.writes if key[1] < oldest_kept]:
+            for write in cached.writes.pop(key).values():
+                cached.size -= len(write[3])
+        self.stats["pruned"] += len(doomed)
+
+    # Async versions run the same code; see the class docstring
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self.get_tuple(config)
+
+    async def alist(
+            self,
+            config: Optional[RunnableConfig],
+            *,
+            filter: Optional[Dict[str, Any]] = None,
+            before: Optional[RunnableConfig] = None,
+            limit: Optional[int] = None
+    ) -> AsyncIterator[CheckpointTuple]:
+        for checkpoint_tuple in self.list(config, filter=filter, before=before, limit=limit):
+            yield checkpoint_tuple
+
+    async def aput(
+            self,
+            config: RunnableConfig,
+            checkpoint: Checkpoint,
+            metadata: CheckpointMetadata,
+            new_versions: ChannelVersions
+    ) -> RunnableConfig:
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+            self,
+            config: RunnableConfig,
+            writes: Sequence[Tuple[str, Any]],
+            task_id: str,
+            task_path: str = ""
+    ) -> None:
+        return self.put_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return self.delete_thread(thread_id)
+
+    async def aprune(self, thread_ids: Sequence[str], *, strategy: str = "keep_latest") -> None:
+        return self.prune(thread_ids, strategy=strategy)
@@ -0,0 +1,169 @@
+"""
+Token-budgeted chat history for the workflow's prompts.
+
+The task agents and the intent classifier used to receive the whole accumulated
+message list. ContextBuilder instead keeps the most recent turns that fit a token
+budget and, when older turns are left out, puts conversation_summary in their place.
+Tool calls and tool payloads are only kept for the latest turns; older turns are
+reduced to the user's question and the final answer.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+
+# Placeholder conversation_summary values that carry no information
+EMPTY_SUMMARIES = {"", "No previous conversation."}
+
+# Per-message overhead of the chat format (role and separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def _load_encoder(model_name: str) -> Optional[Callable[[str], int]]:
+    """Return a token counting function from tiktoken, or None if it is unavailable"""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+
+    try:
+        try:
+            encoding = tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            encoding = tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        # The encoding files are downloaded on first use, which fails offline
+        print(f"Warning: tiktoken encoding unavailable ({e}); estimating tokens from text length")
+        return None
+
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+class TokenCounter:
+    """
+    Counts tokens per message with tiktoken, falling back to a 4-characters-per-token
+    estimate. Counts are cached per message id (or content hash), so history that is
+    re-checked every turn is only encoded once.
+    """
+
+    def __init__(self, model_name: str = "gpt-4o", max_entries: int = 10000):
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self._encode: Optional[Callable[[str], int]] = None
+        self._encoder_loaded = False
+        self._cache: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def count_text(self, text: str) -> int:
+        if not self._encoder_loaded:
+            self._encode = _load_encoder(self.model_name)
+            self._encoder_loaded = True
+        if self._encode is None:
+            return (len(text) + 3) // 4
+        return self._encode(text)
+
+    def count(self, message: BaseMessage) -> int:
+        text = _message_text(message)
+        key = f"{message.type}:{message.id}" if message.id else None
+        if key is None:
+            key = hashlib.blake2b(f"{message.type}:{text}".encode(), digest_size=16).hexdigest()
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
+        tokens = self.count_text(text) + MESSAGE_OVERHEAD_TOKENS
+        with self._lock:
+            self._cache[key] = tokens
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return tokens
+
+
+def _message_text(message: BaseMessage) -> str:
+    text = message.content if isinstance(message.content, str) else str(message.content)
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        text += "".join(f"{call.get('name')}{call.get('args')}" for call in tool_calls)
+    return text
+
+
+def split_turns(messages: List[BaseMessage]) -> List[List[BaseMessage]]:
+    """Group messages into turns, each starting at a HumanMessage. System messages are dropped."""
+    turns: List[List[BaseMessage]] = []
+    for message in messages:
+        if isinstance(message, SystemMessage):
+            continue
+        if isinstance(message, HumanMessage) or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+def strip_tool_messages(turn: List[BaseMessage]) -> List[BaseMessage]:
+    """Reduce a turn to its user messages and final answers, dropping tool calls and payloads"""
+    return [
+        message for message in turn
+        if not isinstance(message, ToolMessage)
+        and not (isinstance(message, AIMessage) and message.tool_calls)
+    ]
+
+
+class ContextBuilder:
+    """
+    Builds the chat history passed to prompts within a token budget.
+
+    Args:
+        max_tokens: budget for the history (summary included)
+        tool_turns: number of latest turns that keep their tool calls and tool results
+        counter: shared TokenCounter
+    """
+
+    def __init__(self, max_tokens: int = 3000, tool_turns: int = 1, counter: Optional[TokenCounter] = None):
+        self.max_tokens = max_tokens
+        self.tool_turns = tool_turns
+        self.counter = counter or TokenCounter()
+
+    def build(self, messages: List[BaseMessage], conversation_summary: Any = None) -> List[BaseMessage]:
+        """Return the latest turns that fit the budget, preceded by the summary if turns were dropped"""
+        turns = split_turns(messages or [])
+
+        summary_message = None
+        if isinstance(conversation_summary, str) and conversation_summary.strip() not in EMPTY_SUMMARIES:
+            summary_message = SystemMessage(content=f"Summary of the earlier conversation: {conversation_summary}")
+
+        budget = self.max_tokens
+        if summary_message is not None:
+            budget -= self.counter.count(summary_message)
+
+        kept: List[List[BaseMessage]] = []
+        used = 0
+        for age, turn in enumerate(reversed(turns)):
+            if age >= self.tool_turns:
+                turn = strip_tool_messages(turn)
+            tokens = sum(self.counter.count(message) for message in turn)
+            if used + tokens > budget:
+                break
+            kept.append(turn)
+            used += tokens
+
+        history = [message for turn in reversed(kept) for message in turn]
+        if summary_message is not None and len(kept) < len(turns):
+            return [summary_message] + history
+        return history
+
+    def format(self, messages: List[BaseMessage], conversation_summary: Any = None) -> str:
+        """The built history as plain text, for prompts that take a string"""
+        return "\n".join(
+            f"{message.type}: {_message_text(message)}"
+            for message in self.build(messages, conversation_summary)
+        )
+
+
+# Used when the caller does not pass its own via config["configurable"]["context_builder"]
+DEFAULT_CONTEXT_BUILDER = ContextBuilder()
@@ -0,0 +1,289 @@
+"""
+In-memory index structures used by the retriever.
+Everything here is keyed by doc_id and updated incrementally as documents are added.
+"""
+
+import bisect
+import heapq
+import math
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.,][0-9]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase and split text into terms.
+    Thousands separators are dropped so "$50,000" and "50000" produce the same term.
+    """
+    return [token.replace(",", "") for token in TOKEN_PATTERN.findall(text.lower())]
+
+
+class InvertedIndex:
+    """
+    Tokenized inverted index with BM25 scoring.
+
+    Each document is indexed from weighted fields (e.g. title counts double), so a
+    term's frequency is the weighted sum of its occurrences across fields.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        # term -> {doc_id: weighted term frequency}
+        self._postings: Dict[str, Dict[str, float]] = {}
+        # doc_id -> {term: weighted term frequency}, kept so documents can be removed
+        self._doc_terms: Dict[str, Dict[str, float]] = {}
+        self._doc_lengths: Dict[str, float] = {}
+        self._total_length = 0.0
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._doc_lengths
+
+    def add(self, doc_id: str, fields: Iterable[Tuple[str, float]]):
+        """Index a document from (text, weight) pairs, replacing any previous version"""
+        if doc_id in self._doc_lengths:
+            self.remove(doc_id)
+
+        term_freqs: Dict[str, float] = {}
+        for text, weight in fields:
+            for term in tokenize(text):
+                term_freqs[term] = term_freqs.get(term, 0.0) + weight
+
+        for term, freq in term_freqs.items():
+            self._postings.setdefault(term, {})[doc_id] = freq
+
+        length = sum(term_freqs.values())
+        self._doc_terms[doc_id] = term_freqs
+        self._doc_lengths[doc_id] = length
+        self._total_length += length
+
+    def remove(self, doc_id: str):
+        """Drop a document from every posting list it appears in"""
+        term_freqs = self._doc_terms.pop(doc_id, None)
+        if term_freqs is None:
+            return
+
+        for term in term_freqs:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+
+        self._total_length -= self._doc_lengths.pop(doc_id)
+
+    def search(self, query: str, top_k: int = 3) -> List[Tuple[str, float]]:
+        """
+        Score documents against the query with BM25.
+        Returns up to top_k (doc_id, score) pairs, best first.
+        """
+        total_docs = len(self._doc_lengths)
+        if total_docs == 0 or top_k <= 0:
+            return []
+
+        avg_length = self._total_length / total_docs or 1.0
+        scores: Dict[str, float] = {}
+
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+
+            doc_freq = len(postings)
+            idf = math.log(1.0 + (total_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+
+            for doc_id, freq in postings.items():
+                norm = self.k1 * (1.0 - self.b + self.b * self._doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * freq * (self.k1 + 1.0) / (freq + norm)
+
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+
+class AmountIndex:
+    """
+    Sorted, array-backed index of normalized document amounts.
+
+    Two parallel lists are kept in ascending amount order so range lookups are
+    a pair of bisects followed by a slice.
+    """
+
+    def __init__(self):
+        self._amounts: List[float] = []
+        self._doc_ids: List[str] = []
+        self._by_doc: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._amounts)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._by_doc
+
+    def get(self, doc_id: str) -> Optional[float]:
+        return self._by_doc.get(doc_id)
+
+    def add(self, doc_id: str, amount: float):
+        """Insert (or move) a document at its amount"""
+        if doc_id in self._by_doc:
+            self.remove(doc_id)
+
+        position = bisect.bisect_right(self._amounts, amount)
+        self._amounts.insert(position, amount)
+        self._doc_ids.insert(position, doc_id)
+        self._by_doc[doc_id] = amount
+
+    def add_many(self, pairs: Iterable[Tuple[str, float]]):
+        """
+        Insert a batch of (doc_id, amount) pairs.
+        Large batches are merged in one sort instead of one list insert per document.
+        """
+        batch = dict(pairs)
+        if len(batch) <= 32:
+            for doc_id, amount in batch.items():
+                self.add(doc_id, amount)
+            return
+
+        if any(doc_id in self._by_doc for doc_id in batch):
+            kept = [(amount, doc_id) for amount, doc_id in zip(self._amounts, self._doc_ids) if doc_id not in batch]
+        else:
+            kept = list(zip(self._amounts, self._doc_ids))
+
+        # The existing entries are one sorted run, so this sort is close to a merge
+        merged = sorted(kept + [(amount, doc_id) for doc_id, amount in batch.items()], key=lambda item: item[0])
+        self._amounts = [amount for amount, _ in merged]
+        self._doc_ids = [doc_id for _, doc_id in merged]
+        self._by_doc.update(batch)
+
+    def remove(self, doc_id: str):
+        amount = self._by_doc.pop(doc_id, None)
+        if amount is None:
+            return
+
+        # Equal amounts sit next to each other, so only the run of ties is scanned
+        position = bisect.bisect_left(self._amounts, amount)
+        while self._doc_ids[position] != doc_id:
+            position += 1
+
+        del self._amounts[position]
+        del self._doc_ids[position]
+
+    def _bounds(self, min_amount: Optional[float], max_amount: Optional[float]) -> Tuple[int, int]:
+        low = 0 if min_amount is None else bisect.bisect_left(self._amounts, min_amount)
+        high = len(self._amounts) if max_amount is None else bisect.bisect_right(self._amounts, max_amount)
+        return low, max(low, high)
+
+    def range(
+            self,
+            min_amount: Optional[float] = None,
+            max_amount: Optional[float] = None,
+            descending: bool = False,
+            limit: Optional[int] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Return (doc_id, amount) pairs with min_amount <= amount <= max_amount,
+        at most limit of them from the requested end
+        """
+        low, high = self._bounds(min_amount, max_amount)
+        if limit is not None:
+            if descending:
+                low = max(low, high - limit)
+            else:
+                high = min(high, low + limit)
+        pairs = list(zip(self._doc_ids[low:high], self._amounts[low:high]))
+        if descending:
+            pairs.reverse()
+        return pairs
+
+    def closest(
+            self,
+            target: float,
+            min_amount: float,
+            max_amount: float,
+            limit: Optional[int] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Return the (doc_id, amount) pairs inside [min_amount, max_amount] ordered by
+        distance to target, by walking outwards from target's insertion point.
+        The walk stops after limit pairs.
+        """
+        low, high = self._bounds(min_amount, max_amount)
+        right = min(max(bisect.bisect_left(self._amounts, target), low), high)
+        left = right - 1
+
+        pairs = []
+        while (left >= low or right < high) and (limit is None or len(pairs) < limit):
+            take_right = left < low or (
+                    right < high and self._amounts[right] - target <= target - self._amounts[left]
+            )
+            if take_right:
+                pairs.append((self._doc_ids[right], self._amounts[right]))
+                right += 1
+            else:
+                pairs.append((self._doc_ids[left], self._amounts[left]))
+                left -= 1
+        return pairs
+
+    def min(self) -> Optional[float]:
+        return self._amounts[0] if self._amounts else None
+
+    def max(self) -> Optional[float]:
+        return self._amounts[-1] if self._amounts else None
+
+
+class CollectionStats:
+    """
+    Running aggregates over the collection, updated as documents are added,
+    replaced or removed. Min/max are read from the AmountIndex, whose sorted
+    order stays correct through deletes.
+    """
+
+    def __init__(self, amount_index: AmountIndex):
+        self._amount_index = amount_index
+        self.total_documents = 0
+        self.documents_with_amounts = 0
+        self.total_amount = 0.0
+        self.document_types: Dict[str, int] = {}
+
+    def add(self, doc_type: str, amount: Optional[float]):
+        self.total_documents += 1
+        self.document_types[doc_type] = self.document_types.get(doc_type, 0) + 1
+        if amount is not None:
+            self.documents_with_amounts += 1
+            self.total_amount += amount
+
+    def remove(self, doc_type: str, amount: Optional[float]):
+        self.total_documents -= 1
+        remaining = self.document_types.get(doc_type, 0) - 1
+        if remaining > 0:
+            self.document_types[doc_type] = remaining
+        else:
+            self.document_types.pop(doc_type, None)
+        if amount is not None:
+            self.documents_with_amounts -= 1
+            self.total_amount -= amount
+            if self.documents_with_amounts == 0:
+                # Reset accumulated float error once nothing is left
+                self.total_amount = 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the statistics in the shape of SimulatedRetriever.get_statistics"""
+        stats = {
+            "total_documents": self.total_documents,
+            "documents_with_amounts": self.documents_with_amounts,
+            "total_amount": self.total_amount,
+            "average_amount": (
+                self.total_amount / self.documents_with_amounts if self.documents_with_amounts > 0 else 0
+            ),
+            "document_types": dict(self.document_types)
+        }
+
+        if self.documents_with_amounts:
+            stats["min_amount"] = self._amount_index.min()
+            stats["max_amount"] = self._amount_index.max()
+
+        return stats
@@ -0,0 +1,164 @@
+"""
+Streaming corpus ingestion for the retriever.
+
+Every reader here is a generator that yields one Document at a time, so a corpus of
+any size can be fed to SimulatedRetriever.add_documents without loading it up front.
+Supported sources:
+- a directory of .txt files (one document per file, doc_id taken from the file name)
+- a JSONL file (one document object per line)
+"""
+
+import json
+import math
+import os
+import re
+from typing import Any, Dict, Iterator, Optional
+
+from retrieval import Document, AMOUNT_FIELDS
+
+# doc_id prefixes used throughout the sample data (INV-001, CON-001, CLM-001)
+DOC_TYPE_PREFIXES = {
+    "INV": "invoice",
+    "CON": "contract",
+    "CLM": "claim",
+}
+
+# "Label: value" lines in a text document that map onto metadata fields
+TEXT_METADATA_LABELS = {
+    "client": "client",
+    "date": "date",
+    "claimant": "claimant",
+    "status": "status",
+    "total due": "total",
+    "total": "total",
+    "total claim amount": "amount",
+    "total contract value": "value",
+}
+
+LABEL_PATTERN = re.compile(r"^\s*([A-Za-z][A-Za-z ]*?)\s*:\s*(.+?)\s*$")
+AMOUNT_PATTERN = re.compile(r"-?\$?\s*(\d+(?:,\d{3})*(?:\.\d+)?)")
+
+
+def parse_amount(value: Any) -> Optional[float]:
+    """
+    Normalize an amount such as 214500, "214500" or "$214,500.00" to a float.
+    NaN and infinities count as no amount, since they cannot be ordered in the amount index.
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        amount = float(value)
+        return amount if math.isfinite(amount) else None
+
+    match = AMOUNT_PATTERN.search(str(value))
+    if not match:
+        return None
+    amount = float(match.group(1).replace(",", ""))
+    if not math.isfinite(amount):
+        return None
+    return -amount if match.group(0).startswith("-") else amount
+
+
+def infer_doc_type(doc_id: str, default: str = "document") -> str:
+    """Infer the document type from its ID prefix (e.g. INV-001 -> invoice)"""
+    prefix = doc_id.split("-", 1)[0].upper()
+    return DOC_TYPE_PREFIXES.get(prefix, default)
+
+
+def normalize_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert amount fields to floats so the retriever's amount index can use them"""
+    normalized = dict(metadata)
+    for field in AMOUNT_FIELDS:
+        if field in normalized:
+            amount = parse_amount(normalized[field])
+            if amount is None:
+                del normalized[field]
+            else:
+                normalized[field] = amount
+    return normalized
+
+
+def parse_text_document(doc_id: str, text: str, doc_type: Optional[str] = None) -> Document:
+    """
+    Build a Document from plain text laid out like the sample documents:
+    the first non-empty line is the title and "Label: value" lines become metadata.
+    """
+    title = doc_id
+    metadata: Dict[str, Any] = {}
+
+    for line in text.splitlines():
+        if title == doc_id and line.strip():
+            title = line.strip()
+
+        match = LABEL_PATTERN.match(line)
+        if not match:
+            continue
+
+        label, value = match.group(1).lower(), match.group(2)
+        if label == "type" and doc_type is None:
+            doc_type = value.lower()
+            continue
+
+        field = TEXT_METADATA_LABELS.get(label)
+        # The first occurrence wins, e.g. "Total Due" is not overridden by a later "Total"
+        if field and field not in metadata:
+            metadata[field] = value
+
+    return Document(
+        doc_id=doc_id,
+        title=title,
+        content=text,
+        doc_type=doc_type or infer_doc_type(doc_id),
+        metadata=normalize_metadata(metadata)
+    )
+
+
+def iter_text_documents(directory: str, extension: str = ".txt") -> Iterator[Document]:
+    """Yield one Document per text file in a directory, streaming the listing"""
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.is_file() or not entry.name.endswith(extension):
+                continue
+            with open(entry.path, "r", encoding="utf-8") as f:
+                text = f.read()
+            yield parse_text_document(entry.name[:-len(extension)], text)
+
+
+def iter_jsonl_documents(path: str) -> Iterator[Document]:
+    """
+    Yield Documents from a JSONL file. Each line needs doc_id and content;
+    title, doc_type and metadata are optional and derived when missing.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+
+            try:
+                record = json.loads(line)
+                doc_id = str(record["doc_id"])
+                content = record["content"]
+            except (json.JSONDecodeError, KeyError, TypeError) as e:
+                print(f"Warning: Skipping line {line_number} of {path}: {e}")
+                continue
+
+            if record.get("metadata") is None and record.get("title") is None:
+                # Bare records get the same parsing as text files
+                yield parse_text_document(doc_id, content, record.get("doc_type"))
+                continue
+
+            yield Document(
+                doc_id=doc_id,
+                title=record.get("title") or doc_id,
+                content=content,
+                doc_type=(record.get("doc_type") or infer_doc_type(doc_id)).lower(),
+                metadata=normalize_metadata(record.get("metadata") or {})
+            )
+
+
+def iter_corpus(path: str) -> Iterator[Document]:
+    """Yield Documents from a directory of text files or a JSONL file"""
+    if os.path.isdir(path):
+        return iter_text_documents(path)
+    return iter_jsonl_documents(path)
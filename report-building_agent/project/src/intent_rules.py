@@ -0,0 +1,130 @@
+"""
+Rule-based intent pre-classifier.
+
+classify_intent tries these lexical rules before paying for a structured-output LLM
+call. The rules look at action verbs, document IDs, document types and amounts, and
+produce a UserIntent with a confidence score; the LLM is only consulted when that
+confidence is below the configured threshold.
+"""
+
+import re
+import threading
+from typing import Dict, Any
+
+from schemas import UserIntent
+
+# Rule confidence needed to skip the LLM. Override per workflow call with
+# config["configurable"]["intent_fast_path_threshold"]; a value above 1 disables the fast path.
+DEFAULT_FAST_PATH_THRESHOLD = 0.8
+
+DOC_ID_PATTERN = re.compile(r"\b[A-Z]{2,5}-\d{2,}\b", re.IGNORECASE)
+AMOUNT_PATTERN = re.compile(r"\$\s?\d[\d,]*(?:\.\d+)?|\b\d{1,3}(?:,\d{3})+(?:\.\d+)?\b")
+ARITHMETIC_PATTERN = re.compile(r"\d\s*[-+*/x×]\s*\d")
+# Dates such as 2024-01-15 or 01/15/2024 are removed before looking for arithmetic
+DATE_PATTERN = re.compile(r"\b\d{4}-\d{1,2}-\d{1,2}\b|\b\d{1,2}/\d{1,2}/\d{2,4}\b")
+DOC_TYPE_PATTERN = re.compile(r"\b(invoices?|contracts?|claims?|documents?)\b")
+
+CALCULATION_VERBS = re.compile(
+    r"\b(calculate|compute|sum|add up|subtract|multiply|divide|average|mean|"
+    r"difference|percentage|how much more|how much less)\b"
+)
+# Bare "add" only counts with a number or amount right after it ("add 5 and 7", not "add a note")
+ADD_NUMBER_PATTERN = re.compile(r"\badd\s+\$?\d")
+# Words that lean towards a calculation but also show up in plain questions ("what's the total?")
+CALCULATION_HINTS = re.compile(r"\b(total|totals|combined|altogether|tax|discount|per month|per year)\b")
+SUMMARIZATION_VERBS = re.compile(
+    r"\b(summari[sz]e|summary|summaries|overview|recap|key points|main points|highlights|tl;?dr|outline)\b"
+)
+QA_OPENERS = re.compile(r"^\s*(what|who|when|where|which|is|are|does|do|did|has|have|can|show|find|list|tell me)\b")
+
+
+def classify_intent_by_rules(user_input: str) -> UserIntent:
+    """
+    Score each intent from lexical evidence and return the best one.
+    Confidence is the winning score minus half of the runner-up, so mixed signals
+    ("summarize and total these invoices") end up below the fast-path threshold.
+    """
+    text = (user_input or "").strip()
+    lowered = text.lower()
+
+    doc_ids = DOC_ID_PATTERN.findall(text)
+    has_amount = bool(AMOUNT_PATTERN.search(text))
+    mentions_doc_type = bool(DOC_TYPE_PATTERN.search(lowered))
+
+    scores = {"qa": 0.0, "summarization": 0.0, "calculation": 0.0}
+    evidence = {"qa": [], "summarization": [], "calculation": []}
+
+    calc_verbs = set(CALCULATION_VERBS.findall(lowered))
+    if ADD_NUMBER_PATTERN.search(lowered):
+        calc_verbs.add("add")
+    if calc_verbs:
+        scores["calculation"] += 0.65 + 0.1 * (len(calc_verbs) - 1)
+        evidence["calculation"].append(f"calculation verbs {sorted(calc_verbs)}")
+    if ARITHMETIC_PATTERN.search(DATE_PATTERN.sub(" ", text)):
+        scores["calculation"] += 0.6
+        evidence["calculation"].append("arithmetic expression")
+    if CALCULATION_HINTS.search(lowered):
+        scores["calculation"] += 0.3
+        evidence["calculation"].append("calculation hint words")
+
+    if SUMMARIZATION_VERBS.search(lowered):
+        scores["summarization"] += 0.7
+        evidence["summarization"].append("summarization verb")
+
+    if QA_OPENERS.search(lowered) or text.endswith("?"):
+        scores["qa"] += 0.45
+        evidence["qa"].append("question form")
+
+    # Referencing concrete documents makes whichever action was requested more certain
+    if doc_ids or mentions_doc_type:
+        for intent in scores:
+            if scores[intent] > 0:
+                scores[intent] += 0.15
+                evidence[intent].append("document reference")
+    if has_amount and scores["calculation"] > 0:
+        scores["calculation"] += 0.1
+
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    (best, best_score), (_, runner_up) = ranked[0], ranked[1]
+    if best_score == 0:
+        return UserIntent(intent_type="unknown", confidence=0.0, reasoning="No rule matched")
+
+    confidence = max(0.0, min(0.99, best_score - 0.5 * runner_up))
+    return UserIntent(
+        intent_type=best,
+        confidence=round(confidence, 3),
+        reasoning="Rule-based: " + ", ".join(evidence[best])
+    )
+
+
+class IntentFastPathStats:
+    """Counts how often the rule-based fast path answers instead of the LLM"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.fast_path = 0
+        self.llm = 0
+        self.llm_seconds = 0.0
+
+    def record_fast_path(self):
+        with self._lock:
+            self.fast_path += 1
+
+    def record_llm(self, seconds: float):
+        with self._lock:
+            self.llm += 1
+            self.llm_seconds += seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.fast_path + self.llm
+            avg_llm = self.llm_seconds / self.llm if self.llm else 0.0
+            return {
+                "classifications": total,
+                "fast_path": self.fast_path,
+                "llm": self.llm,
+                "fast_path_rate": self.fast_path / total if total else 0.0,
+                "avg_llm_seconds": avg_llm,
+                # Estimate: every fast-path hit avoided one average LLM classification
+                "estimated_seconds_saved": self.fast_path * avg_llm,
+            }
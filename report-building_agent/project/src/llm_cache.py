@@ -0,0 +1,286 @@
+"""
+Response cache for the assistant's chat model.
+
+ResponseCache plugs into LangChain's cache hook (ChatOpenAI(cache=...)), so every call
+made through DocumentAssistant.llm - intent classification, the ReAct sub-agents and
+memory summarization - is looked up before it reaches the API.
+
+Two tiers:
+- exact: key is the LLM configuration plus the normalized prompt. Message/tool-call IDs
+  are dropped, whitespace is collapsed and tool results are reduced to fingerprints, so
+  the same question over the same documents hits across sessions.
+- similarity (optional): the latest user message is embedded locally (hashed bag of
+  words) and compared with cached prompts that share the rest of the context. Numbers
+  and document IDs must match exactly, so "INV-001" never answers for "INV-002".
+
+Entries expire after a TTL, the least recently used entry is evicted at capacity, and
+the whole cache is dropped when the retriever's corpus version changes.
+"""
+
+import hashlib
+import json
+import math
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.outputs import ChatGeneration
+
+WHITESPACE = re.compile(r"\s+")
+WORD = re.compile(r"[a-z0-9]+")
+# Tokens that must match exactly for a similarity hit: numbers, amounts and document IDs
+EXACT_TOKEN = re.compile(r"\b[a-z]{2,5}-\d+\b|\d[\d,]*(?:\.\d+)?")
+
+EMBEDDING_DIMENSIONS = 512
+
+
+def embed_text(text: str) -> List[float]:
+    """Local embedding: L2-normalized hashed counts of word unigrams and bigrams"""
+    vector = [0.0] * EMBEDDING_DIMENSIONS
+    words = WORD.findall(text.lower())
+    for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+        digest = hashlib.blake2b(feature.encode(), digest_size=4).digest()
+        vector[int.from_bytes(digest, "little") % EMBEDDING_DIMENSIONS] += 1.0
+
+    norm = math.sqrt(sum(value * value for value in vector))
+    return [value / norm for value in vector] if norm else vector
+
+
+def _fingerprint(value: Any) -> str:
+    text = value if isinstance(value, str) else json.dumps(value, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+def _normalize_content(content: Any) -> str:
+    if isinstance(content, str):
+        return WHITESPACE.sub(" ", content).strip()
+    return json.dumps(content, sort_keys=True, default=str)
+
+
+def normalize_prompt(prompt: str) -> Tuple[List[Any], Optional[int]]:
+    """
+    Reduce a serialized chat prompt to its cache-relevant parts.
+    Returns the normalized messages and the index of the last human message.
+    """
+    try:
+        messages = json.loads(prompt)
+    except (json.JSONDecodeError, TypeError):
+        return [["text", _normalize_content(prompt)]], 0
+
+    normalized = []
+    last_human = None
+    tool_call_ordinals: Dict[str, int] = {}
+
+    for message in messages if isinstance(messages, list) else [messages]:
+        kwargs = message.get("kwargs", {}) if isinstance(message, dict) else {}
+        role = kwargs.get("type", "unknown")
+        content = kwargs.get("content", message)
+
+        if role == "tool":
+            # Tool payloads can be large; their fingerprint is enough to tell results apart
+            ordinal = tool_call_ordinals.get(kwargs.get("tool_call_id"), -1)
+            normalized.append([role, kwargs.get("name"), ordinal, _fingerprint(content)])
+            continue
+
+        entry = [role, _normalize_content(content)]
+        if kwargs.get("tool_calls"):
+            calls = []
+            for call in kwargs["tool_calls"]:
+                tool_call_ordinals[call.get("id")] = len(tool_call_ordinals)
+                calls.append([call.get("name"), json.dumps(call.get("args"), sort_keys=True, default=str)])
+            entry.append(calls)
+        if role == "human":
+            last_human = len(normalized)
+        normalized.append(entry)
+
+    return normalized, last_human
+
+
+@dataclass
+class _Entry:
+    generations: Sequence[Any]
+    created_at: float
+    context_key: Optional[str] = None
+    query_vector: Optional[List[float]] = None
+    exact_tokens: frozenset = field(default_factory=frozenset)
+
+
+class ResponseCache(BaseCache):
+    """
+    Exact-match plus optional similarity cache for chat model responses.
+
+    Args:
+        max_entries: LRU capacity; 0 disables caching
+        ttl_seconds: entry lifetime, None for no expiry
+        similarity_threshold: cosine similarity needed for a similarity hit, None disables the tier
+        version_fn: returns the corpus version; a change invalidates every entry
+    """
+
+    def __init__(
+            self,
+            max_entries: int = 1024,
+            ttl_seconds: Optional[float] = 3600,
+            similarity_threshold: Optional[float] = None,
+            version_fn: Optional[Callable[[], Any]] = None
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.version_fn = version_fn
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        # context_key -> exact keys whose prompts differ only in the last user message
+        self._by_context: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+        self._version = version_fn() if version_fn else None
+        self.stats = {"exact_hits": 0, "similar_hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def _keys(self, prompt: str, llm_string: str) -> Tuple[str, str, Optional[str]]:
+        """Exact key, context key and latest user text for a prompt"""
+        normalized, last_human = normalize_prompt(prompt)
+        exact_key = _fingerprint([llm_string, normalized])
+
+        query_text = None
+        if last_human is not None:
+            query_text = normalized[last_human][1]
+            context = list(normalized)
+            context[last_human] = ["human", None]
+            return exact_key, _fingerprint([llm_string, context]), query_text
+        return exact_key, exact_key, query_text
+
+    def _check_version(self):
+        """Drop everything if the corpus changed since the entries were written"""
+        if self.version_fn is None:
+            return
+        version = self.version_fn()
+        if version != self._version:
+            if self._entries:
+                self.stats["invalidations"] += 1
+            self._entries.clear()
+            self._by_context.clear()
+            self._version = version
+
+    def _expired(self, entry: _Entry) -> bool:
+        return self.ttl_seconds is not None and time.time() - entry.created_at > self.ttl_seconds
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None and entry.context_key in self._by_context:
+            keys = self._by_context[entry.context_key]
+            if key in keys:
+                keys.remove(key)
+            if not keys:
+                del self._by_context[entry.context_key]
+
+    @staticmethod
+    def _fresh_copy(generations: Sequence[Any]) -> List[Any]:
+        """
+        Copy cached generations with new message and tool-call IDs, so a replayed
+        response is not mistaken for the original message in conversation state.
+        """
+        copies = []
+        for generation in generations:
+            if isinstance(generation, ChatGeneration):
+                message = generation.message
+                update: Dict[str, Any] = {"id": None}
+                if getattr(message, "tool_calls", None):
+                    update["tool_calls"] = [
+                        {**call, "id": f"call_{uuid.uuid4().hex[:24]}"} for call in message.tool_calls
+                    ]
+                generation = generation.model_copy(update={"message": message.model_copy(update=update)})
+            copies.append(generation)
+        return copies
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        if self.max_entries <= 0:
+            return None
+
+        exact_key, context_key, query_text = self._keys(prompt, llm_string)
+        with self._lock:
+            self._check_version()
+
+            entry = self._entries.get(exact_key)
+            if entry is not None and self._expired(entry):
+                self._remove(exact_key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(exact_key)
+                self.stats["exact_hits"] += 1
+                return self._fresh_copy(entry.generations)
+
+            if self.similarity_threshold is not None and query_text:
+                similar_key = self._find_similar(context_key, query_text)
+                if similar_key is not None:
+                    self._entries.move_to_end(similar_key)
+                    self.stats["similar_hits"] += 1
+                    return self._fresh_copy(self._entries[similar_key].generations)
+
+            self.stats["misses"] += 1
+            return None
+
+    def _find_similar(self, context_key: str, query_text: str) -> Optional[str]:
+        exact_tokens = frozenset(EXACT_TOKEN.findall(query_text.lower()))
+        query_vector = embed_text(query_text)
+
+        best_key, best_score = None, self.similarity_threshold
+        for key in list(self._by_context.get(context_key, [])):
+            entry = self._entries[key]
+            if self._expired(entry):
+                self._remove(key)
+                continue
+            if entry.exact_tokens != exact_tokens or entry.query_vector is None:
+                continue
+            score = sum(a * b for a, b in zip(query_vector, entry.query_vector))
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        if self.max_entries <= 0:
+            return
+
+        exact_key, context_key, query_text = self._keys(prompt, llm_string)
+        entry = _Entry(generations=list(return_val), created_at=time.time(), context_key=context_key)
+        if self.similarity_threshold is not None and query_text:
+            entry.query_vector = embed_text(query_text)
+            entry.exact_tokens = frozenset(EXACT_TOKEN.findall(query_text.lower()))
+
+        with self._lock:
+            self._check_version()
+            self._remove(exact_key)
+            self._entries[exact_key] = entry
+            self._by_context.setdefault(context_key, []).append(exact_key)
+
+            while len(self._entries) > self.max_entries:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.stats["evictions"] += 1
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_context.clear()
+
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        return self.lookup(prompt, llm_string)
+
+    async def aupdate(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        self.update(prompt, llm_string, return_val)
+
+    async def aclear(self, **kwargs: Any) -> None:
+        self.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats["exact_hits"] + self.stats["similar_hits"] + self.stats["misses"]
+            hits = self.stats["exact_hits"] + self.stats["similar_hits"]
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "hit_rate": hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,160 @@
+"""
+Load test for the HTTP service.
+
+Opens one keep-alive connection per simulated session and plays a short scripted
+conversation on each, with a fixed number of sessions active at a time. Reports
+sessions/sec, turns/sec and turn latency percentiles. With --in-process the server
+is started in this process against the offline StubChatModel, so no API key or
+separate server is needed:
+
+    python src/load_test.py --in-process --sessions 200 --concurrency 50 --stub-latency 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import uuid
+from typing import Any, Dict, List, Tuple
+
+from server import percentile
+
+SCRIPT = [
+    "What's the total amount in invoice INV-001?",
+    "Summarize contract CON-001",
+    "Calculate the sum of all invoice totals",
+    "Find documents with amounts over $50,000",
+]
+
+
+class SessionClient:
+    """One keep-alive connection posting turns for one session"""
+
+    def __init__(self, host: str, port: int, session_id: str):
+        self.host = host
+        self.port = port
+        self.session_id = session_id
+        self._reader = None
+        self._writer = None
+
+    async def __aenter__(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    async def send(self, message: str) -> Tuple[int, Dict[str, Any]]:
+        body = json.dumps({"message": message, "user_id": "load-test"}).encode("utf-8")
+        self._writer.write(
+            (
+                f"POST /sessions/{self.session_id}/messages HTTP/1.1\r\n"
+                f"Host: {self.host}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "\r\n"
+            ).encode("latin-1") + body
+        )
+        await self._writer.drain()
+
+        status = int((await self._reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self._reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        return status, json.loads(await self._reader.readexactly(length))
+
+
+async def run_load(host: str, port: int, sessions: int, concurrency: int, turns: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    limit = asyncio.Semaphore(concurrency)
+
+    async def run_session():
+        async with limit:
+            async with SessionClient(host, port, f"load-{uuid.uuid4().hex[:12]}") as client:
+                for turn in range(turns):
+                    started = time.perf_counter()
+                    status, _ = await client.send(SCRIPT[turn % len(SCRIPT)])
+                    latencies.append(time.perf_counter() - started)
+                    statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run_session() for _ in range(sessions)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "sessions": sessions,
+        "turns": len(latencies),
+        "elapsed_seconds": round(elapsed, 3),
+        "sessions_per_sec": round(sessions / elapsed, 2),
+        "turns_per_sec": round(len(latencies) / elapsed, 2),
+        "statuses": statuses,
+        "latency_seconds": {
+            "p50": round(percentile(latencies, 0.50), 4),
+            "p95": round(percentile(latencies, 0.95), 4),
+            "p99": round(percentile(latencies, 0.99), 4),
+        },
+    }
+
+
+async def run_in_process(args) -> Dict[str, Any]:
+    from assistant import DocumentAssistant
+    from server import AssistantServer
+    from stub_llm import StubChatModel
+
+    with tempfile.TemporaryDirectory() as sessions_dir:
+        assistant = DocumentAssistant(
+            openai_api_key="",
+            session_storage_path=sessions_dir,
+            logs_dir=os.path.join(sessions_dir, "logs"),
+            corpus_path=args.corpus,
+            document_db_path=args.db,
+            llm=StubChatModel(latency_seconds=args.stub_latency),
+            enable_response_cache=False
+        )
+        server = AssistantServer(assistant, port=0, max_concurrency=args.max_concurrency)
+        await server.start()
+        try:
+            report = await run_load("127.0.0.1", server.port, args.sessions, args.concurrency, args.turns)
+            report["server"] = server.metrics.snapshot()
+        finally:
+            await server.close()
+            assistant.tool_logger.close()
+            assistant.session_store.close()
+        return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the DocDacity HTTP service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20, help="sessions active at the same time")
+    parser.add_argument("--turns", type=int, default=3, help="turns per session")
+    parser.add_argument("--in-process", action="store_true", help="start a stub-LLM server in this process")
+    parser.add_argument("--stub-latency", type=float, default=0.0)
+    parser.add_argument("--max-concurrency", type=int, default=32)
+    parser.add_argument("--corpus", default=None)
+    parser.add_argument("--db", default=None)
+    args = parser.parse_args()
+
+    if args.in_process:
+        report = asyncio.run(run_in_process(args))
+    else:
+        report = asyncio.run(run_load(args.host, args.port, args.sessions, args.concurrency, args.turns))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Append-only JSONL writer used by ToolLogger.
+
+Records are queued by the caller and written by a background thread, so logging a
+tool call costs one queue put instead of a file rewrite. The active file is rotated
+once it reaches max_bytes (log.jsonl -> log.jsonl.1 -> log.jsonl.2 ...), keeping
+backup_count older files, and read() streams the records back oldest first.
+"""
+
+import atexit
+import json
+import os
+import queue
+import threading
+from typing import Any, Dict, Iterator, List
+
+# Marks the end of the queue for the writer thread
+_STOP = object()
+
+
+class JsonlLogWriter:
+    """
+    Buffered, append-only JSONL writer with a background flush thread.
+
+    Args:
+        path: active log file
+        max_queue: bounded queue size; producers wait up to put_timeout when it is full
+        put_timeout: seconds to wait for queue space before a record is dropped
+        max_bytes: rotate the active file once it reaches this size, 0 disables rotation
+        backup_count: number of rotated files kept, at least 1
+    """
+
+    def __init__(
+            self,
+            path: str,
+            max_queue: int = 10000,
+            put_timeout: float = 1.0,
+            max_bytes: int = 10 * 1024 * 1024,
+            backup_count: int = 5
+    ):
+        if backup_count < 1:
+            raise ValueError(f"backup_count must be at least 1, got {backup_count}")
+        self.path = path
+        self.put_timeout = put_timeout
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.dropped = 0
+
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._file_lock = threading.Lock()
+        self._closed = False
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._thread = threading.Thread(target=self._run, name="jsonl-log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, record: Dict[str, Any]) -> bool:
+        """Queue a record for writing; returns False if it was dropped"""
+        if self._closed:
+            return False
+        try:
+            self._queue.put(record, timeout=self.put_timeout)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1:
+                print(f"Warning: Log queue for {self.path} is full, dropping records")
+            return False
+
+    def flush(self):
+        """Block until every queued record has been written"""
+        if self._thread.is_alive():
+            self._queue.join()
+
+    def close(self):
+        """Write out queued records and stop the writer thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def files(self) -> List[str]:
+        """Existing log files, oldest first"""
+        rotated = [f"{self.path}.{index}" for index in range(self.backup_count, 0, -1)]
+        return [path for path in rotated + [self.path] if os.path.exists(path)]
+
+    def read(self) -> Iterator[Dict[str, Any]]:
+        """Yield every retained record, oldest first"""
+        self.flush()
+        with self._file_lock:
+            paths = self.files()
+
+        for path in paths:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            yield json.loads(line)
+                        except json.JSONDecodeError:
+                            # A partial last line from an interrupted process
+                            continue
+            except FileNotFoundError:
+                # Rotated away between listing and opening
+                continue
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            # Drain whatever else is already queued so it goes out in one write
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = any(record is _STOP for record in batch)
+            records = [record for record in batch if record is not _STOP]
+            try:
+                if records:
+                    self._append(records)
+            except Exception as e:
+                print(f"Warning: Failed to write logs to {self.path}: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+            if stop:
+                return
+
+    def _append(self, records: List[Dict[str, Any]]):
+        lines = "".join(json.dumps(record, default=str) + "\n" for record in records)
+        with self._file_lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+                size = f.tell()
+            if self.max_bytes and size >= self.max_bytes:
+                self._rotate()
+
+    def _rotate(self):
+        oldest = f"{self.path}.{self.backup_count}"
+        if os.path.exists(oldest):
+            os.remove(oldest)
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        os.replace(self.path, f"{self.path}.1")
@@ -0,0 +1,154 @@
+"""
+Passage chunking and keyword-in-context snippets.
+
+Documents are split at ingest time into passages of at most max_chars characters:
+paragraphs (blank-line separated) are merged while they fit, and longer paragraphs are
+split at line breaks, then at whitespace. Each passage keeps its character offsets in the
+original content, so a search hit can point at the exact span and its neighbours can be
+fetched without reading the whole document.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Iterator, List, Tuple
+
+from indexes import TOKEN_PATTERN, tokenize
+
+DEFAULT_PASSAGE_CHARS = 400
+
+PARAGRAPH_BREAK = re.compile(r"\n[ \t]*\n")
+LINE_BREAK = re.compile(r"\n")
+WHITESPACE = re.compile(r"\s+")
+
+# Query words too common to be worth highlighting
+STOPWORDS = {
+    "a", "all", "an", "and", "any", "are", "as", "at", "by", "for", "from", "in", "is", "it",
+    "of", "on", "or", "over", "show", "the", "to", "under", "what", "which", "with",
+}
+
+
+@dataclass
+class Passage:
+    """A span of a document's content; start/end are offsets into the original content"""
+    doc_id: str
+    index: int
+    start: int
+    end: int
+    text: str
+
+    @property
+    def passage_id(self) -> str:
+        return f"{self.doc_id}#{self.index}"
+
+
+def parse_passage_id(passage_id: str) -> Tuple[str, int]:
+    doc_id, index = passage_id.rsplit("#", 1)
+    return doc_id, int(index)
+
+
+def _trim(text: str, start: int, end: int) -> Tuple[int, int]:
+    """Shrink [start, end) to exclude surrounding whitespace"""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def _split(text: str, start: int, end: int, pattern: re.Pattern) -> Iterator[Tuple[int, int]]:
+    """Non-empty, trimmed spans of text[start:end] between matches of pattern"""
+    position = start
+    for match in pattern.finditer(text, start, end):
+        span = _trim(text, position, match.start())
+        if span[0] < span[1]:
+            yield span
+        position = match.end()
+    span = _trim(text, position, end)
+    if span[0] < span[1]:
+        yield span
+
+
+def _pieces(text: str, start: int, end: int, max_chars: int) -> Iterator[Tuple[int, int]]:
+    """Spans of at most max_chars, cut at paragraph breaks, then line breaks, then whitespace"""
+    for paragraph in _split(text, start, end, PARAGRAPH_BREAK):
+        if paragraph[1] - paragraph[0] <= max_chars:
+            yield paragraph
+            continue
+        for line_start, line_end in _split(text, paragraph[0], paragraph[1], LINE_BREAK):
+            while line_end - line_start > max_chars:
+                cut = text.rfind(" ", line_start + 1, line_start + max_chars + 1)
+                cut = cut if cut > line_start else line_start + max_chars
+                yield _trim(text, line_start, cut)
+                line_start, line_end = _trim(text, cut, line_end)
+            if line_start < line_end:
+                yield line_start, line_end
+
+
+def normalize_passage_text(text: str) -> str:
+    """Passage text without the source's indentation and trailing spaces"""
+    lines = (line.strip() for line in text.splitlines())
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def split_passages(doc_id: str, content: str, max_chars: int = DEFAULT_PASSAGE_CHARS) -> List[Passage]:
+    """Split content into passages, merging neighbouring pieces while they fit in max_chars"""
+    spans: List[List[int]] = []
+    for start, end in _pieces(content, 0, len(content), max_chars):
+        if spans and end - spans[-1][0] <= max_chars:
+            spans[-1][1] = end
+        else:
+            spans.append([start, end])
+
+    return [
+        Passage(doc_id, index, start, end, normalize_passage_text(content[start:end]))
+        for index, (start, end) in enumerate(spans)
+    ]
+
+
+def query_terms(query: str) -> set:
+    return {term for term in tokenize(query) if term not in STOPWORDS}
+
+
+def count_matches(text: str, terms: set) -> int:
+    """Distinct query terms that occur in text"""
+    return len(terms & set(tokenize(text)))
+
+
+def kwic_snippets(text: str, query: str, width: int = 60, max_snippets: int = 2) -> List[str]:
+    """
+    Keyword-in-context snippets: up to max_snippets windows of text around query terms,
+    with the terms wrapped in ** **. Windows are chosen by how many terms they contain.
+    """
+    terms = query_terms(query)
+    matches = [
+        match.span() for match in TOKEN_PATTERN.finditer(text.lower())
+        if match.group().replace(",", "") in terms
+    ]
+    if not matches:
+        return []
+
+    # Merge the context windows of nearby matches
+    windows: List[List] = []
+    for start, end in matches:
+        window_start, window_end = max(0, start - width), min(len(text), end + width)
+        if windows and window_start <= windows[-1][1]:
+            windows[-1][1] = window_end
+            windows[-1][2].append((start, end))
+        else:
+            windows.append([window_start, window_end, [(start, end)]])
+
+    best = sorted(windows, key=lambda w: len({text[s:e].lower() for s, e in w[2]}), reverse=True)[:max_snippets]
+
+    snippets = []
+    for window_start, window_end, spans in sorted(best, key=lambda w: w[0]):
+        parts, position = [], window_start
+        for start, end in spans:
+            parts.append(text[position:start])
+            parts.append(f"**{text[start:end]}**")
+            position = end
+        parts.append(text[position:window_end])
+        snippet = WHITESPACE.sub(" ", "".join(parts)).strip()
+        prefix = "..." if window_start > 0 else ""
+        suffix = "..." if window_end < len(text) else ""
+        snippets.append(f"{prefix}{snippet}{suffix}")
+    return snippets
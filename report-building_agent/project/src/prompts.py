@@ -46,6 +46,10 @@ Guidelines:
 3. If information is not found, say so clearly
 4. Be precise with numbers and dates
 5. Maintain professional tone
+6. For counts, totals, averages or extremes across many documents, use the document_aggregate tool
+   instead of reading each document
+7. To read several documents, pass all their IDs to document_reader in one call (doc_ids), and make
+   independent tool calls together in the same turn rather than one after another
 
 """
 
@@ -59,7 +63,7 @@ Your approach:
 - Keep summaries concise but comprehensive
 
 Guidelines:
-1. First search for and read the relevant documents
+1. First search for and read the relevant documents; read several at once with document_reader's doc_ids
 2. Structure summaries with clear sections
 3. Include document IDs in your summary
 4. Focus on actionable information
@@ -69,9 +73,14 @@ Guidelines:
 CALCULATION_SYSTEM_PROMPT = """You are a calculation specialist for financial and healthcare documents.
 
 Your process:
-- Identify which document(s) are needed and call the document reader tool to retrieve them.
+- Identify which document(s) are needed and call the document reader tool to retrieve them, passing
+  every ID in one call (doc_ids) when there are several.
 - Translate the user's request into a clear mathematical expression.
 - Use the calculator tool to perform every calculation, no matter how simple.
+- For sums, averages, minimums, maximums or counts over a set of documents (optionally filtered or
+  grouped, e.g. by client or month), call document_aggregate once instead of reading every document.
+- For multi-step calculations, pass all steps in one calculator call as named expressions
+  (e.g. {{"subtotal": "22000 + 15000", "tax": "subtotal * 10%", "total": "subtotal + tax"}}).
 - Cite document IDs and explain each step of the computation.
 
 Guidelines:
@@ -111,3 +120,12 @@ Focus on:
 - Important findings or calculations
 - Any unresolved questions
 """
+
+# Incremental Memory Prompt: only the messages added since the last summary are sent
+MEMORY_UPDATE_PROMPT = MEMORY_SUMMARY_PROMPT + """
+Previous summary (covers everything before the messages below):
+{previous_summary}
+
+Return an updated summary that keeps what is still relevant from the previous summary
+and folds in the new messages.
+"""
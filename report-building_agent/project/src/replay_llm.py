@@ -0,0 +1,261 @@
+"""
+Record/replay chat models for offline runs and benchmarks.
+
+RecordingChatModel wraps a real model (e.g. ChatOpenAI) and appends every response,
+tool calls and structured outputs included, to a JSONL cassette file. ReplayChatModel
+serves those responses back without network access, so the workflow can be benchmarked
+deterministically.
+
+A recorded response is matched in two steps:
+- exact: the full normalized prompt (same normalization as the response cache, so
+  message and tool call IDs do not matter)
+- loose: the latest user message plus how many model calls into the turn we are. Tool
+  output is left out, so a cassette recorded on the sample corpus still replays when the
+  corpus is larger and search results differ.
+Responses recorded more than once under the same key replay in recorded order. Prompts
+with no recording go to the fallback model (e.g. StubChatModel), or raise CassetteMiss.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from llm_cache import normalize_prompt
+
+WHITESPACE = re.compile(r"\s+")
+USER_INPUT_LINE = re.compile(r"^User Input:\s*(.*)$", re.MULTILINE)
+
+
+class CassetteMiss(KeyError):
+    """Raised by ReplayChatModel when a prompt has no recording and there is no fallback"""
+
+
+def _as_messages(prompt: Any) -> Any:
+    if hasattr(prompt, "to_messages"):
+        return prompt.to_messages()
+    return prompt
+
+
+def _anchor(prompt: Any) -> Tuple[str, int]:
+    """Latest user text and the number of model responses since it"""
+    if isinstance(prompt, str):
+        match = USER_INPUT_LINE.search(prompt)
+        text = match.group(1) if match else prompt
+        return WHITESPACE.sub(" ", text).strip(), 0
+
+    steps = 0
+    for message in reversed(prompt):
+        if isinstance(message, HumanMessage):
+            content = message.content if isinstance(message.content, str) else json.dumps(message.content)
+            return WHITESPACE.sub(" ", content).strip(), steps
+        if isinstance(message, AIMessage):
+            steps += 1
+    return "", steps
+
+
+def _fingerprint(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()[:24]
+
+
+def request_keys(target: str, prompt: Any) -> Tuple[str, str]:
+    """Exact and loose cassette keys for a prompt sent to target ("tools:..." or "schema:...")"""
+    prompt = _as_messages(prompt)
+    serialized = prompt if isinstance(prompt, str) else dumps(prompt)
+    normalized, _ = normalize_prompt(serialized)
+    anchor, step = _anchor(prompt)
+    return _fingerprint([target, normalized]), _fingerprint([target, anchor, step])
+
+
+def _tools_target(tools: List[Dict[str, Any]]) -> str:
+    return "tools:" + ",".join(sorted(tool["function"]["name"] for tool in tools))
+
+
+class Cassette:
+    """Recorded responses in a JSONL file, indexed by exact and loose key"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.stats = {"exact_hits": 0, "loose_hits": 0, "misses": 0, "recorded": 0}
+        self._exact: Dict[str, List[Dict[str, Any]]] = {}
+        self._loose: Dict[str, List[Dict[str, Any]]] = {}
+        self._cursors: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self._index(json.loads(line))
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._exact.values())
+
+    def _index(self, entry: Dict[str, Any]):
+        self._exact.setdefault(entry["exact"], []).append(entry)
+        self._loose.setdefault(entry["loose"], []).append(entry)
+
+    def record(self, target: str, prompt: Any, response: Dict[str, Any]):
+        exact, loose = request_keys(target, prompt)
+        entry = {"target": target, "exact": exact, "loose": loose, "response": response}
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, default=str) + "\n")
+            self._index(entry)
+            self.stats["recorded"] += 1
+
+    def lookup(self, target: str, prompt: Any) -> Optional[Dict[str, Any]]:
+        exact, loose = request_keys(target, prompt)
+        with self._lock:
+            for kind, key, index in (("exact", exact, self._exact), ("loose", loose, self._loose)):
+                entries = index.get(key)
+                if entries:
+                    # Repeated recordings of the same key replay in order, the last one repeating
+                    cursor = self._cursors.get((kind, key), 0)
+                    self._cursors[(kind, key)] = cursor + 1
+                    self.stats[f"{kind}_hits"] += 1
+                    return entries[min(cursor, len(entries) - 1)]["response"]
+            self.stats["misses"] += 1
+            return None
+
+
+def _message_response(message: AIMessage) -> Dict[str, Any]:
+    return {
+        "content": message.content,
+        "tool_calls": [{"name": call["name"], "args": call["args"]} for call in message.tool_calls],
+        "usage_metadata": dict(message.usage_metadata) if message.usage_metadata else None,
+    }
+
+
+def _message_from_response(response: Dict[str, Any]) -> AIMessage:
+    # Fresh tool call ids, and no message id, so replayed turns never collide in the history
+    return AIMessage(
+        content=response.get("content", ""),
+        tool_calls=[
+            {"name": call["name"], "args": call["args"], "id": f"call_{uuid.uuid4().hex[:24]}", "type": "tool_call"}
+            for call in response.get("tool_calls", [])
+        ],
+        usage_metadata=response.get("usage_metadata"),
+    )
+
+
+class RecordingChatModel(BaseChatModel):
+    """Passes calls to inner and appends each response to the cassette"""
+
+    inner: Any
+    cassette: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return "docdacity-recording"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def with_structured_output(self, schema, **kwargs):
+        structured = self.inner.with_structured_output(schema, **kwargs)
+        target = f"schema:{schema.__name__}"
+
+        def respond(prompt):
+            result = structured.invoke(prompt)
+            self.cassette.record(target, prompt, result.model_dump(mode="json"))
+            return result
+
+        async def arespond(prompt):
+            result = await structured.ainvoke(prompt)
+            self.cassette.record(target, prompt, result.model_dump(mode="json"))
+            return result
+
+        return RunnableLambda(respond, afunc=arespond)
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        tools = kwargs.get("tools") or []
+        model = self.inner.bind_tools(tools) if tools else self.inner
+        message = model.invoke(messages, stop=stop)
+        self.cassette.record(_tools_target(tools), messages, _message_response(message))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        tools = kwargs.get("tools") or []
+        model = self.inner.bind_tools(tools) if tools else self.inner
+        message = await model.ainvoke(messages, stop=stop)
+        self.cassette.record(_tools_target(tools), messages, _message_response(message))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+class ReplayChatModel(BaseChatModel):
+    """
+    Answers from a cassette.
+
+    Args:
+        cassette: the recorded Cassette
+        fallback: model used for prompts with no recording; None raises CassetteMiss
+        latency_seconds: delay added to every replayed call, to mimic a real model
+    """
+
+    cassette: Any
+    fallback: Optional[Any] = None
+    latency_seconds: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "docdacity-replay"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def with_structured_output(self, schema, **kwargs):
+        target = f"schema:{schema.__name__}"
+        fallback = self.fallback.with_structured_output(schema, **kwargs) if self.fallback is not None else None
+
+        def replay(prompt):
+            response = self.cassette.lookup(target, _as_messages(prompt))
+            if response is not None:
+                return schema.model_validate(response)
+            if fallback is None:
+                raise CassetteMiss(f"No recording for {target}")
+            return fallback.invoke(prompt)
+
+        def respond(prompt):
+            time.sleep(self.latency_seconds)
+            return replay(prompt)
+
+        async def arespond(prompt):
+            await asyncio.sleep(self.latency_seconds)
+            return replay(prompt)
+
+        return RunnableLambda(respond, afunc=arespond)
+
+    def _replay(self, messages: List[BaseMessage], stop, kwargs) -> ChatResult:
+        tools = kwargs.get("tools") or []
+        target = _tools_target(tools)
+        response = self.cassette.lookup(target, messages)
+        if response is not None:
+            return ChatResult(generations=[ChatGeneration(message=_message_from_response(response))])
+        if self.fallback is None:
+            raise CassetteMiss(f"No recording for {target}")
+        model = self.fallback.bind_tools(tools) if tools else self.fallback
+        return ChatResult(generations=[ChatGeneration(message=model.invoke(messages, stop=stop))])
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency_seconds)
+        return self._replay(messages, stop, kwargs)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.latency_seconds)
+        return self._replay(messages, stop, kwargs)
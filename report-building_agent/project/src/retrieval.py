@@ -1,8 +1,16 @@
 import json
-from typing import List, Dict, Any, Optional, Tuple
+import math
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Optional, Tuple, Iterable
 from dataclasses import dataclass
+from itertools import islice
 import re
+import time
 from schemas import DocumentChunk
+from indexes import InvertedIndex, AmountIndex, CollectionStats
+from passages import (
+    DEFAULT_PASSAGE_CHARS, Passage, count_matches, kwic_snippets, parse_passage_id, query_terms, split_passages
+)
 
 
 @dataclass
@@ -15,22 +23,34 @@ class Document:
     metadata: Dict[str, Any]
 
 
-class SimulatedRetriever:
-    """
-    Simulates document retrieval without using vector databases.
-    """
+# Priority order for the metadata fields that hold a document's amount
+AMOUNT_FIELDS = ['total', 'amount', 'value', 'total_amount', 'total_value']
 
-    def __init__(self):
-        self.documents: Dict[str, Document] = {}
-        self._load_sample_documents()
 
-    def _load_sample_documents(self):
-        """Load sample documents into memory"""
-        sample_docs = [
-            Document(
-                doc_id="INV-001",
-                title="Invoice #12345",
-                content="""
+# Metrics and group-by fields accepted by aggregate()
+AGGREGATE_METRICS = ['count', 'sum', 'avg', 'min', 'max']
+AGGREGATE_GROUPS = ['doc_type', 'client', 'date', 'month', 'year']
+
+
+@dataclass
+class IngestionReport:
+    """Outcome of a bulk add_documents call"""
+    documents: int = 0
+    batches: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def docs_per_sec(self) -> float:
+        return self.documents / self.elapsed_seconds if self.elapsed_seconds > 0 else 0.0
+
+
+def get_sample_documents() -> List[Document]:
+    """Sample documents every retriever starts with"""
+    return [
+        Document(
+            doc_id="INV-001",
+            title="Invoice #12345",
+            content="""
                 Invoice #12345
                 Date: 2024-01-15
                 Client: Acme Corporation
@@ -45,13 +65,13 @@ class SimulatedRetriever:
 
                 Payment Terms: Net 30 days
                 """,
-                doc_type="invoice",
-                metadata={"client": "Acme Corporation", "date": "2024-01-15"}
-            ),
-            Document(
-                doc_id="CON-001",
-                title="Service Agreement",
-                content="""
+            doc_type="invoice",
+            metadata={"client": "Acme Corporation", "date": "2024-01-15"}
+        ),
+        Document(
+            doc_id="CON-001",
+            title="Service Agreement",
+            content="""
                 SERVICE AGREEMENT
 
                 This Service Agreement is entered into on January 1, 2024, between:
@@ -70,13 +90,13 @@ class SimulatedRetriever:
 
                 Termination: Either party may terminate with 60 days written notice.
                 """,
-                doc_type="contract",
-                metadata={"value": 180000, "duration_months": 12, "client": "Healthcare Partners LLC"}
-            ),
-            Document(
-                doc_id="CLM-001",
-                title="Insurance Claim #78901",
-                content="""
+            doc_type="contract",
+            metadata={"value": 180000, "duration_months": 12, "client": "Healthcare Partners LLC"}
+        ),
+        Document(
+            doc_id="CLM-001",
+            title="Insurance Claim #78901",
+            content="""
                 INSURANCE CLAIM FORM
                 Claim Number: 78901
                 Date of Incident: 2024-02-10
@@ -95,13 +115,13 @@ class SimulatedRetriever:
 
                 Status: Under Review
                 """,
-                doc_type="claim",
-                metadata={"amount": 2450, "status": "Under Review", "claimant": "John Doe"}
-            ),
-            Document(
-                doc_id="INV-002",
-                title="Invoice #12346",
-                content="""
+            doc_type="claim",
+            metadata={"amount": 2450, "status": "Under Review", "claimant": "John Doe"}
+        ),
+        Document(
+            doc_id="INV-002",
+            title="Invoice #12346",
+            content="""
                 Invoice #12346
                 Date: 2024-02-20
                 Client: TechStart Inc.
@@ -118,13 +138,13 @@ class SimulatedRetriever:
 
                 Payment Terms: Net 45 days
                 """,
-                doc_type="invoice",
-                metadata={"total": 69300, "client": "TechStart Inc.", "date": "2024-02-20"}
-            ),
-            Document(
-                doc_id="INV-003",
-                title="Invoice #12347",
-                content="""
+            doc_type="invoice",
+            metadata={"total": 69300, "client": "TechStart Inc.", "date": "2024-02-20"}
+        ),
+        Document(
+            doc_id="INV-003",
+            title="Invoice #12347",
+            content="""
                 Invoice #12347
                 Date: 2024-03-01
                 Client: Global Corp
@@ -140,214 +160,85 @@ class SimulatedRetriever:
 
                 Payment Terms: Net 60 days
                 """,
-                doc_type="invoice",
-                metadata={"total": 214500, "client": "Global Corp", "date": "2024-03-01"}
-            )
-        ]
+            doc_type="invoice",
+            metadata={"total": 214500, "client": "Global Corp", "date": "2024-03-01"}
+        )
+    ]
 
-        for doc in sample_docs:
-            self.documents[doc.doc_id] = doc
 
-    def add_document(self, document: Document):
-        """Add a document to the retriever"""
-        self.documents[document.doc_id] = document
+class BaseRetriever(ABC):
+    """
+    Behaviour shared by every retriever backend.
+    Subclasses provide the retrieve_by_* primitives; natural-language amount queries
+    are dispatched onto them here.
 
-    def _get_document_amount(self, doc: Document) -> Optional[float]:
-        """
-        Extract the amount from a document's metadata.
-        Checks multiple possible fields for flexibility.
-        """
-        # Priority order for amount fields
-        amount_fields = ['total', 'amount', 'value', 'total_amount', 'total_value']
+    Methods returning a list of documents take an optional limit, so a caller that only
+    shows a few hits never has the backend build chunks for every match.
+    """
 
-        for field in amount_fields:
-            if field in doc.metadata and doc.metadata[field] is not None:
-                try:
-                    return float(doc.metadata[field])
-                except (ValueError, TypeError):
-                    continue
+    @abstractmethod
+    def iter_documents(self) -> Iterable[Document]:
+        """Iterate over every stored document"""
 
-        return None
+    @abstractmethod
+    def get_document_by_id(self, doc_id: str) -> Optional[DocumentChunk]:
+        """Retrieve a specific document by ID"""
 
-    def retrieve_all(self) -> List[DocumentChunk]:
+    @abstractmethod
+    def retrieve_all(self, limit: Optional[int] = None) -> List[DocumentChunk]:
         """Retrieve all documents as DocumentChunks"""
-        results = []
-        for doc in self.documents.values():
-            results.append(DocumentChunk(
-                doc_id=doc.doc_id,
-                content=doc.content,
-                metadata={
-                    "title": doc.title,
-                    "doc_type": doc.doc_type,
-                    **doc.metadata
-                },
-                relevance_score=1.0
-            ))
-        return results
 
+    @abstractmethod
     def retrieve_by_keyword(self, query: str, top_k: int = 3) -> List[DocumentChunk]:
-        """
-        Simple keyword-based retrieval
-        """
-        query_lower = query.lower()
-        keywords = query_lower.split()
+        """The top_k documents for a keyword query, best first"""
 
-        results = []
-        for doc in self.documents.values():
-            content_lower = doc.content.lower()
-            title_lower = doc.title.lower()
-
-            # Calculate simple relevance score
-            score = 0.0
-            for keyword in keywords:
-                # Check title (higher weight)
-                if keyword in title_lower:
-                    score += 2.0
-                # Check content
-                score += content_lower.count(keyword) * 0.5
-                # Check metadata
-                for value in doc.metadata.values():
-                    if keyword in str(value).lower():
-                        score += 1.0
-
-            if score > 0:
-                results.append(DocumentChunk(
-                    doc_id=doc.doc_id,
-                    content=doc.content,
-                    metadata={
-                        "title": doc.title,
-                        "doc_type": doc.doc_type,
-                        **doc.metadata
-                    },
-                    relevance_score=score
-                ))
-
-        # Sort by relevance and return top_k
-        results.sort(key=lambda x: x.relevance_score, reverse=True)
-        return results[:top_k]
-
-    def retrieve_by_type(self, doc_type: str) -> List[DocumentChunk]:
+    @abstractmethod
+    def retrieve_by_type(self, doc_type: str, limit: Optional[int] = None) -> List[DocumentChunk]:
         """Retrieve all documents of a specific type"""
-        results = []
-        for doc in self.documents.values():
-            if doc.doc_type.lower() == doc_type.lower():
-                results.append(DocumentChunk(
-                    doc_id=doc.doc_id,
-                    content=doc.content,
-                    metadata={
-                        "title": doc.title,
-                        "doc_type": doc.doc_type,
-                        **doc.metadata
-                    },
-                    relevance_score=1.0
-                ))
-        return results
 
+    @abstractmethod
     def retrieve_by_amount_range(
             self,
             min_amount: Optional[float] = None,
-            max_amount: Optional[float] = None
+            max_amount: Optional[float] = None,
+            limit: Optional[int] = None
     ) -> List[DocumentChunk]:
-        """
-        Retrieve documents within a specific amount range.
-        Now supports:
-        - Both min and max: Documents between min and max
-        - Only min: Documents >= min (e.g., "over $50,000")
-        - Only max: Documents <= max (e.g., "under $10,000")
-        - Neither: Returns all documents with amounts
-        """
-        if min_amount is None and max_amount is None:
-            # If no bounds specified, return all documents with amounts
-            return self._retrieve_all_with_amounts()
-
-        results = []
-        for doc in self.documents.values():
-            amount = self._get_document_amount(doc)
-
-            if amount is not None:
-                # Check if amount matches criteria
-                matches = True
-
-                if min_amount is not None and amount < min_amount:
-                    matches = False
-
-                if max_amount is not None and amount > max_amount:
-                    matches = False
-
-                if matches:
-                    results.append(DocumentChunk(
-                        doc_id=doc.doc_id,
-                        content=doc.content,
-                        metadata={
-                            "title": doc.title,
-                            "doc_type": doc.doc_type,
-                            **doc.metadata
-                        },
-                        relevance_score=1.0
-                    ))
-
-        # Sort by amount for better organization
-        results.sort(key=lambda x: self._get_document_amount_from_chunk(x), reverse=True)
-        return results
-
-    def retrieve_by_exact_amount(self, amount: float, tolerance: float = 0.01) -> List[DocumentChunk]:
-        """
-        Retrieve documents with an exact amount (with small tolerance for float comparison).
-        """
-        results = []
-        for doc in self.documents.values():
-            doc_amount = self._get_document_amount(doc)
-
-            if doc_amount is not None and abs(doc_amount - amount) <= tolerance:
-                results.append(DocumentChunk(
-                    doc_id=doc.doc_id,
-                    content=doc.content,
-                    metadata={
-                        "title": doc.title,
-                        "doc_type": doc.doc_type,
-                        **doc.metadata
-                    },
-                    relevance_score=1.0
-                ))
+        """Retrieve documents within an amount range (either bound optional), largest amount first"""
 
-        return results
+    @abstractmethod
+    def retrieve_by_exact_amount(
+            self,
+            amount: float,
+            tolerance: float = 0.01,
+            limit: Optional[int] = None
+    ) -> List[DocumentChunk]:
+        """Retrieve documents with an exact amount (with small tolerance for float comparison)"""
 
+    @abstractmethod
     def retrieve_by_approximate_amount(
             self,
             amount: float,
-            percentage: float = 10.0
+            percentage: float = 10.0,
+            limit: Optional[int] = None
     ) -> List[DocumentChunk]:
+        """Retrieve documents within percentage of amount, closest first"""
+
+    def _get_document_amount(self, doc: Document) -> Optional[float]:
         """
-        Retrieve documents with amounts approximately equal to the target.
-        Default tolerance is ±10%.
+        Extract the amount from a document's metadata.
+        Checks multiple possible fields for flexibility.
+        Non-finite values (NaN, inf) are skipped; they would break the amount index's order.
         """
-        tolerance = amount * (percentage / 100)
-        min_amount = amount - tolerance
-        max_amount = amount + tolerance
+        for field in AMOUNT_FIELDS:
+            if field in doc.metadata and doc.metadata[field] is not None:
+                try:
+                    amount = float(doc.metadata[field])
+                except (ValueError, TypeError):
+                    continue
+                if math.isfinite(amount):
+                    return amount
 
-        results = []
-        for doc in self.documents.values():
-            doc_amount = self._get_document_amount(doc)
-
-            if doc_amount is not None and min_amount <= doc_amount <= max_amount:
-                # Calculate relevance based on how close the amount is
-                distance = abs(doc_amount - amount)
-                relevance = 1.0 - (distance / tolerance)  # Closer amounts get higher scores
-
-                results.append(DocumentChunk(
-                    doc_id=doc.doc_id,
-                    content=doc.content,
-                    metadata={
-                        "title": doc.title,
-                        "doc_type": doc.doc_type,
-                        **doc.metadata
-                    },
-                    relevance_score=relevance
-                ))
-
-        # Sort by relevance (closest amounts first)
-        results.sort(key=lambda x: x.relevance_score, reverse=True)
-        return results
+        return None
 
     def retrieve_by_amount(
             self,
@@ -355,7 +246,8 @@ class SimulatedRetriever:
             comparison_type: Optional[str] = None,
             amount: Optional[float] = None,
             min_amount: Optional[float] = None,
-            max_amount: Optional[float] = None
+            max_amount: Optional[float] = None,
+            limit: Optional[int] = None
     ) -> List[DocumentChunk]:
         """
         Flexible amount-based retrieval that understands natural language queries.
@@ -370,20 +262,20 @@ class SimulatedRetriever:
         # If specific comparison type is provided, use it
         if comparison_type:
             if comparison_type in ["greater", "over", "above", "more than"]:
-                return self.retrieve_by_amount_range(min_amount=amount)
+                return self.retrieve_by_amount_range(min_amount=amount, limit=limit)
             elif comparison_type in ["less", "under", "below", "less than"]:
-                return self.retrieve_by_amount_range(max_amount=amount)
+                return self.retrieve_by_amount_range(max_amount=amount, limit=limit)
             elif comparison_type in ["exact", "exactly", "equal", "equals"]:
-                return self.retrieve_by_exact_amount(amount)
+                return self.retrieve_by_exact_amount(amount, limit=limit)
             elif comparison_type in ["approximate", "around", "about", "roughly"]:
-                return self.retrieve_by_approximate_amount(amount)
+                return self.retrieve_by_approximate_amount(amount, limit=limit)
             elif comparison_type in ["between", "range"]:
-                return self.retrieve_by_amount_range(min_amount=min_amount, max_amount=max_amount)
+                return self.retrieve_by_amount_range(min_amount=min_amount, max_amount=max_amount, limit=limit)
 
         # Otherwise, try to parse the query
-        return self._parse_and_retrieve_by_amount(query)
+        return self._parse_and_retrieve_by_amount(query, limit=limit)
 
-    def _parse_and_retrieve_by_amount(self, query: str) -> List[DocumentChunk]:
+    def _parse_and_retrieve_by_amount(self, query: str, limit: Optional[int] = None) -> List[DocumentChunk]:
         """
         Parse natural language amount queries and retrieve accordingly.
         """
@@ -396,72 +288,382 @@ class SimulatedRetriever:
         # Check for comparison keywords
         if any(word in query_lower for word in ['over', 'above', 'more than', 'greater than', '>']):
             if amounts:
-                return self.retrieve_by_amount_range(min_amount=amounts[0])
+                return self.retrieve_by_amount_range(min_amount=amounts[0], limit=limit)
 
         elif any(word in query_lower for word in ['under', 'below', 'less than', '<']):
             if amounts:
-                return self.retrieve_by_amount_range(max_amount=amounts[0])
+                return self.retrieve_by_amount_range(max_amount=amounts[0], limit=limit)
 
         elif any(word in query_lower for word in ['between', 'range', 'from']):
             if len(amounts) >= 2:
                 return self.retrieve_by_amount_range(
                     min_amount=min(amounts[0], amounts[1]),
-                    max_amount=max(amounts[0], amounts[1])
+                    max_amount=max(amounts[0], amounts[1]),
+                    limit=limit
                 )
 
         elif any(word in query_lower for word in ['around', 'about', 'approximately', 'roughly', '~']):
             if amounts:
-                return self.retrieve_by_approximate_amount(amounts[0])
+                return self.retrieve_by_approximate_amount(amounts[0], limit=limit)
 
         elif any(word in query_lower for word in ['exactly', 'exact', 'precisely', '=']):
             if amounts:
-                return self.retrieve_by_exact_amount(amounts[0])
+                return self.retrieve_by_exact_amount(amounts[0], limit=limit)
 
         # Default: if amounts mentioned, look for documents containing those amounts
         if amounts:
             return self.retrieve_by_amount_range(
                 min_amount=min(amounts) * 0.9,
-                max_amount=max(amounts) * 1.1
+                max_amount=max(amounts) * 1.1,
+                limit=limit
             )
 
         # Fallback to keyword search
         return self.retrieve_by_keyword(query)
 
-    def _retrieve_all_with_amounts(self) -> List[DocumentChunk]:
-        """Retrieve all documents that have amount information"""
+    def _document_passages(self, doc_id: str) -> Tuple[Optional[DocumentChunk], List[Passage]]:
+        """A document and its passages; backends without stored passages split on demand"""
+        chunk = self.get_document_by_id(doc_id)
+        if chunk is None:
+            return None, []
+        return chunk, split_passages(doc_id, chunk.content)
+
+    @staticmethod
+    def _passage_chunk(
+            chunk: DocumentChunk,
+            passage: Passage,
+            total: int,
+            relevance_score: float = 1.0,
+            query: Optional[str] = None
+    ) -> DocumentChunk:
+        """DocumentChunk for one passage: the document's metadata plus its position and snippets"""
+        metadata = {
+            **chunk.metadata,
+            "passage": passage.index,
+            "passages": total,
+            "start": passage.start,
+            "end": passage.end
+        }
+        if query is not None:
+            metadata["snippets"] = kwic_snippets(passage.text, query)
+        return DocumentChunk(
+            doc_id=chunk.doc_id, content=passage.text, metadata=metadata, relevance_score=relevance_score
+        )
+
+    def retrieve_passages(self, query: str, top_k: int = 3) -> List[DocumentChunk]:
+        """
+        Best-matching passage of each of the top keyword documents, with keyword-in-context
+        snippets in metadata["snippets"]
+        """
+        terms = query_terms(query)
         results = []
-        for doc in self.documents.values():
-            if self._get_document_amount(doc) is not None:
-                results.append(DocumentChunk(
-                    doc_id=doc.doc_id,
-                    content=doc.content,
-                    metadata={
-                        "title": doc.title,
-                        "doc_type": doc.doc_type,
-                        **doc.metadata
-                    },
-                    relevance_score=1.0
-                ))
+        for chunk in self.retrieve_by_keyword(query, top_k):
+            passages = split_passages(chunk.doc_id, chunk.content)
+            if passages:
+                best = max(passages, key=lambda passage: count_matches(passage.text, terms))
+                results.append(self._passage_chunk(chunk, best, len(passages), chunk.relevance_score, query))
         return results
 
-    def _get_document_amount_from_chunk(self, chunk: DocumentChunk) -> float:
-        """Extract amount from a DocumentChunk for sorting"""
-        amount_fields = ['total', 'amount', 'value', 'total_amount', 'total_value']
+    def get_passages(self, doc_id: str, passage: int, window: int = 1) -> List[DocumentChunk]:
+        """
+        A passage and up to window passages on either side of it.
+        Empty if the document or the passage does not exist.
+        """
+        chunk, passages = self._document_passages(doc_id)
+        if chunk is None or not 0 <= passage < len(passages):
+            return []
+        return [
+            self._passage_chunk(chunk, neighbour, len(passages))
+            for neighbour in passages[max(0, passage - window):passage + window + 1]
+        ]
 
-        for field in amount_fields:
-            if field in chunk.metadata:
-                try:
-                    return float(chunk.metadata[field])
-                except (ValueError, TypeError):
+    def aggregate(
+            self,
+            metrics: Optional[List[str]] = None,
+            group_by: Optional[str] = None,
+            doc_type: Optional[str] = None,
+            client: Optional[str] = None,
+            min_amount: Optional[float] = None,
+            max_amount: Optional[float] = None,
+            start_date: Optional[str] = None,
+            end_date: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Compute count/sum/avg/min/max of document amounts, optionally filtered and grouped.
+        Returns one row per group (a single row without group_by). Every row has "count"
+        (matching documents) and "documents_with_amounts", plus the requested metrics.
+        This default scans iter_documents; backends override it to use their indexes.
+        """
+        metrics = self._check_aggregate_args(metrics, group_by)
+        pairs = ((doc, self._get_document_amount(doc)) for doc in self.iter_documents())
+        return self._aggregate_documents(
+            pairs, metrics, group_by, doc_type, client, min_amount, max_amount, start_date, end_date
+        )
+
+    @staticmethod
+    def _check_aggregate_args(metrics: Optional[List[str]], group_by: Optional[str]) -> List[str]:
+        metrics = [metric.lower() for metric in (metrics or ['sum', 'count'])]
+        unknown = [metric for metric in metrics if metric not in AGGREGATE_METRICS]
+        if unknown:
+            raise ValueError(f"Unknown metric(s) {unknown}; use {AGGREGATE_METRICS}")
+        if group_by is not None and group_by not in AGGREGATE_GROUPS:
+            raise ValueError(f"Cannot group by '{group_by}'; use one of {AGGREGATE_GROUPS}")
+        return metrics
+
+    @staticmethod
+    def _group_key(doc: Document, group_by: str) -> Optional[str]:
+        if group_by == 'doc_type':
+            return doc.doc_type.lower()
+        if group_by == 'client':
+            client = doc.metadata.get('client')
+            return None if client is None else str(client)
+        date = doc.metadata.get('date')
+        if date is None:
+            return None
+        date = str(date)
+        # ISO dates: year is the first 4 characters, month the first 7
+        return {'date': date, 'month': date[:7], 'year': date[:4]}[group_by]
+
+    def _aggregate_documents(
+            self,
+            pairs: Iterable[Tuple[Document, Optional[float]]],
+            metrics: List[str],
+            group_by: Optional[str],
+            doc_type: Optional[str],
+            client: Optional[str],
+            min_amount: Optional[float],
+            max_amount: Optional[float],
+            start_date: Optional[str],
+            end_date: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        """Filter (document, amount) pairs and fold them into aggregate rows"""
+        doc_type = doc_type.lower() if doc_type else None
+        client = client.lower() if client else None
+        amount_filter = min_amount is not None or max_amount is not None
+
+        # group key -> [count, documents_with_amounts, sum, min, max]
+        groups: Dict[Optional[str], List[Any]] = {}
+        for doc, amount in pairs:
+            if doc_type and doc.doc_type.lower() != doc_type:
+                continue
+            if client and str(doc.metadata.get('client', '')).lower() != client:
+                continue
+            if amount_filter and (
+                    amount is None
+                    or (min_amount is not None and amount < min_amount)
+                    or (max_amount is not None and amount > max_amount)
+            ):
+                continue
+            if start_date or end_date:
+                date = doc.metadata.get('date')
+                if date is None or (start_date and str(date) < start_date) or (end_date and str(date) > end_date):
                     continue
 
-        return 0.0
+            key = self._group_key(doc, group_by) if group_by else None
+            group = groups.setdefault(key, [0, 0, 0.0, None, None])
+            group[0] += 1
+            if amount is not None:
+                group[1] += 1
+                group[2] += amount
+                group[3] = amount if group[3] is None else min(group[3], amount)
+                group[4] = amount if group[4] is None else max(group[4], amount)
+
+        if not group_by and not groups:
+            groups[None] = [0, 0, 0.0, None, None]
+
+        return [
+            self._aggregate_row(metrics, group_by, key, count, with_amounts, total, low, high)
+            for key, (count, with_amounts, total, low, high) in sorted(
+                groups.items(), key=lambda item: (item[0] is None, str(item[0]))
+            )
+        ]
 
-    def get_document_by_id(self, doc_id: str) -> Optional[DocumentChunk]:
-        """Retrieve a specific document by ID"""
-        if doc_id in self.documents:
-            doc = self.documents[doc_id]
-            return DocumentChunk(
+    @staticmethod
+    def _aggregate_row(
+            metrics: List[str],
+            group_by: Optional[str],
+            key: Optional[str],
+            count: int,
+            with_amounts: int,
+            total: Optional[float],
+            low: Optional[float],
+            high: Optional[float]
+    ) -> Dict[str, Any]:
+        values = {
+            'sum': (total or 0.0) if with_amounts else None,
+            'avg': (total or 0.0) / with_amounts if with_amounts else None,
+            'min': low,
+            'max': high,
+        }
+        row: Dict[str, Any] = {group_by: key} if group_by else {}
+        row.update({'count': count, 'documents_with_amounts': with_amounts})
+        row.update({metric: values[metric] for metric in metrics if metric != 'count'})
+        return row
+
+
+class SimulatedRetriever(BaseRetriever):
+    """
+    Simulates document retrieval without using vector databases.
+    """
+
+    def __init__(self, passage_chars: int = DEFAULT_PASSAGE_CHARS):
+        self.documents: Dict[str, Document] = {}
+        self._keyword_index = InvertedIndex()
+        # Passages are cut at ingest time and indexed on their own; 0 splits them per query instead
+        self.passage_chars = passage_chars
+        self._passages: Dict[str, List[Passage]] = {}
+        self._passage_index = InvertedIndex()
+        self._amount_index = AmountIndex()
+        self._stats = CollectionStats(self._amount_index)
+        # doc_id -> version, bumped whenever a document is (re)added
+        self._doc_versions: Dict[str, int] = {}
+        # doc_id -> (version, chunk) so unchanged documents reuse one DocumentChunk
+        self._chunk_cache: Dict[str, Tuple[int, DocumentChunk]] = {}
+        # Bumped on every change to the collection, so caches built on top can tell they are stale
+        self.corpus_version = 0
+        self._load_sample_documents()
+
+    def _load_sample_documents(self):
+        """Load sample documents into memory"""
+        for doc in get_sample_documents():
+            self.add_document(doc)
+
+    def iter_documents(self) -> Iterable[Document]:
+        return iter(self.documents.values())
+
+    def add_document(self, document: Document):
+        """Add a document to the retriever"""
+        self._add_batch([document])
+
+    def add_documents(self, documents: Iterable[Document], batch_size: int = 5000) -> IngestionReport:
+        """
+        Add documents from any iterable (typically a generator from ingestion.py).
+        The iterable is consumed batch_size documents at a time, so only one batch
+        of pending documents is held beyond what the retriever itself stores.
+        """
+        report = IngestionReport()
+        started = time.perf_counter()
+        iterator = iter(documents)
+
+        while True:
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                break
+            self._add_batch(batch)
+            report.documents += len(batch)
+            report.batches += 1
+
+        report.elapsed_seconds = time.perf_counter() - started
+        return report
+
+    def _add_batch(self, docs: List[Document]):
+        """Store a batch of documents and update every index for it"""
+        # doc_id -> amount for this batch, merged into the amount index at the end
+        amounts: Dict[str, float] = {}
+        for doc in docs:
+            previous = self.documents.get(doc.doc_id)
+            if previous is not None:
+                previous_amount = amounts[doc.doc_id] if doc.doc_id in amounts else self._amount_index.get(doc.doc_id)
+                self._stats.remove(previous.doc_type, previous_amount)
+
+            self.documents[doc.doc_id] = doc
+            self._doc_versions[doc.doc_id] = self._doc_versions.get(doc.doc_id, 0) + 1
+            self._chunk_cache.pop(doc.doc_id, None)
+            self._index_keywords(doc)
+            self._index_passages(doc)
+
+            # Amounts are normalized once here; lookups never touch metadata again
+            amount = self._get_document_amount(doc)
+            if amount is not None:
+                amounts[doc.doc_id] = amount
+            else:
+                amounts.pop(doc.doc_id, None)
+                self._amount_index.remove(doc.doc_id)
+            self._stats.add(doc.doc_type, amount)
+
+        self._amount_index.add_many(amounts.items())
+        self.corpus_version += 1
+
+    def remove_document(self, doc_id: str) -> bool:
+        """Remove a document and its index entries. Returns False if it was not present."""
+        doc = self.documents.pop(doc_id, None)
+        if doc is None:
+            return False
+
+        self._stats.remove(doc.doc_type, self._amount_index.get(doc_id))
+        self._doc_versions[doc_id] = self._doc_versions.get(doc_id, 0) + 1
+        self._chunk_cache.pop(doc_id, None)
+        self._keyword_index.remove(doc_id)
+        for passage in self._passages.pop(doc_id, []):
+            self._passage_index.remove(passage.passage_id)
+        self._amount_index.remove(doc_id)
+        self.corpus_version += 1
+        return True
+
+    def _index_keywords(self, doc: Document):
+        """
+        Update the keyword index for a single document.
+        Title matches weigh the most, then metadata values, then body content.
+        """
+        fields = [(doc.title, 2.0), (doc.content, 0.5)]
+        fields.extend((str(value), 1.0) for value in doc.metadata.values())
+        self._keyword_index.add(doc.doc_id, fields)
+
+    def _index_passages(self, doc: Document):
+        """Split a document into passages and index each one with the document's title"""
+        if not self.passage_chars:
+            return
+        for passage in self._passages.pop(doc.doc_id, []):
+            self._passage_index.remove(passage.passage_id)
+
+        passages = split_passages(doc.doc_id, doc.content, self.passage_chars)
+        self._passages[doc.doc_id] = passages
+        for passage in passages:
+            self._passage_index.add(passage.passage_id, [(doc.title, 2.0), (passage.text, 1.0)])
+
+    def _document_passages(self, doc_id: str) -> Tuple[Optional[DocumentChunk], List[Passage]]:
+        if not self.passage_chars:
+            return super()._document_passages(doc_id)
+        doc = self.documents.get(doc_id)
+        if doc is None:
+            return None, []
+        return self._to_chunk(doc), self._passages.get(doc_id, [])
+
+    def retrieve_passages(self, query: str, top_k: int = 3) -> List[DocumentChunk]:
+        """
+        Passage retrieval backed by the passage BM25 index: the best passage of each of
+        the top_k best-matching documents, with keyword-in-context snippets
+        """
+        if not self.passage_chars:
+            return super().retrieve_passages(query, top_k)
+
+        results: List[DocumentChunk] = []
+        seen = set()
+        # A few extra hits so documents with several matching passages do not crowd out others
+        for passage_id, score in self._passage_index.search(query, top_k * 4):
+            doc_id, index = parse_passage_id(passage_id)
+            if doc_id in seen:
+                continue
+            seen.add(doc_id)
+            passages = self._passages[doc_id]
+            chunk = self._to_chunk(self.documents[doc_id])
+            results.append(self._passage_chunk(chunk, passages[index], len(passages), score, query))
+            if len(results) == top_k:
+                break
+        return results
+
+    def _to_chunk(self, doc: Document, relevance_score: float = 1.0) -> DocumentChunk:
+        """
+        Return the DocumentChunk view of a document.
+
+        The view (merged metadata, validated model) is built once per document version.
+        Every caller gets a shallow copy with its own metadata dict (and its relevance_score),
+        so nothing is revalidated and a caller editing metadata cannot change the cached view.
+        """
+        version = self._doc_versions.get(doc.doc_id, 0)
+        cached = self._chunk_cache.get(doc.doc_id)
+        if cached is None or cached[0] != version:
+            chunk = DocumentChunk(
                 doc_id=doc.doc_id,
                 content=doc.content,
                 metadata={
@@ -471,39 +673,150 @@ class SimulatedRetriever:
                 },
                 relevance_score=1.0
             )
-        return None
+            self._chunk_cache[doc.doc_id] = (version, chunk)
+        else:
+            chunk = cached[1]
 
-    def get_statistics(self) -> Dict[str, Any]:
+        return chunk.model_copy(update={"metadata": dict(chunk.metadata), "relevance_score": relevance_score})
+
+    def retrieve_all(self, limit: Optional[int] = None) -> List[DocumentChunk]:
+        """Retrieve all documents as DocumentChunks"""
+        return [self._to_chunk(doc) for doc in islice(self.documents.values(), limit)]
+
+    def retrieve_by_keyword(self, query: str, top_k: int = 3) -> List[DocumentChunk]:
         """
-        Get statistics about the document collection.
+        Keyword retrieval backed by the BM25 inverted index
         """
-        total_docs = len(self.documents)
-        docs_with_amounts = 0
-        total_amount = 0.0
-        amounts = []
-        doc_types = {}
+        return [
+            self._to_chunk(self.documents[doc_id], score)
+            for doc_id, score in self._keyword_index.search(query, top_k)
+        ]
 
-        for doc in self.documents.values():
-            # Count by type
-            doc_types[doc.doc_type] = doc_types.get(doc.doc_type, 0) + 1
+    def retrieve_by_type(self, doc_type: str, limit: Optional[int] = None) -> List[DocumentChunk]:
+        """Retrieve all documents of a specific type"""
+        doc_type = doc_type.lower()
+        matches = (doc for doc in self.documents.values() if doc.doc_type.lower() == doc_type)
+        return [self._to_chunk(doc) for doc in islice(matches, limit)]
 
-            # Amount statistics
-            amount = self._get_document_amount(doc)
-            if amount is not None:
-                docs_with_amounts += 1
-                total_amount += amount
-                amounts.append(amount)
-
-        stats = {
-            "total_documents": total_docs,
-            "documents_with_amounts": docs_with_amounts,
-            "total_amount": total_amount,
-            "average_amount": total_amount / docs_with_amounts if docs_with_amounts > 0 else 0,
-            "document_types": doc_types
-        }
+    def retrieve_by_amount_range(
+            self,
+            min_amount: Optional[float] = None,
+            max_amount: Optional[float] = None,
+            limit: Optional[int] = None
+    ) -> List[DocumentChunk]:
+        """
+        Retrieve documents within a specific amount range.
+        Now supports:
+        - Both min and max: Documents between min and max
+        - Only min: Documents >= min (e.g., "over $50,000")
+        - Only max: Documents <= max (e.g., "under $10,000")
+        - Neither: Returns all documents with amounts
 
-        if amounts:
-            stats["min_amount"] = min(amounts)
-            stats["max_amount"] = max(amounts)
+        Results come straight off the sorted amount index, largest amount first.
+        """
+        if min_amount is None and max_amount is None:
+            # If no bounds specified, return all documents with amounts
+            return self._retrieve_all_with_amounts(limit)
+
+        return [
+            self._to_chunk(self.documents[doc_id])
+            for doc_id, _ in self._amount_index.range(min_amount, max_amount, descending=True, limit=limit)
+        ]
+
+    def retrieve_by_exact_amount(
+            self,
+            amount: float,
+            tolerance: float = 0.01,
+            limit: Optional[int] = None
+    ) -> List[DocumentChunk]:
+        """
+        Retrieve documents with an exact amount (with small tolerance for float comparison).
+        """
+        return [
+            self._to_chunk(self.documents[doc_id])
+            for doc_id, _ in self._amount_index.range(amount - tolerance, amount + tolerance, limit=limit)
+        ]
+
+    def retrieve_by_approximate_amount(
+            self,
+            amount: float,
+            percentage: float = 10.0,
+            limit: Optional[int] = None
+    ) -> List[DocumentChunk]:
+        """
+        Retrieve documents with amounts approximately equal to the target.
+        Default tolerance is ±10%.
+        """
+        tolerance = abs(amount * (percentage / 100))
+        min_amount = amount - tolerance
+        max_amount = amount + tolerance
+
+        # The index walks outwards from the target, so results are already closest-first
+        results = []
+        for doc_id, doc_amount in self._amount_index.closest(amount, min_amount, max_amount, limit):
+            distance = abs(doc_amount - amount)
+            relevance = 1.0 - (distance / tolerance) if tolerance else 1.0
+            results.append(self._to_chunk(self.documents[doc_id], relevance))
+        return results
+
+    def _retrieve_all_with_amounts(self, limit: Optional[int] = None) -> List[DocumentChunk]:
+        """Retrieve all documents that have amount information"""
+        return [
+            self._to_chunk(self.documents[doc_id])
+            for doc_id, _ in self._amount_index.range(descending=True, limit=limit)
+        ]
+
+    def get_document_by_id(self, doc_id: str) -> Optional[DocumentChunk]:
+        """Retrieve a specific document by ID"""
+        if doc_id in self.documents:
+            return self._to_chunk(self.documents[doc_id])
+        return None
+
+    def get_documents_by_ids(self, doc_ids: List[str]) -> Dict[str, DocumentChunk]:
+        """Retrieve several documents by ID; missing IDs are left out"""
+        return {doc_id: self._to_chunk(self.documents[doc_id]) for doc_id in doc_ids if doc_id in self.documents}
 
-        return stats
+    def aggregate(
+            self,
+            metrics: Optional[List[str]] = None,
+            group_by: Optional[str] = None,
+            doc_type: Optional[str] = None,
+            client: Optional[str] = None,
+            min_amount: Optional[float] = None,
+            max_amount: Optional[float] = None,
+            start_date: Optional[str] = None,
+            end_date: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        See BaseRetriever.aggregate. Unfiltered totals come from the running statistics,
+        and amount filters only visit the matching slice of the sorted amount index.
+        """
+        metrics = self._check_aggregate_args(metrics, group_by)
+        filters = (doc_type, client, min_amount, max_amount, start_date, end_date)
+
+        if group_by is None and all(value is None for value in filters):
+            stats = self._stats.snapshot()
+            return [self._aggregate_row(
+                metrics, None, None,
+                stats['total_documents'], stats['documents_with_amounts'], stats['total_amount'],
+                stats.get('min_amount'), stats.get('max_amount')
+            )]
+
+        if min_amount is not None or max_amount is not None:
+            pairs = (
+                (self.documents[doc_id], amount)
+                for doc_id, amount in self._amount_index.range(min_amount, max_amount)
+            )
+        else:
+            pairs = ((doc, self._amount_index.get(doc_id)) for doc_id, doc in self.documents.items())
+
+        return self._aggregate_documents(
+            pairs, metrics, group_by, doc_type, client, min_amount, max_amount, start_date, end_date
+        )
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get statistics about the document collection.
+        Served from running aggregates, so the cost does not depend on collection size.
+        """
+        return self._stats.snapshot()
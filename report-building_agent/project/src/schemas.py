@@ -1,11 +1,14 @@
 from langchain_core.messages import BaseMessage
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any, Literal, TypedDict
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Optional, Dict, Any, Literal
 from datetime import datetime
 
 
 class DocumentChunk(BaseModel):
     """Represents a chunk of document content"""
+    # Chunks are cached and shared between queries by the retriever, so they are read-only
+    model_config = ConfigDict(frozen=True)
+
     doc_id: str = Field(description="Document identifier")
     content: str = Field(description="The actual text content")
     metadata: Dict[str, Any] = Field(default_factory=lambda: dict, description="Additional metadata")
@@ -63,7 +66,8 @@ class SessionState(BaseModel):
     """Session state"""
     session_id: str
     user_id: str
-    conversation_history: List[TypedDict] = Field(default_factory=lambda: list)
-    document_context: List[str] = Field(default_factory=lambda: list, description="Active document IDs")
+    # One entry per turn (see DocumentAssistant._record_turn)
+    conversation_history: List[Dict[str, Any]] = Field(default_factory=list)
+    document_context: List[str] = Field(default_factory=list, description="Active document IDs")
     created_at: datetime = Field(default_factory=datetime.now)
     last_updated: datetime = Field(default_factory=datetime.now)
@@ -0,0 +1,158 @@
+"""
+Compact, token-budgeted output for document_search.
+
+Small result sets get a short block per document. Larger ones become a table with one row
+per document and only the columns the search needs: no type column when every hit has
+the same type, amounts only for amount searches (or queries that mention amounts), and a
+relevance column only when the scores actually rank the hits. Rows are added until the
+token budget is used up, and the output says how many results were left out.
+"""
+
+import re
+from typing import Callable, List, Optional
+
+from schemas import DocumentChunk
+
+DEFAULT_SEARCH_TOKEN_BUDGET = 800
+
+# Result sets up to this size are shown as one block per document instead of a table
+DETAIL_LIMIT = 3
+
+AMOUNT_FIELDS = ['total', 'amount', 'value']
+AMOUNT_WORDS = re.compile(
+    r"\$|\b(amount|amounts|total|totals|value|sum|cost|price|paid|over|under|above|below|between|around)\b",
+    re.IGNORECASE
+)
+TITLE_CHARS = 48
+SNIPPET_CHARS = 160
+# No table row costs fewer tokens than this (id, separator, title)
+MIN_ROW_TOKENS = 4
+
+
+def max_results(token_budget: int = DEFAULT_SEARCH_TOKEN_BUDGET) -> int:
+    """Most hits format_search_results can show within token_budget, so searches need fetch no more"""
+    return max(DETAIL_LIMIT, token_budget // MIN_ROW_TOKENS)
+
+
+def wants_amount(query: str, search_type: str, amount_filter: bool) -> bool:
+    """Whether the search is about amounts, so the amount column is worth its tokens"""
+    return search_type in ("amount", "amount_range") or amount_filter or bool(AMOUNT_WORDS.search(query or ""))
+
+
+def _amount(chunk: DocumentChunk) -> Optional[float]:
+    for field in AMOUNT_FIELDS:
+        if field in chunk.metadata:
+            return chunk.metadata[field]
+    return None
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + "..."
+
+
+def _passage(chunk: DocumentChunk) -> str:
+    metadata = chunk.metadata
+    return (
+        f"passage {metadata['passage']} (of 0-{metadata['passages'] - 1}, "
+        f"chars {metadata['start']}-{metadata['end']})"
+    )
+
+
+def _detail(chunk: DocumentChunk, show_type: bool, show_amount: bool, show_score: bool) -> List[str]:
+    """A short block for one document: ID and title, one line of fields, then passage snippets"""
+    fields = []
+    if show_type:
+        fields.append(f"Type: {chunk.metadata.get('doc_type', 'Unknown')}")
+    amount = _amount(chunk)
+    if show_amount and amount is not None:
+        fields.append(f"Amount: ${amount:,.2f}")
+    if show_score:
+        fields.append(f"Relevance: {chunk.relevance_score:.2f}")
+
+    lines = [f"{chunk.doc_id}: {chunk.metadata.get('title', 'Unknown')}"]
+    if fields:
+        lines.append("  " + " | ".join(fields))
+    if 'passage' in chunk.metadata:
+        snippets = chunk.metadata.get('snippets') or [_clip(chunk.content, SNIPPET_CHARS)]
+        lines.append(f"  {_passage(chunk)}: " + " / ".join(snippets))
+    return lines
+
+
+def _row(chunk: DocumentChunk, show_type: bool, show_amount: bool, show_score: bool) -> str:
+    cells = [chunk.doc_id, _clip(chunk.metadata.get('title', 'Unknown'), TITLE_CHARS)]
+    if show_type:
+        cells.append(str(chunk.metadata.get('doc_type', '')))
+    if show_amount:
+        amount = _amount(chunk)
+        cells.append(f"{amount:,.2f}" if amount is not None else "")
+    if show_score:
+        cells.append(f"{chunk.relevance_score:.2f}")
+    if 'passage' in chunk.metadata:
+        cells.append(str(chunk.metadata['passage']))
+        snippets = chunk.metadata.get('snippets')
+        cells.append(_clip(snippets[0] if snippets else chunk.content, SNIPPET_CHARS))
+    return " | ".join(cells)
+
+
+def format_search_results(
+        results: List[DocumentChunk],
+        token_budget: int = DEFAULT_SEARCH_TOKEN_BUDGET,
+        count_tokens: Optional[Callable[[str], int]] = None,
+        show_amount: bool = True,
+        more: bool = False
+) -> str:
+    """
+    Format search hits within token_budget (counted with count_tokens, or ~4 characters
+    per token); results that do not fit are counted in a closing line instead of shown.
+    more says the search stopped at len(results) and further documents match.
+    """
+    if not results:
+        return "No documents found matching your search criteria."
+    count_tokens = count_tokens or (lambda text: (len(text) + 3) // 4)
+
+    doc_types = {chunk.metadata.get('doc_type') for chunk in results}
+    show_type = len(doc_types) > 1
+    scores = {round(chunk.relevance_score, 2) for chunk in results}
+    show_score = scores != {1.0}
+    passages = any('passage' in chunk.metadata for chunk in results)
+
+    found = f"{len(results)}+" if more else str(len(results))
+    header = f"Found {found} document(s)"
+    if not show_type:
+        header += f" of type {next(iter(doc_types)) or 'Unknown'}"
+    lines: List[str] = []
+
+    if len(results) > DETAIL_LIMIT:
+        columns = ["id", "title"] + (["type"] if show_type else []) + (["amount"] if show_amount else [])
+        columns += (["relevance"] if show_score else []) + (["passage", "snippet"] if passages else [])
+        lines.append(" | ".join(columns))
+
+    footer = []
+    if passages:
+        footer.append("Read a passage and its neighbours with document_reader(doc_id, passage=N).")
+    # The extra tokens leave room for the truncation line
+    used = count_tokens(header) + sum(count_tokens(line) for line in lines + footer) + 20
+
+    shown = 0
+    for chunk in results:
+        if len(results) > DETAIL_LIMIT:
+            entry = [_row(chunk, show_type, show_amount, show_score)]
+        else:
+            entry = _detail(chunk, show_type, show_amount, show_score)
+        tokens = sum(count_tokens(line) for line in entry)
+        # The first hit is always shown, even if it alone exceeds the budget
+        if shown and used + tokens > token_budget:
+            break
+        lines.extend(entry)
+        used += tokens
+        shown += 1
+
+    if shown < len(results) or more:
+        header += f", showing {shown}"
+        left_out = f"{len(results) - shown}+" if more else str(len(results) - shown)
+        footer.insert(0, (
+            f"{left_out} more result(s) truncated to fit the output budget; "
+            f"narrow the search, or use document_aggregate for totals and counts."
+        ))
+    return "\n".join([header + ":", *lines, *footer])
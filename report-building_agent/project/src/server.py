@@ -0,0 +1,375 @@
+"""
+HTTP/JSON service in front of DocumentAssistant.
+
+One process hosts a single assistant, so every tenant shares the retriever, the tool
+set and the compiled workflow; each session keeps its own state in the workflow's
+checkpointer thread. Requests are routed by session_id:
+
+    POST /sessions/<session_id>/messages   {"message": "...", "user_id": "..."}
+    GET  /health
+    GET  /metrics
+
+Turns for one session run one at a time, in arrival order. Across sessions at most
+max_concurrency turns run at once, and once max_pending turns are queued or running
+new messages get 503 instead of piling up. The server only needs asyncio from the
+standard library; run it with --stub-llm to serve and load-test offline.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+from collections import deque
+from http import HTTPStatus
+from typing import Any, Deque, Dict, Optional, Set, Tuple
+
+from assistant import DocumentAssistant
+from stub_llm import StubChatModel
+
+SESSION_PATH = re.compile(r"^/sessions/([A-Za-z0-9_.\-]{1,128})/messages$")
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+KEEP_ALIVE_SECONDS = 30.0
+
+
+class HTTPError(Exception):
+    """An error response with a status code"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def percentile(values, fraction: float) -> float:
+    """Nearest-rank percentile of a sequence of numbers, 0.0 when empty"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+class ServiceMetrics:
+    """Request counters and a window of recent turn latencies"""
+
+    def __init__(self, window: int = 10000):
+        self.started_at = time.monotonic()
+        self.requests = 0
+        self.turns = 0
+        self.errors = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.queued = 0
+        self.latencies: Deque[float] = deque(maxlen=window)
+
+    def record_turn(self, seconds: float, success: bool):
+        self.turns += 1
+        if not success:
+            self.errors += 1
+        self.latencies.append(seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        uptime = time.monotonic() - self.started_at
+        latencies = list(self.latencies)
+        return {
+            "uptime_seconds": round(uptime, 3),
+            "requests": self.requests,
+            "turns": self.turns,
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "turns_per_sec": round(self.turns / uptime, 3) if uptime else 0.0,
+            "latency_seconds": {
+                "p50": round(percentile(latencies, 0.50), 4),
+                "p95": round(percentile(latencies, 0.95), 4),
+                "p99": round(percentile(latencies, 0.99), 4),
+                "max": round(max(latencies), 4) if latencies else 0.0,
+            },
+        }
+
+
+class AssistantServer:
+    """
+    Minimal HTTP/1.1 server (keep-alive, JSON bodies) that routes turns to a shared assistant.
+
+    Args:
+        assistant: the shared DocumentAssistant
+        host, port: address to listen on (port 0 picks a free port)
+        max_concurrency: turns processed at the same time across all sessions
+        max_pending: turns queued or running before new messages are rejected with 503
+    """
+
+    def __init__(
+            self,
+            assistant: DocumentAssistant,
+            host: str = "127.0.0.1",
+            port: int = 8080,
+            max_concurrency: int = 32,
+            max_pending: int = 256
+    ):
+        self.assistant = assistant
+        self.host = host
+        self.port = port
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+        self.metrics = ServiceMetrics()
+
+        self._slots = asyncio.Semaphore(max_concurrency)
+        # session_id -> [lock, number of turns holding or waiting for it]
+        self._session_locks: Dict[str, list] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Set[asyncio.Task] = set()
+
+    async def start(self):
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port, limit=MAX_HEADER_BYTES
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        print(f"Serving on http://{self.host}:{self.port}")
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            # Idle keep-alive connections would otherwise stay open until their timeout
+            for task in list(self._connections):
+                task.cancel()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+        # Let background memory updates finish so the next start sees them
+        await self.assistant.await_memory()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), KEEP_ALIVE_SECONDS)
+                except HTTPError as e:
+                    await self._write_response(writer, e.status, {"error": e.message}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+
+                method, path, body, keep_alive = request
+                self.metrics.requests += 1
+                try:
+                    status, payload = await self._dispatch(method, path, body)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": e.message}
+                except Exception as e:
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}
+
+                await self._write_response(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Tuple[str, str, bytes, bool]]:
+        """Parse one request; returns None when the client closed the connection"""
+        try:
+            request_line = await reader.readline()
+        except ValueError:
+            raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Request line too long")
+        if not request_line:
+            return None
+
+        parts = request_line.decode("latin-1").split()
+        if len(parts) != 3:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+        method, target, version = parts
+
+        headers: Dict[str, str] = {}
+        header_bytes = 0
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError:
+                raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Header line too long")
+            header_bytes += len(line)
+            if header_bytes > MAX_HEADER_BYTES:
+                raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Headers too large")
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+        if length < 0 or length > MAX_BODY_BYTES:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"Body must be at most {MAX_BODY_BYTES} bytes")
+        body = await reader.readexactly(length) if length else b""
+
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        return method.upper(), target.split("?", 1)[0], body, keep_alive
+
+    async def _write_response(self, writer: asyncio.StreamWriter, status: int, payload: Any, keep_alive: bool):
+        body = json.dumps(payload, default=str).encode("utf-8")
+        status = HTTPStatus(status)
+        head = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            "\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def _dispatch(self, method: str, path: str, body: bytes) -> Tuple[int, Any]:
+        if path == "/health":
+            self._require_method(method, "GET")
+            return HTTPStatus.OK, {
+                "status": "ok",
+                "sessions": len(self.assistant.sessions),
+                "in_flight": self.metrics.in_flight,
+            }
+
+        if path == "/metrics":
+            self._require_method(method, "GET")
+            return HTTPStatus.OK, self._metrics()
+
+        match = SESSION_PATH.match(path)
+        if match:
+            self._require_method(method, "POST")
+            return await self._post_message(match.group(1), body)
+
+        raise HTTPError(HTTPStatus.NOT_FOUND, f"No route for {path}")
+
+    @staticmethod
+    def _require_method(method: str, expected: str):
+        if method != expected:
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, f"Use {expected}")
+
+    async def _post_message(self, session_id: str, body: bytes) -> Tuple[int, Any]:
+        try:
+            data = json.loads(body or b"{}")
+        except json.JSONDecodeError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Body must be JSON")
+        message = data.get("message") if isinstance(data, dict) else None
+        if not isinstance(message, str) or not message.strip():
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "'message' must be a non-empty string")
+        user_id = str(data.get("user_id") or "anonymous")
+
+        if self.metrics.queued + self.metrics.in_flight >= self.max_pending:
+            self.metrics.rejected += 1
+            raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, "Too many pending requests, retry later")
+
+        # Wait for the session's previous turn before taking a global slot,
+        # so a busy session does not hold slots other sessions could use
+        entry = self._session_locks.setdefault(session_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        self.metrics.queued += 1
+        queued = True
+        try:
+            async with entry[0]:
+                async with self._slots:
+                    self.metrics.queued -= 1
+                    queued = False
+                    self.metrics.in_flight += 1
+                    started = time.perf_counter()
+                    try:
+                        result = await self.assistant.aprocess_message(session_id, message.strip(), user_id=user_id)
+                    finally:
+                        self.metrics.in_flight -= 1
+                    self.metrics.record_turn(time.perf_counter() - started, result.get("success", False))
+        finally:
+            if queued:
+                # Cancelled (client went away) while waiting for the session or a slot
+                self.metrics.queued -= 1
+            entry[1] -= 1
+            if entry[1] == 0:
+                self._session_locks.pop(session_id, None)
+
+        result["session_id"] = session_id
+        if not result.get("success", False):
+            return HTTPStatus.INTERNAL_SERVER_ERROR, result
+        return HTTPStatus.OK, result
+
+    def _metrics(self) -> Dict[str, Any]:
+        metrics = self.metrics.snapshot()
+        metrics["sessions"] = len(self.assistant.sessions)
+        metrics["max_concurrency"] = self.max_concurrency
+        metrics["max_pending"] = self.max_pending
+        metrics["intent_classification"] = self.assistant.intent_stats.snapshot()
+        metrics["checkpointer"] = self.assistant.checkpointer.snapshot()
+        metrics["tool_cache"] = self.assistant.tool_cache.snapshot()
+        if self.assistant.response_cache is not None:
+            metrics["response_cache"] = self.assistant.response_cache.snapshot()
+        metrics["spans"] = self.assistant.tracer.registry.snapshot()
+        return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DocDacity HTTP service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-concurrency", type=int, default=32)
+    parser.add_argument("--max-pending", type=int, default=256)
+    parser.add_argument("--sessions-dir", default="./sessions")
+    parser.add_argument("--corpus", default=os.getenv("DOCDACITY_CORPUS"))
+    parser.add_argument("--db", default=os.getenv("DOCDACITY_DB"))
+    parser.add_argument("--background-memory", action="store_true")
+    parser.add_argument("--max-sessions", type=int, default=1024, help="sessions kept in memory")
+    parser.add_argument("--traces-dir", default="./traces", help="JSONL span traces, 'none' disables the file")
+    parser.add_argument("--stub-llm", action="store_true", help="answer with the offline StubChatModel")
+    parser.add_argument("--stub-latency", type=float, default=0.0, help="seconds each stub LLM call takes")
+    args = parser.parse_args()
+
+    api_key = os.getenv("OPENAI_API_KEY", "")
+    if not args.stub_llm and not api_key:
+        print("Error: OPENAI_API_KEY not found in environment variables (or run with --stub-llm)")
+        return
+
+    assistant = DocumentAssistant(
+        openai_api_key=api_key,
+        session_storage_path=args.sessions_dir,
+        corpus_path=args.corpus,
+        document_db_path=args.db,
+        background_memory=args.background_memory,
+        max_sessions=args.max_sessions,
+        traces_dir=None if args.traces_dir.lower() == "none" else args.traces_dir,
+        llm=StubChatModel(latency_seconds=args.stub_latency) if args.stub_llm else None,
+        # Stub answers are free, caching them would only hide the workflow's own cost
+        enable_response_cache=not args.stub_llm
+    )
+    server = AssistantServer(
+        assistant,
+        host=args.host,
+        port=args.port,
+        max_concurrency=args.max_concurrency,
+        max_pending=args.max_pending
+    )
+
+    async def run():
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+            assistant.tool_logger.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        print("\nShutting down")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+SQLite-backed session store.
+
+Replaces rewriting one JSON file per session after every turn:
+- the sessions table holds one row per session (user, active documents, timestamps),
+  keyed by session_id and indexed by user, so lookups stay fast with many sessions
+- every turn is appended as a delta row holding only that turn's new messages
+- once a session has compact_every delta rows they are folded into a single segment
+  row, so loading a long session reads a few rows instead of one per turn
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import messages_from_dict, messages_to_dict, BaseMessage
+
+from schemas import SessionState
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    document_context TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    last_updated TEXT NOT NULL,
+    turn_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_user ON sessions(user_id, last_updated);
+
+-- A delta row covers one turn (first_turn = last_turn); a segment row covers a compacted range.
+-- payload is a JSON list of turns either way.
+CREATE TABLE IF NOT EXISTS session_turns (
+    session_id TEXT NOT NULL,
+    first_turn INTEGER NOT NULL,
+    last_turn INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (session_id, first_turn)
+) WITHOUT ROWID;
+"""
+
+
+def _encode_turn(turn: Dict[str, Any]) -> Dict[str, Any]:
+    encoded = dict(turn)
+    messages = encoded.get("messages") or []
+    if messages and isinstance(messages[0], BaseMessage):
+        encoded["messages"] = messages_to_dict(messages)
+    return encoded
+
+
+def _decode_turn(turn: Dict[str, Any]) -> Dict[str, Any]:
+    messages = turn.get("messages") or []
+    if messages and isinstance(messages[0], dict) and "type" in messages[0] and "data" in messages[0]:
+        turn["messages"] = messages_from_dict(messages)
+    return turn
+
+
+class SessionStore:
+    """
+    Append-only per-turn session persistence in a local SQLite database.
+
+    Args:
+        db_path: database file
+        compact_every: number of delta rows after which a session's deltas are folded into one segment
+    """
+
+    def __init__(self, db_path: str = "./sessions/sessions.db", compact_every: int = 50):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.db_path = db_path
+        self.compact_every = compact_every
+        # One connection shared across threads, serialized by the lock
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.RLock()
+
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def exists(self, session_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        return row is not None
+
+    def load(self, session_id: str) -> Optional[SessionState]:
+        """Rebuild a session from its row plus its segment and delta rows, in turn order"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            if row is None:
+                return None
+            payloads = self._conn.execute(
+                "SELECT payload FROM session_turns WHERE session_id = ? ORDER BY first_turn",
+                (session_id,)
+            ).fetchall()
+
+        history = []
+        for payload in payloads:
+            history.extend(_decode_turn(turn) for turn in json.loads(payload["payload"]))
+
+        return SessionState(
+            session_id=row["session_id"],
+            user_id=row["user_id"],
+            conversation_history=history,
+            document_context=json.loads(row["document_context"]),
+            created_at=row["created_at"],
+            last_updated=row["last_updated"]
+        )
+
+    def save(self, session: SessionState):
+        """Write a whole session (e.g. one imported from a legacy JSON file) as a single segment"""
+        history = [_encode_turn(turn) for turn in session.conversation_history]
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM session_turns WHERE session_id = ?", (session.session_id,))
+            self._upsert_session(session, len(history))
+            if history:
+                self._conn.execute(
+                    "INSERT INTO session_turns (session_id, first_turn, last_turn, payload) VALUES (?, ?, ?, ?)",
+                    (session.session_id, 0, len(history) - 1, json.dumps(history, default=str))
+                )
+
+    def append_turn(self, session: SessionState, turn: Dict[str, Any]):
+        """
+        Record one turn: a delta row with the turn and an update of the session row.
+        The turn must already be the last entry of session.conversation_history.
+        """
+        turn_index = len(session.conversation_history) - 1
+        payload = json.dumps([_encode_turn(turn)], default=str)
+
+        with self._lock:
+            with self._conn:
+                self._upsert_session(session, turn_index + 1)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO session_turns (session_id, first_turn, last_turn, payload) "
+                    "VALUES (?, ?, ?, ?)",
+                    (session.session_id, turn_index, turn_index, payload)
+                )
+
+            if self.compact_every and (turn_index + 1) % self.compact_every == 0:
+                self.compact(session.session_id)
+
+    def compact(self, session_id: str) -> int:
+        """Fold a session's delta rows into one segment row; returns the number of rows folded"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT first_turn, last_turn, payload FROM session_turns "
+                "WHERE session_id = ? AND first_turn = last_turn ORDER BY first_turn",
+                (session_id,)
+            ).fetchall()
+            if len(rows) < 2:
+                return 0
+
+            turns: List[Any] = []
+            for row in rows:
+                turns.extend(json.loads(row["payload"]))
+
+            with self._conn:
+                self._conn.execute(
+                    "DELETE FROM session_turns WHERE session_id = ? AND first_turn = last_turn "
+                    "AND first_turn BETWEEN ? AND ?",
+                    (session_id, rows[0]["first_turn"], rows[-1]["last_turn"])
+                )
+                self._conn.execute(
+                    "INSERT INTO session_turns (session_id, first_turn, last_turn, payload) VALUES (?, ?, ?, ?)",
+                    (session_id, rows[0]["first_turn"], rows[-1]["last_turn"], json.dumps(turns))
+                )
+            # Fold the WAL back into the database file while we are here
+            self._conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+            return len(rows)
+
+    def list_sessions(self, user_id: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recently updated sessions, optionally for one user"""
+        sql = "SELECT session_id, user_id, created_at, last_updated, turn_count FROM sessions"
+        params: List[Any] = []
+        if user_id is not None:
+            sql += " WHERE user_id = ?"
+            params.append(user_id)
+        sql += " ORDER BY last_updated DESC LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params).fetchall()]
+
+    def _upsert_session(self, session: SessionState, turn_count: int):
+        self._conn.execute(
+            "INSERT INTO sessions (session_id, user_id, document_context, created_at, last_updated, turn_count) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (session_id) DO UPDATE SET "
+            "document_context = excluded.document_context, "
+            "last_updated = excluded.last_updated, "
+            "turn_count = excluded.turn_count",
+            (
+                session.session_id,
+                session.user_id,
+                json.dumps(session.document_context),
+                _isoformat(session.created_at),
+                _isoformat(session.last_updated),
+                turn_count,
+            )
+        )
+
+
+def _isoformat(value: Any) -> str:
+    return value.isoformat() if isinstance(value, datetime) else str(value)
@@ -0,0 +1,435 @@
+"""
+SQLite-backed retriever.
+
+Drop-in replacement for SimulatedRetriever that keeps the corpus in a local SQLite
+database instead of process memory:
+- keyword search runs against an FTS5 table ranked with bm25()
+- amount, doc_type, client and date are indexed columns, so filters are index range scans
+- per-type aggregates are maintained by triggers, so get_statistics does not scan the table
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from itertools import islice
+from typing import List, Dict, Any, Optional, Iterable
+
+from schemas import DocumentChunk
+from indexes import tokenize
+from retrieval import BaseRetriever, Document, IngestionReport, get_sample_documents
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    doc_type TEXT NOT NULL COLLATE NOCASE,
+    metadata TEXT NOT NULL,
+    amount REAL,
+    client TEXT COLLATE NOCASE,
+    date TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_documents_amount ON documents(amount);
+CREATE INDEX IF NOT EXISTS idx_documents_doc_type ON documents(doc_type);
+CREATE INDEX IF NOT EXISTS idx_documents_client ON documents(client);
+CREATE INDEX IF NOT EXISTS idx_documents_date ON documents(date);
+
+-- Holds normalized terms (see indexes.tokenize); rowid matches documents.rowid
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(title, content, keywords);
+
+CREATE TABLE IF NOT EXISTS type_stats (
+    doc_type TEXT PRIMARY KEY,
+    documents INTEGER NOT NULL DEFAULT 0,
+    documents_with_amounts INTEGER NOT NULL DEFAULT 0,
+    total_amount REAL NOT NULL DEFAULT 0
+);
+
+CREATE TRIGGER IF NOT EXISTS documents_after_insert AFTER INSERT ON documents BEGIN
+    INSERT INTO type_stats (doc_type) VALUES (new.doc_type) ON CONFLICT (doc_type) DO NOTHING;
+    UPDATE type_stats SET
+        documents = documents + 1,
+        documents_with_amounts = documents_with_amounts + (new.amount IS NOT NULL),
+        total_amount = total_amount + coalesce(new.amount, 0)
+    WHERE doc_type = new.doc_type;
+END;
+
+CREATE TRIGGER IF NOT EXISTS documents_after_delete AFTER DELETE ON documents BEGIN
+    DELETE FROM documents_fts WHERE rowid = old.rowid;
+    UPDATE type_stats SET
+        documents = documents - 1,
+        documents_with_amounts = documents_with_amounts - (old.amount IS NOT NULL),
+        total_amount = total_amount - coalesce(old.amount, 0)
+    WHERE doc_type = old.doc_type;
+    DELETE FROM type_stats WHERE doc_type = old.doc_type AND documents <= 0;
+END;
+"""
+
+DOCUMENT_COLUMNS = "doc_id, title, content, doc_type, metadata"
+
+# SQL expression for each aggregate() group_by field (dates are stored as ISO strings).
+# Clients group case-sensitively like the in-memory retriever; only the filter ignores case.
+AGGREGATE_GROUP_COLUMNS = {
+    "doc_type": "lower(doc_type)",
+    "client": "client COLLATE BINARY",
+    "date": "date",
+    "month": "substr(date, 1, 7)",
+    "year": "substr(date, 1, 4)",
+}
+
+
+def _terms(text: str) -> str:
+    """Normalize text to the space-separated terms stored in the FTS table"""
+    return " ".join(tokenize(text))
+
+
+def _sql_limit(limit: Optional[int]) -> int:
+    """Value for a LIMIT ? placeholder; SQLite reads a negative limit as no limit"""
+    return -1 if limit is None else max(0, limit)
+
+
+class SQLiteRetriever(BaseRetriever):
+    """
+    Document retriever persisted in a local SQLite database.
+    Exposes the same retrieve_by_*, get_document_by_id and get_statistics methods as
+    SimulatedRetriever, so the tools work with either backend.
+    """
+
+    def __init__(self, db_path: str = "./data/documents.db", load_samples: bool = True):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.db_path = db_path
+        # One connection shared across threads, serialized by the lock
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.RLock()
+        # Bumped on every write through this instance, so caches built on top can tell they are stale
+        self.corpus_version = 0
+
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+
+        if load_samples and self._count() == 0:
+            self.add_documents(get_sample_documents())
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _query(self, sql: str, params: Iterable[Any] = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, tuple(params)).fetchall()
+
+    def _count(self) -> int:
+        return self._query("SELECT coalesce(sum(documents), 0) FROM type_stats")[0][0]
+
+    def _to_chunk(self, row: sqlite3.Row, relevance_score: float = 1.0) -> DocumentChunk:
+        """Build the DocumentChunk returned for a documents row"""
+        return DocumentChunk(
+            doc_id=row["doc_id"],
+            content=row["content"],
+            metadata={
+                "title": row["title"],
+                "doc_type": row["doc_type"],
+                **json.loads(row["metadata"])
+            },
+            relevance_score=relevance_score
+        )
+
+    def _to_document(self, row: sqlite3.Row) -> Document:
+        return Document(
+            doc_id=row["doc_id"],
+            title=row["title"],
+            content=row["content"],
+            doc_type=row["doc_type"],
+            metadata=json.loads(row["metadata"])
+        )
+
+    def iter_documents(self) -> Iterable[Document]:
+        """Stream every document in rowid order, one page at a time"""
+        last_rowid = 0
+        while True:
+            rows = self._query(
+                f"SELECT rowid, {DOCUMENT_COLUMNS} FROM documents WHERE rowid > ? ORDER BY rowid LIMIT 500",
+                (last_rowid,)
+            )
+            if not rows:
+                return
+            for row in rows:
+                yield self._to_document(row)
+            last_rowid = rows[-1]["rowid"]
+
+    def add_document(self, document: Document):
+        """Add (or replace) a document"""
+        with self._lock, self._conn:
+            self._write(document)
+            self.corpus_version += 1
+
+    def add_documents(self, documents: Iterable[Document], batch_size: int = 5000) -> IngestionReport:
+        """
+        Add documents from any iterable, committing one transaction per batch.
+        Only the current batch is held in memory.
+        """
+        report = IngestionReport()
+        started = time.perf_counter()
+        iterator = iter(documents)
+
+        while True:
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                break
+            with self._lock, self._conn:
+                for doc in batch:
+                    self._write(doc)
+                self.corpus_version += 1
+            report.documents += len(batch)
+            report.batches += 1
+
+        report.elapsed_seconds = time.perf_counter() - started
+        return report
+
+    @staticmethod
+    def _metadata_text(doc: Document, key: str) -> Optional[str]:
+        """Metadata value as the text BaseRetriever compares and groups on"""
+        value = doc.metadata.get(key)
+        return None if value is None else str(value)
+
+    def _write(self, doc: Document):
+        """Upsert one document and its FTS row. Must run inside a transaction."""
+        # Deleting first lets the triggers retract the old FTS row and statistics
+        self._conn.execute("DELETE FROM documents WHERE doc_id = ?", (doc.doc_id,))
+        cursor = self._conn.execute(
+            "INSERT INTO documents (doc_id, title, content, doc_type, metadata, amount, client, date) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                doc.doc_id,
+                doc.title,
+                doc.content,
+                doc.doc_type,
+                json.dumps(doc.metadata, default=str),
+                self._get_document_amount(doc),
+                self._metadata_text(doc, "client"),
+                self._metadata_text(doc, "date"),
+            )
+        )
+        self._conn.execute(
+            "INSERT INTO documents_fts (rowid, title, content, keywords) VALUES (?, ?, ?, ?)",
+            (
+                cursor.lastrowid,
+                _terms(doc.title),
+                _terms(doc.content),
+                _terms(" ".join(str(value) for value in doc.metadata.values())),
+            )
+        )
+
+    def remove_document(self, doc_id: str) -> bool:
+        """Remove a document. Returns False if it was not present."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
+            self.corpus_version += 1
+        return cursor.rowcount > 0
+
+    def retrieve_all(self, limit: Optional[int] = None) -> List[DocumentChunk]:
+        """Retrieve all documents as DocumentChunks"""
+        rows = self._query(f"SELECT {DOCUMENT_COLUMNS} FROM documents LIMIT ?", (_sql_limit(limit),))
+        return [self._to_chunk(row) for row in rows]
+
+    def retrieve_by_keyword(self, query: str, top_k: int = 3) -> List[DocumentChunk]:
+        """
+        Keyword retrieval through FTS5, ranked by bm25 with the same field weights
+        as the in-memory index (title 2.0, content 0.5, metadata 1.0)
+        """
+        terms = sorted(set(tokenize(query)))
+        if not terms or top_k <= 0:
+            return []
+
+        rows = self._query(
+            "SELECT d.doc_id, d.title, d.content, d.doc_type, d.metadata, "
+            "-bm25(documents_fts, 2.0, 0.5, 1.0) AS score "
+            "FROM documents_fts JOIN documents d ON d.rowid = documents_fts.rowid "
+            "WHERE documents_fts MATCH ? ORDER BY score DESC LIMIT ?",
+            (" OR ".join(f'"{term}"' for term in terms), top_k)
+        )
+        return [self._to_chunk(row, row["score"]) for row in rows]
+
+    def retrieve_by_type(self, doc_type: str, limit: Optional[int] = None) -> List[DocumentChunk]:
+        """Retrieve all documents of a specific type"""
+        rows = self._query(
+            f"SELECT {DOCUMENT_COLUMNS} FROM documents WHERE doc_type = ? LIMIT ?", (doc_type, _sql_limit(limit))
+        )
+        return [self._to_chunk(row) for row in rows]
+
+    def retrieve_by_amount_range(
+            self,
+            min_amount: Optional[float] = None,
+            max_amount: Optional[float] = None,
+            limit: Optional[int] = None
+    ) -> List[DocumentChunk]:
+        """
+        Retrieve documents within an amount range (either bound optional),
+        largest amount first. Served by the amount index.
+        """
+        conditions = ["amount IS NOT NULL"]
+        params = []
+        if min_amount is not None:
+            conditions.append("amount >= ?")
+            params.append(min_amount)
+        if max_amount is not None:
+            conditions.append("amount <= ?")
+            params.append(max_amount)
+
+        rows = self._query(
+            f"SELECT {DOCUMENT_COLUMNS} FROM documents WHERE {' AND '.join(conditions)} "
+            "ORDER BY amount DESC LIMIT ?",
+            params + [_sql_limit(limit)]
+        )
+        return [self._to_chunk(row) for row in rows]
+
+    def retrieve_by_exact_amount(
+            self,
+            amount: float,
+            tolerance: float = 0.01,
+            limit: Optional[int] = None
+    ) -> List[DocumentChunk]:
+        """
+        Retrieve documents with an exact amount (with small tolerance for float comparison).
+        """
+        rows = self._query(
+            f"SELECT {DOCUMENT_COLUMNS} FROM documents WHERE amount BETWEEN ? AND ? ORDER BY amount LIMIT ?",
+            (amount - tolerance, amount + tolerance, _sql_limit(limit))
+        )
+        return [self._to_chunk(row) for row in rows]
+
+    def retrieve_by_approximate_amount(
+            self,
+            amount: float,
+            percentage: float = 10.0,
+            limit: Optional[int] = None
+    ) -> List[DocumentChunk]:
+        """
+        Retrieve documents with amounts approximately equal to the target, closest first.
+        Default tolerance is ±10%.
+        """
+        tolerance = abs(amount * (percentage / 100))
+        rows = self._query(
+            f"SELECT {DOCUMENT_COLUMNS}, abs(amount - ?) AS distance FROM documents "
+            "WHERE amount BETWEEN ? AND ? ORDER BY distance LIMIT ?",
+            (amount, amount - tolerance, amount + tolerance, _sql_limit(limit))
+        )
+        return [
+            self._to_chunk(row, 1.0 - row["distance"] / tolerance if tolerance else 1.0)
+            for row in rows
+        ]
+
+    def retrieve_by_date_range(
+            self,
+            start_date: Optional[str] = None,
+            end_date: Optional[str] = None
+    ) -> List[DocumentChunk]:
+        """Retrieve documents dated between two ISO dates (inclusive), oldest first"""
+        conditions = ["date IS NOT NULL"]
+        params = []
+        if start_date:
+            conditions.append("date >= ?")
+            params.append(start_date)
+        if end_date:
+            conditions.append("date <= ?")
+            params.append(end_date)
+
+        rows = self._query(
+            f"SELECT {DOCUMENT_COLUMNS} FROM documents WHERE {' AND '.join(conditions)} ORDER BY date",
+            params
+        )
+        return [self._to_chunk(row) for row in rows]
+
+    def get_document_by_id(self, doc_id: str) -> Optional[DocumentChunk]:
+        """Retrieve a specific document by ID"""
+        rows = self._query(f"SELECT {DOCUMENT_COLUMNS} FROM documents WHERE doc_id = ?", (doc_id,))
+        return self._to_chunk(rows[0]) if rows else None
+
+    def get_documents_by_ids(self, doc_ids: List[str]) -> Dict[str, DocumentChunk]:
+        """Retrieve several documents with one query per 500 IDs; missing IDs are left out"""
+        documents = {}
+        for start in range(0, len(doc_ids), 500):
+            batch = doc_ids[start:start + 500]
+            rows = self._query(
+                f"SELECT {DOCUMENT_COLUMNS} FROM documents WHERE doc_id IN ({', '.join('?' * len(batch))})",
+                batch
+            )
+            documents.update((row["doc_id"], self._to_chunk(row)) for row in rows)
+        return documents
+
+    def aggregate(
+            self,
+            metrics: Optional[List[str]] = None,
+            group_by: Optional[str] = None,
+            doc_type: Optional[str] = None,
+            client: Optional[str] = None,
+            min_amount: Optional[float] = None,
+            max_amount: Optional[float] = None,
+            start_date: Optional[str] = None,
+            end_date: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        See BaseRetriever.aggregate. Runs as one GROUP BY query; the filters map onto the
+        indexed amount, doc_type, client and date columns.
+        """
+        metrics = self._check_aggregate_args(metrics, group_by)
+
+        conditions, params = [], []
+        for column, operator, value in (
+                ("doc_type", "=", doc_type),
+                ("client", "=", client),
+                ("amount", ">=", min_amount),
+                ("amount", "<=", max_amount),
+                ("date", ">=", start_date),
+                ("date", "<=", end_date),
+        ):
+            if value is not None:
+                conditions.append(f"{column} {operator} ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        group_column = AGGREGATE_GROUP_COLUMNS.get(group_by, "NULL")
+        rows = self._query(
+            f"SELECT {group_column} AS grp, count(*), count(amount), sum(amount), min(amount), max(amount) "
+            f"FROM documents {where} GROUP BY grp",
+            params
+        )
+        if not rows and not group_by:
+            rows = [(None, 0, 0, None, None, None)]
+
+        return [
+            self._aggregate_row(metrics, group_by, row[0], row[1], row[2], row[3], row[4], row[5])
+            for row in sorted(rows, key=lambda row: (row[0] is None, str(row[0])))
+        ]
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get statistics about the document collection.
+        Totals come from the trigger-maintained type_stats table and min/max from the
+        amount index, so no full table scan is needed.
+        """
+        type_rows = self._query("SELECT doc_type, documents, documents_with_amounts, total_amount FROM type_stats")
+        total_docs = sum(row["documents"] for row in type_rows)
+        docs_with_amounts = sum(row["documents_with_amounts"] for row in type_rows)
+        total_amount = sum(row["total_amount"] for row in type_rows) if docs_with_amounts else 0.0
+
+        stats = {
+            "total_documents": total_docs,
+            "documents_with_amounts": docs_with_amounts,
+            "total_amount": total_amount,
+            "average_amount": total_amount / docs_with_amounts if docs_with_amounts > 0 else 0,
+            "document_types": {row["doc_type"]: row["documents"] for row in type_rows}
+        }
+
+        if docs_with_amounts:
+            stats["min_amount"] = self._query("SELECT min(amount) FROM documents")[0][0]
+            stats["max_amount"] = self._query("SELECT max(amount) FROM documents")[0][0]
+
+        return stats
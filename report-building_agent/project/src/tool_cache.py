@@ -0,0 +1,164 @@
+"""
+Result cache for the retrieval tools.
+
+The model often repeats the same document_search or document_reader call, within one
+ReAct loop and across sessions, and each repeat used to re-run the retriever and
+re-format the output. ToolResultCache memoizes results per tool under a key built from
+the normalized arguments (whitespace and letter case in queries, None vs. missing,
+50000 vs. 50000.0). Entries are evicted least recently used first, and the whole cache
+is dropped when the retriever's corpus_version changes, i.e. after add_document.
+
+Negative results ("document not found") are not cached: callers pass a cacheable
+predicate, so every entry in the cache is a positive result and consumers never need to
+check a tag.
+"""
+
+import json
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_args(args: Dict[str, Any], case_insensitive: Tuple[str, ...] = ()) -> str:
+    """Canonical JSON for tool arguments; fields in case_insensitive are lower-cased"""
+    normalized = {}
+    for name, value in sorted(args.items()):
+        if value is None:
+            continue
+        if isinstance(value, str):
+            value = WHITESPACE.sub(" ", value).strip()
+            if name in case_insensitive:
+                value = value.lower()
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = float(value)
+        normalized[name] = value
+    return json.dumps(normalized, sort_keys=True, default=str)
+
+
+class ToolResultCache:
+    """
+    LRU cache of tool results, invalidated by a corpus version.
+
+    Args:
+        max_entries: entries kept across all tools, 0 disables caching
+        version_fn: returns the corpus version; a change drops every entry
+    """
+
+    def __init__(self, max_entries: int = 1024, version_fn: Optional[Callable[[], Any]] = None):
+        self.max_entries = max_entries
+        self.version_fn = version_fn
+
+        self._entries: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = version_fn() if version_fn else None
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def _check_version(self) -> Any:
+        """Drop everything if the corpus changed since the entries were written"""
+        if self.version_fn is None:
+            return None
+        version = self.version_fn()
+        if version != self._version:
+            if self._entries:
+                self.stats["invalidations"] += 1
+            self._entries.clear()
+            self._version = version
+        return version
+
+    def get_or_compute(
+            self,
+            tool_name: str,
+            key: str,
+            compute: Callable[[], Any],
+            cacheable: Optional[Callable[[Any], bool]] = None
+    ) -> Tuple[Any, bool]:
+        """
+        Return (result, cached). On a miss compute() runs outside the lock; its result is
+        stored only if the corpus did not change meanwhile and cacheable(result) is true
+        (use it to skip negative results). Exceptions are not cached.
+        """
+        if self.max_entries <= 0:
+            return compute(), False
+
+        cache_key = (tool_name, key)
+        with self._lock:
+            version = self._check_version()
+            if cache_key in self._entries:
+                self._entries.move_to_end(cache_key)
+                self.stats["hits"] += 1
+                return self._entries[cache_key], True
+            self.stats["misses"] += 1
+
+        result = compute()
+
+        if cacheable is not None and not cacheable(result):
+            return result, False
+        with self._lock:
+            if self._check_version() == version:
+                self._entries[cache_key] = result
+                self._entries.move_to_end(cache_key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.stats["evictions"] += 1
+        return result, False
+
+    def get_or_compute_many(
+            self,
+            tool_name: str,
+            keys: List[str],
+            compute: Callable[[List[str]], Dict[str, Any]]
+    ) -> Tuple[Dict[str, Any], int]:
+        """
+        Batch variant of get_or_compute: compute(missing_keys) returns results for the keys
+        that were not cached, in one call; keys it leaves out (e.g. IDs that were not found)
+        are not cached. Returns (results by key, number of cache hits).
+        """
+        if self.max_entries <= 0:
+            return compute(list(keys)), 0
+
+        results: Dict[str, Any] = {}
+        with self._lock:
+            version = self._check_version()
+            for key in keys:
+                cache_key = (tool_name, key)
+                if cache_key in self._entries:
+                    self._entries.move_to_end(cache_key)
+                    results[key] = self._entries[cache_key]
+            hits = len(results)
+            self.stats["hits"] += hits
+            self.stats["misses"] += len(keys) - hits
+
+        missing = [key for key in keys if key not in results]
+        if not missing:
+            return results, hits
+        computed = compute(missing)
+
+        with self._lock:
+            if self._check_version() == version:
+                for key, result in computed.items():
+                    self._entries[(tool_name, key)] = result
+                    self._entries.move_to_end((tool_name, key))
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.stats["evictions"] += 1
+        results.update(computed)
+        return results, hits
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def hit_rate(self) -> float:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+    def log_fields(self, cached: bool) -> Dict[str, Any]:
+        """Cache details added to a tool log entry"""
+        return {"cache": "hit" if cached else "miss", "cache_hit_rate": round(self.hit_rate(), 4)}
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, "entries": len(self._entries), "hit_rate": self.hit_rate()}
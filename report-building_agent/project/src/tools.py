@@ -6,16 +6,34 @@ Think of these as the agent's Swiss Army knife 🔧 - each tool has a specific p
 from typing import Dict, Any, List, Optional, Literal
 from langchain.tools import tool
 from pydantic import BaseModel, Field
-import re
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from log_writer import JsonlLogWriter
+from calculator import CalculatorError, evaluate, evaluate_batch, format_decimal
+from tool_cache import ToolResultCache, normalize_args
+from search_format import DEFAULT_SEARCH_TOKEN_BUDGET, format_search_results, max_results, wants_amount
+from context import TokenCounter
+
+# Concurrent fetches for a batch read when the retriever has no batched lookup
+MAX_READER_WORKERS = 8
+
 
 class ToolLogger:
-    """Logs tool usage with automatic persistence"""
+    """
+    Logs tool usage with automatic persistence.
+    Entries are appended to a JSONL file by a background JsonlLogWriter, so logging
+    cost stays constant per call instead of rewriting the whole log each time.
+    """
 
-    def __init__(self, logs_dir: str = "./logs", session_id: str = None):
-        self.logs = []
+    def __init__(
+            self,
+            logs_dir: str = "./logs",
+            session_id: str = None,
+            max_bytes: int = 10 * 1024 * 1024,
+            backup_count: int = 5
+    ):
         self.logs_dir = logs_dir
         self.session_id = session_id
 
@@ -25,10 +43,12 @@ class ToolLogger:
 
         # Create session-specific log file if session_id provided
         if session_id:
-            self.log_file = os.path.join(logs_dir, f"session_{session_id}.json")
+            self.log_file = os.path.join(logs_dir, f"session_{session_id}.jsonl")
         else:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            self.log_file = os.path.join(logs_dir, f"tool_usage_{timestamp}.json")
+            self.log_file = os.path.join(logs_dir, f"tool_usage_{timestamp}.jsonl")
+
+        self._writer = JsonlLogWriter(self.log_file, max_bytes=max_bytes, backup_count=backup_count)
 
     def log_tool_use(self, tool_name: str, input_data: Dict[str, Any], output: Any):
         log_entry = {
@@ -37,26 +57,25 @@ class ToolLogger:
             "input": input_data,
             "output": str(output),
         }
-        self.logs.append(log_entry)
 
-        # Automatically save to persistent file
-        self._auto_save()
+        # Queued for the background writer; the file is appended to, never rewritten
+        self._writer.write(log_entry)
         return log_entry
 
-    def _auto_save(self):
-        """Automatically save logs to persistent file"""
-        try:
-            with open(self.log_file, 'w') as f:
-                json.dump(self.logs, f, indent=2)
-        except Exception as e:
-            print(f"Warning: Failed to auto-save logs: {e}")
-
     def get_logs(self) -> List[Dict[str, Any]]:
-        return self.logs
+        """Read back every retained entry (including rotated files), oldest first"""
+        return list(self._writer.read())
 
     def save_logs(self, filepath: str):
         with open(filepath, 'w') as f:
-            json.dump(self.logs, f, indent=2)
+            json.dump(self.get_logs(), f, indent=2)
+
+    def flush(self):
+        """Block until queued entries are on disk"""
+        self._writer.flush()
+
+    def close(self):
+        self._writer.close()
 
 
 # TODO: Implement the calculator tool using the @tool decorator.
@@ -67,46 +86,62 @@ def create_calculator_tool(logger: ToolLogger):
     Creates a calculator tool.
     """
     @tool
-    def calculator(expression: str) -> str:
-        """
-        Safely evaluate a basic mathematical expression using +, -, *, /, parentheses, and decimals.
-        All calculations must go through this tool.
+    def calculator(expression: Optional[str] = None, expressions: Optional[Dict[str, str]] = None) -> str:
         """
-        try:
-            sanitized = expression.strip()
-            if not sanitized:
-                error_msg = "No expression provided."
-                logger.log_tool_use("calculator", {"expression": expression}, {"error": error_msg})
-                return error_msg
-
-            # Allow only numbers, whitespace, parentheses, and basic operators
-            if not re.fullmatch(r"[\d\s\.\+\-\*/\(\)]+", sanitized):
-                error_msg = "Invalid expression. Use numbers and basic operators (+, -, *, /, parentheses)."
-                logger.log_tool_use("calculator", {"expression": expression}, {"error": error_msg})
-                return error_msg
+        Safely evaluate math with exact decimal arithmetic: numbers, +, -, *, /, //, %, **, parentheses,
+        percentages (15%) and abs, round, min, max, sum. All calculations must go through this tool.
 
-            try:
-                result = eval(sanitized, {"__builtins__": {}}, {})
-            except Exception as e:
-                error_msg = f"Calculation error: {e}"
-                logger.log_tool_use("calculator", {"expression": expression}, {"error": error_msg})
-                return error_msg
+        Args:
+            expression: A single expression, e.g. "(22000 + 15000) * 1.1"
+            expressions: Several named expressions evaluated in one call; later ones may use earlier
+                names, e.g. {"subtotal": "22000 + 15000 + 8500", "tax": "subtotal * 10%", "total": "subtotal + tax"}
 
-            logger.log_tool_use("calculator", {"expression": expression}, {"result": result})
-            return str(result)
+        Returns:
+            The result, or one "name = result" line per named expression
+        """
+        input_data = {"expression": expression} if expressions is None else {"expressions": expressions}
+        try:
+            if expressions:
+                results = evaluate_batch(expressions)
+                output = "\n".join(f"{name} = {format_decimal(value)}" for name, value in results.items())
+                logger.log_tool_use("calculator", input_data, {"results": {k: str(v) for k, v in results.items()}})
+                return output
+
+            result = evaluate(expression or "")
+            logger.log_tool_use("calculator", input_data, {"result": str(result)})
+            return format_decimal(result)
+
+        except CalculatorError as e:
+            error_msg = f"Calculation error: {e}"
+            logger.log_tool_use("calculator", input_data, {"error": error_msg})
+            return error_msg
 
         except Exception as e:
             error_msg = f"Unexpected calculator error: {e}"
-            logger.log_tool_use("calculator", {"expression": expression}, {"error": error_msg})
+            logger.log_tool_use("calculator", input_data, {"error": error_msg})
             return error_msg
 
     return calculator
 
 
-def create_document_search_tool(retriever, logger: ToolLogger):
+def _corpus_cache(retriever) -> ToolResultCache:
+    """A result cache dropped whenever the retriever's corpus changes"""
+    return ToolResultCache(version_fn=lambda: retriever.corpus_version)
+
+
+def create_document_search_tool(
+        retriever,
+        logger: ToolLogger,
+        cache: Optional[ToolResultCache] = None,
+        token_budget: int = DEFAULT_SEARCH_TOKEN_BUDGET,
+        counter: Optional[TokenCounter] = None
+):
     """
     Creates a document search tool.
+    Results are memoized in cache (one per retriever unless shared by the caller), and
+    the output is kept within token_budget tokens (counted with counter when given).
     """
+    cache = cache or _corpus_cache(retriever)
 
     @tool
     def document_search(
@@ -137,32 +172,39 @@ def create_document_search_tool(retriever, logger: ToolLogger):
             - "Contracts around $100,000" → comparison='approximate', amount=100000
 
         Returns:
-            Formatted search results with document details
+            Matching documents: a short block each for a few hits, a table for more; hits beyond
+            the output budget are counted rather than listed
         """
-        try:
+        def search():
             results = []
+            # No more hits than the output budget can show are fetched; the extra one tells
+            # the formatter that further documents match
+            limit = max_results(token_budget) + 1
 
             # Handle different search types
             if search_type == "all":
-                results = retriever.retrieve_all()
+                results = retriever.retrieve_all(limit=limit)
 
             if search_type == "keyword":
-                results = retriever.retrieve_by_keyword(query)
+                results = retriever.retrieve_passages(query)
 
             elif search_type == "type" and doc_type:
-                results = retriever.retrieve_by_type(doc_type)
                 # If amount criteria also specified, filter further
                 if comparison or min_amount is not None or max_amount is not None:
+                    # Both sides of the intersection are fetched in full, so no match is cut off
+                    results = retriever.retrieve_by_type(doc_type)
                     amount_results = _handle_amount_search(
                         retriever, comparison, amount, min_amount, max_amount, query
                     )
                     # Intersect results
                     result_ids = {r.doc_id for r in amount_results}
                     results = [r for r in results if r.doc_id in result_ids]
+                else:
+                    results = retriever.retrieve_by_type(doc_type, limit=limit)
 
             elif search_type == "amount" or search_type == "amount_range":
                 results = _handle_amount_search(
-                    retriever, comparison, amount, min_amount, max_amount, query
+                    retriever, comparison, amount, min_amount, max_amount, query, limit
                 )
 
             else:
@@ -172,40 +214,43 @@ def create_document_search_tool(retriever, logger: ToolLogger):
                 # Check if it's an amount query
                 if any(word in query_lower for word in
                        ['over', 'under', 'above', 'below', 'between', 'around', 'exactly', '$']):
-                    results = retriever._parse_and_retrieve_by_amount(query)
+                    results = retriever._parse_and_retrieve_by_amount(query, limit=limit)
                 # Check if it's a type query
                 elif any(word in query_lower for word in ['invoice', 'contract', 'claim']):
-                    for doc_type in ['invoice', 'contract', 'claim']:
-                        if doc_type in query_lower:
-                            results = retriever.retrieve_by_type(doc_type)
+                    for type_name in ['invoice', 'contract', 'claim']:
+                        if type_name in query_lower:
+                            results = retriever.retrieve_by_type(type_name, limit=limit)
                             break
                 else:
                     # Default to keyword search
-                    results = retriever.retrieve_by_keyword(query)
-
-            # Format results with amount information
-            if not results:
-                formatted = "No documents found matching your search criteria."
-            else:
-                formatted = f"Found {len(results)} document(s):\n\n"
-                for i, chunk in enumerate(results, 1):
-                    formatted += f"Document {i} (ID: {chunk.doc_id}):\n"
-                    formatted += f"Title: {chunk.metadata.get('title', 'Unknown')}\n"
-                    formatted += f"Type: {chunk.metadata.get('doc_type', 'Unknown')}\n"
-
-                    # Include amount information if available
-                    amount_value = None
-                    for field in ['total', 'amount', 'value']:
-                        if field in chunk.metadata:
-                            amount_value = chunk.metadata[field]
-                            formatted += f"Amount: ${amount_value:,.2f}\n"
-                            break
-
-                    if hasattr(chunk, 'relevance_score'):
-                        formatted += f"Relevance Score: {chunk.relevance_score:.2f}\n"
+                    results = retriever.retrieve_passages(query)
+
+            more = len(results) >= limit
+            results = results[:limit - 1]
+            amount_filter = any(value is not None for value in (comparison, min_amount, max_amount, amount))
+            formatted = format_search_results(
+                results,
+                token_budget=token_budget,
+                count_tokens=counter.count_text if counter else None,
+                show_amount=wants_amount(query, search_type, amount_filter),
+                more=more
+            )
+            return formatted, len(results)
 
-                    formatted += f"Preview: {chunk.content[:200]}...\n"
-                    formatted += "-" * 50 + "\n"
+        try:
+            key = normalize_args(
+                {
+                    "query": query,
+                    "search_type": search_type,
+                    "doc_type": doc_type,
+                    "min_amount": min_amount,
+                    "max_amount": max_amount,
+                    "comparison": comparison,
+                    "amount": amount
+                },
+                case_insensitive=("query",)
+            )
+            (formatted, results_count), cached = cache.get_or_compute("document_search", key, search)
 
             # Log the tool use
             logger.log_tool_use(
@@ -219,7 +264,7 @@ def create_document_search_tool(retriever, logger: ToolLogger):
                     "comparison": comparison,
                     "amount": amount
                 },
-                {"results_count": len(results)}
+                {"results_count": results_count, **cache.log_fields(cached)}
             )
 
             return formatted
@@ -233,26 +278,26 @@ def create_document_search_tool(retriever, logger: ToolLogger):
             )
             return error_msg
 
-    def _handle_amount_search(retriever, comparison, amount, min_amount, max_amount, query):
+    def _handle_amount_search(retriever, comparison, amount, min_amount, max_amount, query, limit=None):
         """Helper function to handle amount-based searches"""
         if comparison:
             if comparison == "over" and amount is not None:
-                return retriever.retrieve_by_amount_range(min_amount=amount)
+                return retriever.retrieve_by_amount_range(min_amount=amount, limit=limit)
             elif comparison == "under" and amount is not None:
-                return retriever.retrieve_by_amount_range(max_amount=amount)
+                return retriever.retrieve_by_amount_range(max_amount=amount, limit=limit)
             elif comparison == "exact" and amount is not None:
-                return retriever.retrieve_by_exact_amount(amount)
+                return retriever.retrieve_by_exact_amount(amount, limit=limit)
             elif comparison == "approximate" and amount is not None:
-                return retriever.retrieve_by_approximate_amount(amount)
+                return retriever.retrieve_by_approximate_amount(amount, limit=limit)
             elif comparison == "between" and min_amount is not None and max_amount is not None:
-                return retriever.retrieve_by_amount_range(min_amount=min_amount, max_amount=max_amount)
+                return retriever.retrieve_by_amount_range(min_amount=min_amount, max_amount=max_amount, limit=limit)
 
         # Handle direct min/max specifications
         if min_amount is not None or max_amount is not None:
-            return retriever.retrieve_by_amount_range(min_amount=min_amount, max_amount=max_amount)
+            return retriever.retrieve_by_amount_range(min_amount=min_amount, max_amount=max_amount, limit=limit)
 
         # Try parsing from query
-        return retriever._parse_and_retrieve_by_amount(query)
+        return retriever._parse_and_retrieve_by_amount(query, limit=limit)
 
     # Store helper function as attribute
     document_search._handle_amount_search = _handle_amount_search
@@ -260,46 +305,138 @@ def create_document_search_tool(retriever, logger: ToolLogger):
     return document_search
 
 
-def create_document_reader_tool(retriever, logger: ToolLogger):
+def _format_document(doc_id: str, doc) -> str:
+    """Reader output for one document: ID, amount when there is one, then the content"""
+    # Include amount information in the output
+    amount_info = ""
+    for field in ['total', 'amount', 'value']:
+        if field in doc.metadata:
+            amount_info = f"\nAmount: ${doc.metadata[field]:,.2f}"
+            break
+    return f"Document {doc_id}:{amount_info}\n\n{doc.content}"
+
+
+def _fetch_documents(retriever, doc_ids: List[str]) -> Dict[str, Any]:
     """
-    Creates a tool to read full document content.
+    Fetch several documents at once: one batched lookup when the retriever supports it,
+    otherwise concurrent get_document_by_id calls. Missing IDs are left out.
     """
+    if hasattr(retriever, "get_documents_by_ids"):
+        return retriever.get_documents_by_ids(doc_ids)
+    with ThreadPoolExecutor(max_workers=min(len(doc_ids), MAX_READER_WORKERS)) as executor:
+        docs = executor.map(retriever.get_document_by_id, doc_ids)
+        return {doc_id: doc for doc_id, doc in zip(doc_ids, docs) if doc is not None}
+
+
+def create_document_reader_tool(retriever, logger: ToolLogger, cache: Optional[ToolResultCache] = None):
+    """
+    Creates a tool to read full document content, one document or a batch in one call,
+    or just a passage and its neighbours.
+    Results are memoized per document in cache (one per retriever unless shared by the caller).
+    """
+    cache = cache or _corpus_cache(retriever)
+
+    def read_many(doc_ids: List[str]) -> str:
+        # Duplicates are read once; order follows the request
+        doc_ids = list(dict.fromkeys(doc_id.strip() for doc_id in doc_ids if doc_id and doc_id.strip()))
+        keys = {normalize_args({"doc_id": doc_id}): doc_id for doc_id in doc_ids}
+
+        def read_missing(missing_keys: List[str]) -> Dict[str, Any]:
+            missing_ids = [keys[key] for key in missing_keys]
+            docs = _fetch_documents(retriever, missing_ids)
+            return {
+                key: (
+                    _format_document(doc_id, docs[doc_id]),
+                    {"found": True, "doc_type": docs[doc_id].metadata.get('doc_type')}
+                )
+                for key, doc_id in zip(missing_keys, missing_ids) if doc_id in docs
+            }
+
+        results, hits = cache.get_or_compute_many("document_reader", list(keys), read_missing)
+        # Entries are shared with single reads; only those flagged found hold a document
+        found_keys = [key for key in keys if key in results and results[key][1]["found"]]
+        found = [results[key][0] for key in found_keys]
+        missing = [doc_id for key, doc_id in keys.items() if key not in found_keys]
+
+        formatted = f"Read {len(found)} of {len(doc_ids)} document(s)"
+        formatted += f"; not found: {', '.join(missing)}\n\n" if missing else "\n\n"
+        formatted += "\n\n---\n\n".join(found)
+
+        logger.log_tool_use(
+            "document_reader",
+            {"doc_ids": doc_ids},
+            {"found": len(found), "missing": missing, "cache_hits": hits,
+             "cache_hit_rate": round(cache.hit_rate(), 4)}
+        )
+        return formatted
 
     @tool
-    def document_reader(doc_id: str) -> str:
+    def document_reader(
+            doc_id: Optional[str] = None,
+            doc_ids: Optional[List[str]] = None,
+            passage: Optional[int] = None,
+            window: int = 1
+    ) -> str:
         """
-        Read the full content of a specific document by its ID.
+        Read the full content of documents by ID. To read several documents, pass them all in doc_ids
+        in one call instead of calling this tool once per document. To read only part of a long
+        document, pass the passage number from a search result.
 
         Args:
             doc_id: The exact document ID to read (e.g., 'INV-001', 'CON-001')
+            doc_ids: Several document IDs read in one call (e.g., ['INV-001', 'INV-002', 'INV-003'])
+            passage: Read only this passage of doc_id and its neighbours instead of the whole document
+            window: Neighbouring passages included on each side of passage (default 1)
 
         Returns:
-            The full content of the document or an error message if not found
+            The full content of each document (or the requested passages), or an error message
+            for IDs that were not found
         """
-        try:
+        if doc_ids:
+            try:
+                return read_many(doc_ids + ([doc_id] if doc_id else []))
+            except Exception as e:
+                error_msg = f"Error reading documents: {str(e)}"
+                logger.log_tool_use("document_reader", {"doc_ids": doc_ids}, {"error": error_msg})
+                return error_msg
+
+        def read():
+            if passage is not None:
+                return read_passages()
             doc = retriever.get_document_by_id(doc_id)
-            if doc:
-                # Include amount information in the output
-                amount_info = ""
-                for field in ['total', 'amount', 'value']:
-                    if field in doc.metadata:
-                        amount_info = f"\nAmount: ${doc.metadata[field]:,.2f}"
-                        break
-
-                result = f"Document {doc_id}:{amount_info}\n\n{doc.content}"
-                logger.log_tool_use(
-                    "document_reader",
-                    {"doc_id": doc_id},
-                    {"found": True, "doc_type": doc.metadata.get('doc_type')}
-                )
-                return result
-            else:
-                logger.log_tool_use(
-                    "document_reader",
-                    {"doc_id": doc_id},
-                    {"found": False}
-                )
-                return f"Document with ID {doc_id} not found."
+            if not doc:
+                return f"Document with ID {doc_id} not found.", {"found": False}
+            return _format_document(doc_id, doc), {"found": True, "doc_type": doc.metadata.get('doc_type')}
+
+        def read_passages():
+            chunks = retriever.get_passages(doc_id, passage, max(window, 0))
+            if not chunks:
+                return f"Passage {passage} of document {doc_id} not found.", {"found": False}
+            first, last = chunks[0].metadata, chunks[-1].metadata
+            formatted = (
+                f"Document {doc_id} passages {first['passage']}-{last['passage']} "
+                f"(of 0-{first['passages'] - 1}, chars {first['start']}-{last['end']}):\n\n"
+            )
+            formatted += "\n\n".join(f"[{chunk.metadata['passage']}] {chunk.content}" for chunk in chunks)
+            return formatted, {"found": True, "passages": len(chunks)}
+
+        if not doc_id:
+            error_msg = "Error reading document: provide doc_id or doc_ids"
+            logger.log_tool_use("document_reader", {}, {"error": error_msg})
+            return error_msg
+
+        try:
+            input_data = {"doc_id": doc_id}
+            if passage is not None:
+                input_data.update(passage=passage, window=window)
+            key = normalize_args(input_data)
+            # "Not found" results are not cached: read_many shares these keys and treats
+            # every cached entry as a document
+            (result, output), cached = cache.get_or_compute(
+                "document_reader", key, read, cacheable=lambda entry: entry[1]["found"]
+            )
+            logger.log_tool_use("document_reader", input_data, {**output, **cache.log_fields(cached)})
+            return result
         except Exception as e:
             error_msg = f"Error reading document: {str(e)}"
             logger.log_tool_use(
@@ -363,13 +500,113 @@ def create_document_statistics_tool(retriever, logger: ToolLogger):
     return document_statistics
 
 
-def get_all_tools(retriever, logger: ToolLogger) -> List:
+def create_document_aggregate_tool(retriever, logger: ToolLogger):
+    """
+    Creates a tool that aggregates document amounts inside the retriever.
+    """
+
+    @tool
+    def document_aggregate(
+            metrics: Optional[List[Literal["count", "sum", "avg", "min", "max"]]] = None,
+            group_by: Optional[Literal["doc_type", "client", "date", "month", "year"]] = None,
+            doc_type: Optional[str] = None,
+            client: Optional[str] = None,
+            min_amount: Optional[float] = None,
+            max_amount: Optional[float] = None,
+            start_date: Optional[str] = None,
+            end_date: Optional[str] = None
+    ) -> str:
+        """
+        Compute totals, averages, minimums, maximums and counts of document amounts in one call,
+        without reading each document. Use it for questions over many documents.
+
+        Args:
+            metrics: Any of 'count', 'sum', 'avg', 'min', 'max' (default: sum and count)
+            group_by: Optional grouping: 'doc_type', 'client', 'date', 'month' or 'year'
+            doc_type: Only documents of this type (e.g., 'invoice', 'contract', 'claim')
+            client: Only documents for this client (case-insensitive exact name)
+            min_amount: Only documents with amount >= min_amount
+            max_amount: Only documents with amount <= max_amount
+            start_date: Only documents dated on or after this ISO date (YYYY-MM-DD)
+            end_date: Only documents dated on or before this ISO date (YYYY-MM-DD)
+
+        Examples:
+            - "Total of all invoices over $50,000 by client" → metrics=['sum'], doc_type='invoice',
+              min_amount=50000, group_by='client'
+            - "Average contract value" → metrics=['avg'], doc_type='contract'
+
+        Returns:
+            One line per group with the requested metrics
+        """
+        metrics = list(metrics) if metrics else ["sum", "count"]
+        input_data = {
+            "metrics": metrics,
+            "group_by": group_by,
+            "doc_type": doc_type,
+            "client": client,
+            "min_amount": min_amount,
+            "max_amount": max_amount,
+            "start_date": start_date,
+            "end_date": end_date
+        }
+        try:
+            rows = retriever.aggregate(
+                metrics=metrics,
+                group_by=group_by,
+                doc_type=doc_type,
+                client=client,
+                min_amount=min_amount,
+                max_amount=max_amount,
+                start_date=start_date,
+                end_date=end_date
+            )
+
+            filters = ", ".join(
+                f"{key}={value}" for key, value in input_data.items()
+                if key not in ("metrics", "group_by") and value is not None
+            )
+            formatted = f"AGGREGATE ({filters or 'all documents'})"
+            formatted += f" grouped by {group_by}:\n" if group_by else ":\n"
+
+            for row in rows:
+                parts = [f"count: {row['count']}"]
+                for metric in ("sum", "avg", "min", "max"):
+                    if metric in row:
+                        value = row[metric]
+                        parts.append(f"{metric}: " + (f"${value:,.2f}" if value is not None else "n/a"))
+                if row["documents_with_amounts"] != row["count"]:
+                    parts.append(f"documents with amounts: {row['documents_with_amounts']}")
+
+                label = f"{row[group_by] if row[group_by] is not None else '(none)'}: " if group_by else ""
+                formatted += f"  - {label}{', '.join(parts)}\n"
+
+            logger.log_tool_use("document_aggregate", input_data, {"groups": len(rows)})
+            return formatted
+
+        except Exception as e:
+            error_msg = f"Error aggregating documents: {str(e)}"
+            logger.log_tool_use("document_aggregate", input_data, {"error": error_msg})
+            return error_msg
+
+    return document_aggregate
+
+
+def get_all_tools(
+        retriever,
+        logger: ToolLogger,
+        cache: Optional[ToolResultCache] = None,
+        search_token_budget: int = DEFAULT_SEARCH_TOKEN_BUDGET,
+        counter: Optional[TokenCounter] = None
+) -> List:
     """
     Get all available tools for the agent.
+    document_search and document_reader share one result cache, tied to the retriever's corpus version.
     """
+    cache = cache or _corpus_cache(retriever)
     return [
         create_calculator_tool(logger),
-        create_document_search_tool(retriever, logger),
-        create_document_reader_tool(retriever, logger),
-        create_document_statistics_tool(retriever, logger)
+        create_document_search_tool(retriever, logger, cache, search_token_budget, counter),
+        create_document_reader_tool(retriever, logger, cache),
+        create_document_statistics_tool(retriever, logger),
+        create_document_aggregate_tool(retriever, logger)
     ]
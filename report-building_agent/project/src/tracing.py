@@ -0,0 +1,285 @@
+"""
+Timing spans for workflow runs.
+
+Tracer is a LangChain callback handler, attached to every run through the workflow
+config, that turns callback events into nested spans:
+- turn: one workflow invocation (a user turn, or a deferred memory update)
+- node: a graph node (classify_intent, the task agents, update_memory, and the task
+  agents' inner agent/tools steps)
+- tool: one tool call
+- llm: one model call, with the token usage it reported
+
+Each span records wall time, CPU time of the thread that ran it (when it started and
+ended on the same thread) and tokens, which are added up into every enclosing span.
+Finished spans go to a HistogramRegistry and, when a path is given, to a JSONL trace
+file written in the background by JsonlLogWriter.
+"""
+
+import bisect
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from log_writer import JsonlLogWriter
+
+# Histogram bucket upper bounds: 0.05 ms to ~105 s, doubling each step
+BUCKET_BOUNDS = [0.05 * 2 ** index for index in range(22)]
+
+
+class Histogram:
+    """Fixed-bucket histogram with count, sum, min and max"""
+
+    def __init__(self, bounds: List[float] = BUCKET_BOUNDS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the percentile, capped at the observed max"""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                bound = self.bounds[index] if index < len(self.bounds) else self.max
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 3) if self.count else 0.0,
+            "min": round(self.min, 3) if self.count else 0.0,
+            "max": round(self.max, 3),
+            "p50": round(self.percentile(0.50), 3),
+            "p95": round(self.percentile(0.95), 3),
+            "p99": round(self.percentile(0.99), 3),
+        }
+
+
+class HistogramRegistry:
+    """Named histograms, e.g. "node:qa_agent.wall_ms" or "tool:document_search.cpu_ms" """
+
+    def __init__(self):
+        self._histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, value: float):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(value)
+
+    def snapshot(self, prefix: str = "") -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                name: histogram.snapshot()
+                for name, histogram in sorted(self._histograms.items())
+                if name.startswith(prefix)
+            }
+
+
+class Span:
+    """One timed unit of work inside a turn"""
+
+    def __init__(self, kind: str, name: str, trace_id: Optional[str], parent: Optional["Span"]):
+        self.kind = kind
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.trace_id = trace_id or self.span_id
+        self.parent = parent
+        self.attributes: Dict[str, Any] = {}
+        self.tokens = {"input": 0, "output": 0, "total": 0}
+        self.error: Optional[str] = None
+
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self._thread = threading.get_ident()
+        self._cpu_start = time.thread_time()
+        self.wall_ms: Optional[float] = None
+        self.cpu_ms: Optional[float] = None
+
+    def finish(self):
+        self.wall_ms = (time.perf_counter() - self._start) * 1000
+        if threading.get_ident() == self._thread:
+            self.cpu_ms = (time.thread_time() - self._cpu_start) * 1000
+
+    def add_tokens(self, usage: Dict[str, int]):
+        span = self
+        while span is not None:
+            for key in span.tokens:
+                span.tokens[key] += usage.get(key, 0)
+            span = span.parent
+
+    def to_record(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent.span_id if self.parent else None,
+            "kind": self.kind,
+            "name": self.name,
+            "start": datetime.fromtimestamp(self.started_at).isoformat(),
+            "wall_ms": round(self.wall_ms, 3) if self.wall_ms is not None else None,
+            "cpu_ms": round(self.cpu_ms, 3) if self.cpu_ms is not None else None,
+            "tokens": self.tokens,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+def _usage(response) -> Dict[str, int]:
+    """Token usage from an LLMResult: message usage_metadata, else the provider's token_usage"""
+    for generations in response.generations or []:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return {
+                    "input": usage.get("input_tokens", 0),
+                    "output": usage.get("output_tokens", 0),
+                    "total": usage.get("total_tokens", 0),
+                }
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    return {
+        "input": usage.get("prompt_tokens", 0),
+        "output": usage.get("completion_tokens", 0),
+        "total": usage.get("total_tokens", 0),
+    }
+
+
+class Tracer(BaseCallbackHandler):
+    """
+    Builds spans from callback events; attach it with config["callbacks"].
+
+    Args:
+        trace_path: JSONL file for finished spans, None keeps them in the registry only
+        registry: histogram registry to feed (one is created if omitted)
+    """
+
+    # Handle events on the thread that emits them, so CPU time is measured on the right thread
+    run_inline = True
+
+    def __init__(self, trace_path: Optional[str] = None, registry: Optional[HistogramRegistry] = None):
+        self.trace_path = trace_path
+        self.registry = registry or HistogramRegistry()
+        self._writer = JsonlLogWriter(trace_path) if trace_path else None
+        # run_id -> span opened for that run, or the enclosing span for runs that are not traced
+        self._spans: Dict[Any, Optional[Span]] = {}
+        self._owned: Dict[Any, Span] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def to_directory(cls, traces_dir: str, registry: Optional[HistogramRegistry] = None) -> "Tracer":
+        """A tracer writing to traces_dir/trace_<timestamp>.jsonl"""
+        os.makedirs(traces_dir, exist_ok=True)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        return cls(os.path.join(traces_dir, f"trace_{timestamp}.jsonl"), registry)
+
+    def flush(self):
+        if self._writer is not None:
+            self._writer.flush()
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+    # Span bookkeeping
+
+    def _open(self, run_id, parent_run_id, kind: Optional[str], name: Optional[str], **attributes) -> None:
+        with self._lock:
+            parent = self._spans.get(parent_run_id)
+            if kind is None:
+                # Not traced itself: children attach to the enclosing span
+                self._spans[run_id] = parent
+                return
+            span = Span(kind, name, parent.trace_id if parent else None, parent)
+            span.attributes.update({k: v for k, v in attributes.items() if v is not None})
+            self._spans[run_id] = span
+            self._owned[run_id] = span
+
+    def _close(self, run_id, error: Optional[BaseException] = None, usage: Optional[Dict[str, int]] = None):
+        with self._lock:
+            self._spans.pop(run_id, None)
+            span = self._owned.pop(run_id, None)
+        if span is None:
+            return
+
+        span.finish()
+        if error is not None:
+            span.error = f"{type(error).__name__}: {error}"
+        if usage:
+            span.add_tokens(usage)
+
+        label = f"{span.kind}:{span.name}" if span.kind != "turn" else "turn"
+        self.registry.observe(f"{label}.wall_ms", span.wall_ms)
+        if span.cpu_ms is not None:
+            self.registry.observe(f"{label}.cpu_ms", span.cpu_ms)
+        if span.tokens["total"]:
+            self.registry.observe(f"{label}.tokens", span.tokens["total"])
+        if self._writer is not None:
+            self._writer.write(span.to_record())
+
+    # Callback events
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name")
+        metadata = metadata or {}
+        if parent_run_id is None:
+            self._open(run_id, None, "turn", name, thread_id=metadata.get("thread_id"))
+            return
+
+        with self._lock:
+            parent = self._spans.get(parent_run_id)
+        node = metadata.get("langgraph_node")
+        # A node's runnable reports nested runs under the node's name; only the outermost is a span
+        if node and name == node and not (parent is not None and parent.kind == "node" and parent.name == name):
+            self._open(run_id, parent_run_id, "node", name, namespace=metadata.get("checkpoint_ns") or None)
+        else:
+            self._open(run_id, parent_run_id, None, None)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._close(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._close(run_id, error)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name")
+        self._open(run_id, parent_run_id, "tool", name)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._close(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._close(run_id, error)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        invocation = kwargs.get("invocation_params") or {}
+        model = invocation.get("model") or invocation.get("model_name") or invocation.get("_type")
+        self._open(run_id, parent_run_id, "llm", model or "chat_model")
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, **kwargs):
+        self.on_chat_model_start(serialized, prompts, run_id=run_id, parent_run_id=parent_run_id, **kwargs)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._close(run_id, usage=_usage(response))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._close(run_id, error)
@@ -0,0 +1,26 @@
+import asyncio
+
+from assistant import DocumentAssistant
+from stub_llm import StubChatModel
+
+
+def test_idle_sessions_are_evicted_and_reloaded(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assistant = DocumentAssistant(
+        "unused", llm=StubChatModel(), traces_dir=None, max_sessions=2,
+        session_storage_path=str(tmp_path / "sessions")
+    )
+
+    async def run():
+        for session_id in ["a", "b", "c"]:
+            result = await assistant.aprocess_message(session_id, "What is the total of INV-001?")
+            assert result["success"]
+        assert list(assistant.sessions) == ["b", "c"]
+        assert assistant._session_locks == {}
+
+        result = await assistant.aprocess_message("a", "Summarize INV-002")
+        assert result["success"]
+        assert len(assistant.sessions["a"].conversation_history) == 2
+        assert list(assistant.sessions) == ["c", "a"]
+
+    asyncio.run(run())
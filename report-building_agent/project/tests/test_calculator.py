@@ -0,0 +1,89 @@
+from decimal import Decimal
+
+import pytest
+
+from calculator import CalculatorError, evaluate, evaluate_batch, format_decimal
+from prompts import get_chat_prompt_template
+
+
+@pytest.mark.parametrize("expression, expected", [
+    ("0.1 + 0.2", "0.3"),
+    ("(22000 + 15000) * 1.1", "40700"),
+    ("$1,250.50 + $749.50", "2000"),
+    ("200 * 15%", "30"),
+    ("17 % 5", "2"),
+    ("7 // 2", "3"),
+    ("2 ** 10", "1024"),
+    ("-3 + +5", "2"),
+    ("1200 × 3 ÷ 4", "900"),
+    ("round(2.345, 2)", "2.35"),
+    ("round(2.5)", "3"),
+    ("max(1, 7, 3) + min(4, 2) + abs(-1) + sum(1, 2, 3)", "16"),
+])
+def test_evaluates_with_exact_decimals(expression, expected):
+    assert format_decimal(evaluate(expression)) == expected
+
+
+def test_keeps_precision_beyond_floats():
+    assert evaluate("1 / 3") == Decimal("0.3333333333333333333333333333333333")
+    assert format_decimal(evaluate("10 ** 20 + 1")) == "100000000000000000001"
+
+
+@pytest.mark.parametrize("expression", [
+    "__import__('os').system('ls')",
+    "open('x')",
+    "(1).real",
+    "[1, 2]",
+    "'a' * 3",
+    "True + 1",
+    "1 if 1 else 2",
+    "x := 1",
+    "lambda: 1",
+    "1 < 2",
+    "~1",
+    "1 << 3",
+    "round(1, ndigits=2)",
+    "2 ** 1000",
+    "2 ** 0.5",
+    "1 / 0",
+    "0 / 0",
+    "((10**100)**100)**100",
+    "1e400",
+    "1e400 - 1e400",
+    "",
+    "1 +",
+    "1" * 1001,
+])
+def test_rejects_unsafe_or_invalid_expressions(expression):
+    with pytest.raises(CalculatorError):
+        evaluate(expression)
+
+
+def test_batch_resolves_names_in_dependency_order():
+    results = evaluate_batch({
+        "total": "subtotal + tax",
+        "tax": "subtotal * 10%",
+        "subtotal": "22000 + 15000",
+    })
+    assert list(results) == ["total", "tax", "subtotal"]
+    assert {name: format_decimal(value) for name, value in results.items()} == {
+        "total": "40700", "tax": "3700", "subtotal": "37000"
+    }
+
+
+@pytest.mark.parametrize("expressions, message", [
+    ({"a": "b + 1"}, "unknown name 'b'"),
+    ({"a": "b + 1", "b": "a * 2"}, "Circular reference"),
+    ({"max": "1"}, "Invalid name"),
+    ({"a": "1 +"}, "a: Invalid expression"),
+])
+def test_batch_reports_bad_names(expressions, message):
+    with pytest.raises(CalculatorError, match=message):
+        evaluate_batch(expressions)
+
+
+def test_calculation_prompt_example_is_not_a_template_variable():
+    template = get_chat_prompt_template("calculation")
+    assert set(template.input_variables) == {"input", "chat_history"}
+    messages = template.invoke({"input": "What is 2 + 2?", "chat_history": []}).to_messages()
+    assert '"subtotal"' in messages[0].content
@@ -0,0 +1,101 @@
+import operator
+from typing import Annotated, List, TypedDict
+
+import pytest
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import END, StateGraph
+
+from checkpointer import SQLiteCheckpointSaver
+
+
+class CounterState(TypedDict):
+    count: int
+    steps: Annotated[List[str], operator.add]
+
+
+def build_graph(checkpointer):
+    def first(state):
+        return {"count": state["count"] + 1, "steps": ["first"]}
+
+    def second(state):
+        return {"count": state["count"] * 2, "steps": ["second"]}
+
+    graph = StateGraph(CounterState)
+    graph.add_node("first", first)
+    graph.add_node("second", second)
+    graph.set_entry_point("first")
+    graph.add_edge("first", "second")
+    graph.add_edge("second", END)
+    return graph.compile(checkpointer=checkpointer)
+
+
+def run_turns(graph, thread_id="t1", turns=3):
+    config = {"configurable": {"thread_id": thread_id}}
+    for turn in range(turns):
+        graph.invoke({"count": turn, "steps": [f"turn {turn}"]}, config)
+    return config
+
+
+def history(graph, config):
+    return [(snapshot.values, snapshot.next, snapshot.metadata["step"]) for snapshot in graph.get_state_history(config)]
+
+
+def test_put_and_list_match_in_memory_saver(tmp_path):
+    expected = build_graph(InMemorySaver())
+    actual = build_graph(SQLiteCheckpointSaver(str(tmp_path / "checkpoints.db"), keep_checkpoints=0))
+    expected_config = run_turns(expected)
+    actual_config = run_turns(actual)
+
+    assert actual.get_state(actual_config).values == expected.get_state(expected_config).values
+    assert history(actual, actual_config) == history(expected, expected_config)
+
+    saver = actual.checkpointer
+    listed = list(saver.list(actual_config, limit=2))
+    assert len(listed) == 2
+    assert [c.metadata["step"] for c in listed] == [c.metadata["step"] for c in expected.checkpointer.list(
+        expected_config, limit=2
+    )]
+    before = list(saver.list(actual_config, before=listed[0].config))
+    assert [c.checkpoint["id"] for c in before] == [c.checkpoint["id"] for c in saver.list(actual_config)][1:]
+    assert [c.metadata["source"] for c in saver.list(actual_config, filter={"source": "input"})] == ["input"] * 3
+
+
+def test_checkpoints_survive_reopening_and_cache_eviction(tmp_path):
+    db_path = str(tmp_path / "checkpoints.db")
+    graph = build_graph(SQLiteCheckpointSaver(db_path, max_cache_bytes=1))
+    run_turns(graph, "a")
+    config = run_turns(graph, "b")
+    assert graph.checkpointer.snapshot()["evictions"] > 0
+    values = graph.get_state(config).values
+
+    reopened = build_graph(SQLiteCheckpointSaver(db_path))
+    assert reopened.get_state(config).values == values
+    assert reopened.get_state({"configurable": {"thread_id": "a"}}).values["steps"][-1] == "second"
+
+
+def test_keep_checkpoints_bounds_each_thread(tmp_path):
+    graph = build_graph(SQLiteCheckpointSaver(str(tmp_path / "checkpoints.db"), keep_checkpoints=3))
+    expected = build_graph(InMemorySaver())
+    config = run_turns(graph, turns=5)
+    run_turns(expected, turns=5)
+
+    assert len(list(graph.checkpointer.list(config))) == 3
+    assert graph.get_state(config).values == expected.get_state(config).values
+
+
+@pytest.mark.parametrize("strategy", ["keep_latest", "delete"])
+def test_prune(tmp_path, strategy):
+    db_path = str(tmp_path / "checkpoints.db")
+    graph = build_graph(SQLiteCheckpointSaver(db_path, keep_checkpoints=0))
+    config = run_turns(graph)
+    other = run_turns(graph, "other", turns=1)
+    latest = graph.get_state(config)
+
+    graph.checkpointer.prune(["t1"], strategy=strategy)
+    remaining = list(SQLiteCheckpointSaver(db_path).list(config))
+    if strategy == "keep_latest":
+        assert [c.checkpoint["id"] for c in remaining] == [latest.config["configurable"]["checkpoint_id"]]
+        assert graph.get_state(config).values == latest.values
+    else:
+        assert remaining == []
+    assert len(list(graph.checkpointer.list(other))) > 1
@@ -0,0 +1,74 @@
+import math
+
+from indexes import AmountIndex
+from ingestion import parse_amount
+from retrieval import Document, SimulatedRetriever
+
+
+def build_index(pairs):
+    index = AmountIndex()
+    for doc_id, amount in pairs:
+        index.add(doc_id, amount)
+    return index
+
+
+def test_range_is_inclusive_and_sorted():
+    index = build_index([("B", 500.0), ("A", 100.0), ("C", 1000.0), ("D", 500.0)])
+    assert index.range(100.0, 500.0) == [("A", 100.0), ("B", 500.0), ("D", 500.0)]
+    assert index.range(min_amount=600.0) == [("C", 1000.0)]
+    assert index.range(max_amount=50.0) == []
+    assert [doc_id for doc_id, _ in index.range(descending=True)] == ["C", "D", "B", "A"]
+    assert (index.min(), index.max()) == (100.0, 1000.0)
+
+
+def test_add_many_matches_single_adds():
+    pairs = [(f"DOC-{i:03d}", float((i * 37) % 50)) for i in range(100)]
+    bulk = AmountIndex()
+    bulk.add("DOC-000", 999.0)
+    bulk.add_many(pairs)
+    assert bulk.range() == sorted(build_index(pairs).range(), key=lambda pair: pair[1])
+    assert bulk.get("DOC-000") == 0.0
+    assert len(bulk) == 100
+
+
+def test_closest_walks_outwards_within_bounds():
+    index = build_index([("A", 100.0), ("B", 200.0), ("C", 260.0), ("D", 400.0)])
+    assert index.closest(225.0, 0.0, 1000.0) == [("B", 200.0), ("C", 260.0), ("A", 100.0), ("D", 400.0)]
+    assert index.closest(225.0, 150.0, 300.0) == [("B", 200.0), ("C", 260.0)]
+    assert index.closest(5000.0, 0.0, 1000.0)[0] == ("D", 400.0)
+
+
+def test_remove_with_ties_drops_only_that_document():
+    index = build_index([("A", 50.0), ("B", 50.0), ("C", 50.0), ("D", 75.0)])
+    index.remove("B")
+    index.remove("missing")
+    assert index.range() == [("A", 50.0), ("C", 50.0), ("D", 75.0)]
+    assert "B" not in index
+
+    index.add("A", 80.0)
+    assert index.range() == [("C", 50.0), ("D", 75.0), ("A", 80.0)]
+
+
+def test_non_finite_amounts_are_not_amounts():
+    assert parse_amount(float("nan")) is None
+    assert parse_amount(float("inf")) is None
+    assert parse_amount("9" * 400) is None
+    assert parse_amount("$214,500.00") == 214500.0
+    assert parse_amount("-$1,200") == -1200.0
+
+
+def test_nan_metadata_does_not_corrupt_amount_lookups():
+    retriever = SimulatedRetriever()
+    before = retriever.get_statistics()
+    retriever.add_documents([
+        Document("B", "B", "b", "invoice", {"total": 5.0}),
+        Document("A", "A", "a", "invoice", {"total": math.nan}),
+        Document("C", "C", "c", "invoice", {"total": 1.0}),
+    ])
+
+    in_range = retriever.retrieve_by_amount_range(0, 10)
+    assert [chunk.doc_id for chunk in in_range] == ["B", "C"]
+    stats = retriever.get_statistics()
+    assert (stats["min_amount"], stats["max_amount"]) == (1.0, before["max_amount"])
+    assert stats["documents_with_amounts"] == before["documents_with_amounts"] + 2
+    assert stats["total_documents"] == before["total_documents"] + 3
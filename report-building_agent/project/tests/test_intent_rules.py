@@ -0,0 +1,39 @@
+import pytest
+
+from intent_rules import DEFAULT_FAST_PATH_THRESHOLD, classify_intent_by_rules
+
+
+@pytest.mark.parametrize("text, intent_type", [
+    ("calculate the sum of INV-001 and INV-002", "calculation"),
+    ("summarize all contracts", "summarization"),
+])
+def test_obvious_inputs_take_the_fast_path(text, intent_type):
+    intent = classify_intent_by_rules(text)
+    assert intent.intent_type == intent_type
+    assert intent.confidence >= DEFAULT_FAST_PATH_THRESHOLD
+
+
+@pytest.mark.parametrize("text", ["Add 250 and 400", "Add up the invoice totals", "What is 1200 + 350?"])
+def test_adding_numbers_is_a_calculation(text):
+    assert classify_intent_by_rules(text).intent_type == "calculation"
+
+
+@pytest.mark.parametrize("text", [
+    "Add a note to CLM-001",
+    "Is 2024-01-15 the date for INV-001?",
+    "Were any claims filed on 03/01/2024?",
+])
+def test_non_calculations_are_not_scored_as_calculations(text):
+    intent = classify_intent_by_rules(text)
+    assert intent.intent_type != "calculation"
+    assert intent.confidence < DEFAULT_FAST_PATH_THRESHOLD
+
+
+def test_mixed_signals_fall_back_to_the_llm():
+    intent = classify_intent_by_rules("summarize and total these invoices")
+    assert intent.confidence < DEFAULT_FAST_PATH_THRESHOLD
+
+
+def test_no_evidence_is_unknown():
+    intent = classify_intent_by_rules("hello there")
+    assert (intent.intent_type, intent.confidence) == ("unknown", 0.0)
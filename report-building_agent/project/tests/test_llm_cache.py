@@ -0,0 +1,101 @@
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration
+
+from llm_cache import ResponseCache
+
+LLM = "stub-model"
+
+
+def prompt(question, system="You answer questions about documents."):
+    return dumps([SystemMessage(content=system), HumanMessage(content=question)])
+
+
+def answer(text):
+    return [ChatGeneration(message=AIMessage(content=text))]
+
+
+def cached_text(cache, question, **kwargs):
+    result = cache.lookup(prompt(question, **kwargs), LLM)
+    return None if result is None else result[0].message.content
+
+
+def test_exact_hit_ignores_whitespace():
+    cache = ResponseCache()
+    cache.update(prompt("Show me invoice INV-001"), LLM, answer("INV-001 totals $22,000"))
+
+    assert cached_text(cache, "  Show me   invoice INV-001 ") == "INV-001 totals $22,000"
+    assert cache.lookup(prompt("Show me invoice INV-001"), "other-model") is None
+    assert cache.stats["exact_hits"] == 1
+
+
+def test_similarity_hit_above_threshold():
+    cache = ResponseCache(similarity_threshold=0.9)
+    cache.update(prompt("show me the invoice for acme corporation"), LLM, answer("Acme invoice"))
+
+    assert cached_text(cache, "please show me the invoice for acme corporation") == "Acme invoice"
+    assert cache.stats["similar_hits"] == 1
+
+
+def test_similarity_misses_below_threshold_or_on_other_ids():
+    cache = ResponseCache(similarity_threshold=0.95)
+    cache.update(prompt("show me the invoice for acme corporation"), LLM, answer("Acme invoice"))
+    cache.update(prompt("show me invoice INV-001"), LLM, answer("INV-001"))
+
+    assert cached_text(cache, "please show me the invoice for acme corporation") is None
+    assert cached_text(cache, "what contracts expire next year") is None
+    assert cached_text(cache, "show me invoice INV-002") is None
+    assert cache.stats["similar_hits"] == 0
+
+
+def test_similarity_tier_is_off_by_default():
+    cache = ResponseCache()
+    cache.update(prompt("show me the invoice for acme corporation"), LLM, answer("Acme invoice"))
+
+    assert cached_text(cache, "please show me the invoice for acme corporation") is None
+
+
+def test_corpus_version_change_drops_entries():
+    version = {"value": 0}
+    cache = ResponseCache(similarity_threshold=0.9, version_fn=lambda: version["value"])
+    cache.update(prompt("show me the invoice for acme corporation"), LLM, answer("Acme invoice"))
+
+    version["value"] += 1
+    assert cached_text(cache, "show me the invoice for acme corporation") is None
+    assert cached_text(cache, "please show me the invoice for acme corporation") is None
+    assert cache.snapshot()["entries"] == 0
+    assert cache.stats["invalidations"] == 1
+
+
+def test_prompt_change_is_not_answered_from_cache():
+    cache = ResponseCache(similarity_threshold=0.9)
+    cache.update(prompt("show me the invoice for acme corporation"), LLM, answer("Acme invoice"))
+
+    other_system = "You summarize documents in one sentence."
+    assert cached_text(cache, "show me the invoice for acme corporation", system=other_system) is None
+    assert cached_text(cache, "please show me the invoice for acme corporation", system=other_system) is None
+
+
+def test_ttl_and_capacity():
+    cache = ResponseCache(max_entries=1, ttl_seconds=None)
+    cache.update(prompt("first question"), LLM, answer("first"))
+    cache.update(prompt("second question"), LLM, answer("second"))
+
+    assert cached_text(cache, "first question") is None
+    assert cached_text(cache, "second question") == "second"
+    assert cache.stats["evictions"] == 1
+
+    expired = ResponseCache(ttl_seconds=-1)
+    expired.update(prompt("first question"), LLM, answer("first"))
+    assert cached_text(expired, "first question") is None
+
+
+def test_replayed_tool_calls_get_new_ids():
+    cache = ResponseCache()
+    message = AIMessage(content="", id="run-1", tool_calls=[{"name": "calculator", "args": {}, "id": "call_1"}])
+    cache.update(prompt("add 2 and 3"), LLM, [ChatGeneration(message=message)])
+
+    replayed = cache.lookup(prompt("add 2 and 3"), LLM)[0].message
+    assert replayed.id is None
+    assert replayed.tool_calls[0]["id"] != "call_1"
+    assert replayed.tool_calls[0]["name"] == "calculator"
@@ -0,0 +1,21 @@
+import pytest
+
+from log_writer import JsonlLogWriter
+
+
+def test_rotation_keeps_backups_oldest_first(tmp_path):
+    writer = JsonlLogWriter(str(tmp_path / "log.jsonl"), max_bytes=40, backup_count=2)
+    for index in range(6):
+        writer.write({"n": index})
+        writer.flush()
+    records = [record["n"] for record in writer.read()]
+    writer.close()
+
+    assert len(writer.files()) <= 3
+    assert records == sorted(records)
+    assert records[-1] == 5
+
+
+def test_backup_count_below_one_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        JsonlLogWriter(str(tmp_path / "log.jsonl"), backup_count=0)
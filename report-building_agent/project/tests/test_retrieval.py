@@ -0,0 +1,71 @@
+from datetime import date
+
+import pytest
+
+from retrieval import BaseRetriever, Document, SimulatedRetriever
+from sqlite_retrieval import SQLiteRetriever
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def retriever(request, tmp_path):
+    if request.param == "memory":
+        retriever = SimulatedRetriever()
+    else:
+        retriever = SQLiteRetriever(str(tmp_path / "documents.db"))
+    retriever.add_documents(
+        Document(f"INV-{i:04d}", f"Invoice {i}", "Invoice text", "invoice", {"total": float(i)})
+        for i in range(1, 201)
+    )
+    return retriever
+
+
+def test_base_retriever_is_abstract():
+    with pytest.raises(TypeError):
+        BaseRetriever()
+
+
+def test_limit_keeps_the_first_hits_in_order(retriever):
+    top = retriever.retrieve_by_amount_range(min_amount=100, max_amount=200, limit=3)
+    assert [chunk.doc_id for chunk in top] == ["INV-0200", "INV-0199", "INV-0198"]
+    closest = retriever.retrieve_by_approximate_amount(150, limit=1)
+    assert [chunk.doc_id for chunk in closest] == ["INV-0150"]
+    assert len(retriever.retrieve_by_type("invoice", limit=5)) == 5
+    assert retriever.retrieve_by_exact_amount(42, limit=0) == []
+    assert len(retriever.retrieve_all(limit=2)) == 2
+    assert len(retriever.retrieve_by_amount_range(min_amount=100, max_amount=200)) == 101
+
+
+def test_chunk_metadata_edits_do_not_reach_the_cache():
+    retriever = SimulatedRetriever()
+    chunk = retriever.get_document_by_id("INV-001")
+    chunk.metadata["total"] = -1
+    chunk.metadata.pop("client")
+
+    fresh = retriever.get_document_by_id("INV-001")
+    assert "total" not in fresh.metadata
+    assert fresh.metadata["client"] == "Acme Corporation"
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"group_by": "client"},
+    {"group_by": "client", "client": "acme"},
+    {"group_by": "month"},
+    {"group_by": "year", "start_date": "2024-02-01"},
+    {"group_by": "doc_type", "min_amount": 50},
+    {},
+])
+def test_aggregate_matches_between_backends(tmp_path, kwargs):
+    documents = [
+        Document("A-1", "Invoice", "text", "invoice", {"client": "Acme", "date": "2024-01-05", "total": 100}),
+        Document("A-2", "Invoice", "text", "Invoice", {"client": "ACME", "date": "2024-02-10", "total": 40}),
+        Document("A-3", "Invoice", "text", "invoice", {"client": "acme", "total": 75}),
+        Document("A-4", "Contract", "text", "contract", {"client": 42, "date": date(2024, 3, 1), "amount": 10}),
+        Document("A-5", "Note", "text", "note", {}),
+    ]
+    memory = SimulatedRetriever()
+    sqlite = SQLiteRetriever(str(tmp_path / "documents.db"))
+    memory.add_documents(documents)
+    sqlite.add_documents(documents)
+
+    metrics = ["count", "sum", "min", "max"]
+    assert memory.aggregate(metrics=metrics, **kwargs) == sqlite.aggregate(metrics=metrics, **kwargs)
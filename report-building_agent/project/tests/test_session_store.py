@@ -0,0 +1,76 @@
+import sqlite3
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from schemas import SessionState
+from session_store import SessionStore
+
+
+def add_turn(store, session, index):
+    turn = {
+        "user_input": f"question {index}",
+        "response": f"answer {index}",
+        "messages": [HumanMessage(content=f"question {index}"), AIMessage(content=f"answer {index}")],
+    }
+    session.conversation_history.append(turn)
+    session.document_context = [f"INV-{index:03d}"]
+    store.append_turn(session, turn)
+
+
+def turn_rows(db_path, session_id):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute(
+            "SELECT first_turn, last_turn FROM session_turns WHERE session_id = ? ORDER BY first_turn",
+            (session_id,)
+        ).fetchall()
+
+
+def new_session(session_id="s1"):
+    return SessionState(session_id=session_id, user_id="u1", conversation_history=[], document_context=[])
+
+
+def test_append_round_trip(tmp_path):
+    db_path = str(tmp_path / "sessions.db")
+    store = SessionStore(db_path, compact_every=0)
+    session = new_session()
+    for index in range(3):
+        add_turn(store, session, index)
+
+    loaded = store.load("s1")
+    assert [turn["user_input"] for turn in loaded.conversation_history] == ["question 0", "question 1", "question 2"]
+    assert isinstance(loaded.conversation_history[2]["messages"][1], AIMessage)
+    assert loaded.conversation_history[2]["messages"][1].content == "answer 2"
+    assert loaded.document_context == ["INV-002"]
+    assert turn_rows(db_path, "s1") == [(0, 0), (1, 1), (2, 2)]
+    assert store.exists("s1") and not store.exists("s2")
+    assert store.list_sessions("u1")[0]["turn_count"] == 3
+
+
+def test_compaction_folds_deltas_without_changing_history(tmp_path):
+    db_path = str(tmp_path / "sessions.db")
+    store = SessionStore(db_path, compact_every=4)
+    session = new_session()
+    for index in range(10):
+        add_turn(store, session, index)
+
+    # One segment per compaction (after turns 4 and 8), then two fresh deltas
+    assert turn_rows(db_path, "s1") == [(0, 3), (4, 7), (8, 8), (9, 9)]
+    assert store.compact("s1") == 2
+    assert turn_rows(db_path, "s1") == [(0, 3), (4, 7), (8, 9)]
+
+    loaded = store.load("s1")
+    assert [turn["user_input"] for turn in loaded.conversation_history] == [f"question {i}" for i in range(10)]
+    assert all(isinstance(turn["messages"][0], HumanMessage) for turn in loaded.conversation_history)
+
+
+def test_save_replaces_the_whole_session(tmp_path):
+    db_path = str(tmp_path / "sessions.db")
+    store = SessionStore(db_path, compact_every=0)
+    session = new_session()
+    for index in range(3):
+        add_turn(store, session, index)
+
+    session.conversation_history = session.conversation_history[:1]
+    store.save(session)
+    assert turn_rows(db_path, "s1") == [(0, 0)]
+    assert len(store.load("s1").conversation_history) == 1
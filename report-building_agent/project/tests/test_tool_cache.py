@@ -0,0 +1,73 @@
+from retrieval import Document, SimulatedRetriever
+from tool_cache import ToolResultCache, normalize_args
+
+
+class Counter:
+    def __init__(self, result):
+        self.result = result
+        self.calls = 0
+
+    def __call__(self, *args):
+        self.calls += 1
+        return self.result(*args) if callable(self.result) else self.result
+
+
+def test_normalize_args_ignores_spacing_case_and_number_types():
+    assert normalize_args({"query": "  Acme   Corp ", "limit": None, "total": 50000}, ("query",)) == \
+        normalize_args({"query": "acme corp", "total": 50000.0})
+
+
+def test_hits_until_the_corpus_version_changes():
+    retriever = SimulatedRetriever()
+    cache = ToolResultCache(version_fn=lambda: retriever.corpus_version)
+    compute = Counter("result")
+
+    assert cache.get_or_compute("tool", "key", compute) == ("result", False)
+    assert cache.get_or_compute("tool", "key", compute) == ("result", True)
+    assert compute.calls == 1
+
+    retriever.add_documents([Document("NEW-001", "New", "New text", "note", {})])
+    assert cache.get_or_compute("tool", "key", compute) == ("result", False)
+    assert compute.calls == 2
+    assert cache.stats["invalidations"] == 1
+
+
+def test_batch_entries_are_dropped_on_version_change():
+    version = {"value": 0}
+    cache = ToolResultCache(version_fn=lambda: version["value"])
+    compute = Counter(lambda keys: {key: key.upper() for key in keys})
+
+    assert cache.get_or_compute_many("tool", ["a", "b"], compute) == ({"a": "A", "b": "B"}, 0)
+    assert cache.get_or_compute_many("tool", ["a", "b"], compute) == ({"a": "A", "b": "B"}, 2)
+    version["value"] += 1
+    assert cache.get_or_compute_many("tool", ["a"], compute) == ({"a": "A"}, 0)
+    assert compute.calls == 2
+
+
+def test_negative_results_are_not_cached():
+    cache = ToolResultCache()
+    compute = Counter(("Document with ID X not found.", {"found": False}))
+
+    for _ in range(2):
+        result, cached = cache.get_or_compute("reader", "x", compute, cacheable=lambda entry: entry[1]["found"])
+        assert result[1] == {"found": False} and not cached
+    assert compute.calls == 2
+    assert cache.snapshot()["entries"] == 0
+
+    # Keys the batch compute leaves out are looked up again next time
+    batch = Counter(lambda keys: {key: key for key in keys if key != "missing"})
+    assert cache.get_or_compute_many("reader", ["found", "missing"], batch) == ({"found": "found"}, 0)
+    assert cache.get_or_compute_many("reader", ["found", "missing"], batch) == ({"found": "found"}, 1)
+    assert batch.calls == 2
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ToolResultCache(max_entries=2)
+    for key in ("a", "b"):
+        cache.get_or_compute("tool", key, lambda: key)
+    cache.get_or_compute("tool", "a", lambda: "a")
+    cache.get_or_compute("tool", "c", lambda: "c")
+
+    assert cache.get_or_compute("tool", "a", lambda: "recomputed") == ("a", True)
+    assert cache.get_or_compute("tool", "b", lambda: "recomputed") == ("recomputed", False)
+    assert cache.stats["evictions"] == 2
@@ -0,0 +1,38 @@
+import pytest
+
+from retrieval import SimulatedRetriever
+from tool_cache import ToolResultCache, normalize_args
+from tools import ToolLogger, create_document_reader_tool
+
+
+@pytest.fixture
+def logger(tmp_path):
+    logger = ToolLogger(logs_dir=str(tmp_path))
+    yield logger
+    logger.close()
+
+
+def test_batch_read_reports_an_id_missed_by_a_single_read(logger):
+    retriever = SimulatedRetriever()
+    cache = ToolResultCache(version_fn=lambda: retriever.corpus_version)
+    reader = create_document_reader_tool(retriever, logger, cache)
+
+    assert reader.invoke({"doc_id": "INV-999"}) == "Document with ID INV-999 not found."
+    for _ in range(2):
+        result = reader.invoke({"doc_ids": ["INV-001", "INV-999"]})
+        assert result.startswith("Read 1 of 2 document(s); not found: INV-999")
+        assert "Document with ID INV-999 not found." not in result
+    assert reader.invoke({"doc_id": "INV-999"}) == "Document with ID INV-999 not found."
+
+
+def test_batch_read_skips_negative_entries_already_in_the_cache(logger):
+    retriever = SimulatedRetriever()
+    cache = ToolResultCache(version_fn=lambda: retriever.corpus_version)
+    cache.get_or_compute(
+        "document_reader", normalize_args({"doc_id": "INV-999"}),
+        lambda: ("Document with ID INV-999 not found.", {"found": False})
+    )
+    reader = create_document_reader_tool(retriever, logger, cache)
+
+    result = reader.invoke({"doc_ids": ["INV-999", "INV-001"]})
+    assert result.startswith("Read 1 of 2 document(s); not found: INV-999")